@@ -2,7 +2,7 @@ __all__ = ["BallDetector"]
 
 import math
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import cv2 as cv
 import numpy as np
@@ -29,6 +29,8 @@ class BallDetector:
         self._vid_dir: Path = self._root_dir / "videos"
         self._frames_dir: Path = self._root_dir / "frames"
         self._all_detections = []
+        self._init_ball_pos: Optional[Tuple[float, float]] = None
+        self._init_ball_pos_confidence: float = 0.0
 
     def get_ball_detections(
         self,
@@ -306,6 +308,117 @@ class BallDetector:
 
         return filtered_dets
 
+    def seed_init_ball_pos(
+        self,
+        frame_detections: List[List],
+        *,
+        n_frames: int = 12,
+        min_ball_travel_dist: float = 5,
+        max_ball_travel_dist: float = 130,
+        min_det_area: float = 2.0,
+        max_det_area: float = 65.0,
+        max_gap: int = 4,
+        gate_radius: float = 15.0,
+    ) -> Tuple[Optional[Tuple[float, float]], float]:
+        """
+        Automatically finds the ball in the first frame, without the user clicking on it. A track is grown from each
+        candidate in the first frame through the candidates in the following frames, each pair of candidates within
+        the acceptable range of motion starts a track which is extended by its constant velocity prediction. The
+        candidate whose track has the most consistent motion over the most frames and the most consistent size is chosen.
+        :param frame_detections: All detections in each frame, see get_ball_detections
+        :param n_frames: Number of frames to track candidates through
+        :param min_ball_travel_dist: Minimum distance the ball can travel between frames
+        :param max_ball_travel_dist: Maximum distance the ball can travel between frames
+        :param min_det_area: Minimum size of a ball candidate
+        :param max_det_area: Maximum size of a ball candidate
+        :param max_gap: Maximum number of consecutive frames a track can go undetected in
+        :param gate_radius: Maximum distance per frame between a track's prediction and the candidate extending it
+        :return: The ball position in the first frame, None if there are no candidates, and the confidence in it. Each
+        detection supports a track by how well its constant velocity prediction matches it, the confidence is the
+        fraction of the chosen track's support that no other candidate's track has.
+        """
+        candidates = [
+            np.array(
+                [(x, y, z) for x, y, z in dets if min_det_area < z < max_det_area],
+                dtype=float,
+            ).reshape(-1, 3)
+            for dets in frame_detections[:n_frames]
+        ]
+        n_frames = len(candidates)
+        if n_frames < 2 or candidates[0].shape[0] == 0:
+            return None, 0.0
+
+        # The best track through each candidate in the first frame, as a dict of frame number to (detection, support)
+        tracks = []
+        for first_det in candidates[0]:
+            best_track, best_score = {0: (first_det, 1.0)}, 1.0
+            for j in range(1, min(max_gap + 1, n_frames)):
+                travel_dists = (
+                    np.linalg.norm(candidates[j][:, :2] - first_det[:2], axis=1) / j
+                )
+                for next_det in candidates[j][
+                    (min_ball_travel_dist < travel_dists)
+                    & (travel_dists < max_ball_travel_dist)
+                ]:
+                    track = self._extend_track(
+                        {0: (first_det, 1.0), j: (next_det, 1.0)},
+                        candidates,
+                        max_gap,
+                        gate_radius,
+                    )
+                    sizes = np.array([det[2] for det, _ in track.values()])
+                    score = sum(support for _, support in track.values()) - np.std(
+                        sizes
+                    ) / np.mean(sizes)
+                    if score > best_score:
+                        best_track, best_score = track, score
+            tracks.append((best_score, best_track))
+
+        tracks.sort(key=lambda track: track[0], reverse=True)
+        best_track = tracks[0][1]
+        best_support = sum(support for i, (_, support) in best_track.items() if i > 0)
+        if best_support == 0:
+            return None, 0.0
+
+        # Other tracks often pick up the ball after their first frame, only what they don't share with the best counts
+        other_support = 0.0
+        for _, track in tracks[1:]:
+            other_support = max(
+                other_support,
+                sum(
+                    support
+                    for i, (det, support) in track.items()
+                    if i > 0
+                    and (i not in best_track or np.any(best_track[i][0] != det))
+                ),
+            )
+        confidence = max(0.0, 1 - other_support / best_support)
+
+        first_det = best_track[0][0]
+        return (first_det[0], first_det[1]), confidence
+
+    @staticmethod
+    def _extend_track(
+        track: dict, candidates: List[np.ndarray], max_gap: int, gate_radius: float
+    ) -> dict:
+        for k in range(max(track) + 1, len(candidates)):
+            prev_i, last_i = sorted(track)[-2:]
+            if k - last_i > max_gap:
+                break
+            if candidates[k].shape[0] == 0:
+                continue
+            last_pos = track[last_i][0][:2]
+            velocity = (last_pos - track[prev_i][0][:2]) / (last_i - prev_i)
+            predicted = last_pos + velocity * (k - last_i)
+            dists = np.linalg.norm(candidates[k][:, :2] - predicted, axis=1)
+            closest = np.argmin(dists)
+            if dists[closest] < gate_radius * (k - last_i):
+                # The ball moves smoothly, the prediction error is small relative to the distance travelled
+                travelled = np.linalg.norm(candidates[k][closest, :2] - last_pos)
+                support = max(0.0, 1 - dists[closest] / max(travelled, 1e-5))
+                track[k] = (candidates[k][closest], support)
+        return track
+
     def get_filtered_ball_detections(
         self,
         vid_fname: str,
@@ -324,9 +437,13 @@ class BallDetector:
         disable_progbar: bool = False,
         visualise=None,
         sim_id: int,
+        init_ball_pos: Optional[Tuple[float, float]] = None,
+        min_seed_confidence: float = 0.4,
     ) -> np.ndarray:
         """
-        Returns a single detection per frame by filtering all detections in each frame by candidate size and speed
+        Returns a single detection per frame by filtering all detections in each frame by candidate size and speed. The
+        ball is found in the first frame by seed_init_ball_pos, the user is only asked to click on it if the
+        seed's confidence is below min_seed_confidence.
         """
 
         # Get all ball detection candidates
@@ -345,9 +462,22 @@ class BallDetector:
             visualise=visualise,
         )
 
-        init_ball_pos = get_init_ball_pos(self._vid_dir, vid_fname)
+        if init_ball_pos is not None:
+            confidence = 1.0
+        else:
+            init_ball_pos, confidence = self.seed_init_ball_pos(
+                all_detections,
+                min_ball_travel_dist=min_ball_travel_dist,
+                max_ball_travel_dist=max_ball_travel_dist,
+                min_det_area=min_det_area,
+                max_det_area=max_det_area,
+            )
+            if init_ball_pos is None or confidence < min_seed_confidence:
+                init_ball_pos = get_init_ball_pos(self._vid_dir, vid_fname)
+                confidence = 1.0
+        self._init_ball_pos, self._init_ball_pos_confidence = init_ball_pos, confidence
 
-        # Filter detections using the user provided initial ball position
+        # Filter detections using the initial ball position
         filtered_dets = self._filter_ball_detections(
             sim_id=sim_id,
             frame_detections=all_detections,
@@ -364,3 +494,10 @@ class BallDetector:
         # Arbitrarily select first detection in frame detections if more than one detection present.
         # This is in order to get one detection per frame to form the detections_IC for the KF.
         return np.array([detection[0] for detection in filtered_dets])
+
+    def get_init_ball_pos(self) -> Optional[Tuple[float, float]]:
+        """The ball position in the first frame used by the last call to get_filtered_ball_detections"""
+        return self._init_ball_pos
+
+    def get_init_ball_pos_confidence(self) -> float:
+        return self._init_ball_pos_confidence
@@ -1 +1,10 @@
-from .match_simulator import *
+from .ballistic_simulator import *
+
+# PyChrono is optional, without it only the ballistic simulator is available
+try:
+    from .match_simulator import *
+    from .sim_farm import *
+    from .ball_flight_simulator import *
+except ModuleNotFoundError as e:
+    if e.name is None or not e.name.startswith("pychrono"):
+        raise
@@ -0,0 +1,147 @@
+__all__ = ["BallFlightSimulator"]
+
+import logging
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+import pychrono as chrono
+from tqdm import tqdm
+
+from ai_umpire.simulation.fixed_sim_objs import make_court
+from ai_umpire.simulation.match_simulator import make_ball
+from ai_umpire.simulation.sim_farm import SimScenario
+
+# Collision family of the balls, balls in this family don't collide with each other
+BALL_COLLISION_FAMILY: int = 2
+
+
+class BallFlightSimulator:
+    """
+    Simulates many independent balls in one system with the court but no players, so system setup and the collision
+    broad-phase are paid once for every trajectory. The balls are in their own collision family which doesn't collide
+    with itself, so each ball only interacts with the court. Ball positions are exported per ball, in the same format
+    as MatchSimulator, nothing is exported for rendering as every ball would appear in the same images.
+    """
+
+    def __init__(
+        self,
+        sim_ids: Sequence[int],
+        root: Path,
+        sim_step_sz: float,
+        ball_init_positions: Sequence[chrono.ChVectorD],
+        ball_vels: Sequence[chrono.ChVectorD],
+        ball_accs: Sequence[chrono.ChVectorD],
+        ball_rot_dts: Sequence[chrono.ChQuaternionD],
+    ) -> None:
+        """
+        :param sim_ids: The id number of each ball's simulation, its positions are exported to sim_<sim id>.csv
+        :param root: Root of the data directory
+        :param sim_step_sz: Simulation step size, in seconds
+        :param ball_init_positions: Initial position of each ball
+        :param ball_vels: Initial velocity of each ball
+        :param ball_accs: Initial acceleration of each ball
+        :param ball_rot_dts: Rotational velocity of each ball as a quaternion
+        """
+        n_balls = len(sim_ids)
+        if n_balls == 0:
+            raise ValueError("At least one ball must be simulated.")
+        if len(set(sim_ids)) != n_balls:
+            raise ValueError("Simulation ids must be unique.")
+        if not (
+            len(ball_init_positions)
+            == len(ball_vels)
+            == len(ball_accs)
+            == len(ball_rot_dts)
+            == n_balls
+        ):
+            raise ValueError("Expecting initial conditions for every ball.")
+
+        self._ids: List[int] = list(sim_ids)
+        self._ball_pos_out_path: Path = root / "ball_pos"
+        self._sys: chrono.ChSystemNSC = chrono.ChSystemNSC()
+        self._time_step: float = sim_step_sz
+        self._sys.SetStep(self._time_step)
+
+        self._balls: List[chrono.ChBodyEasySphere] = []
+        for sim_id, init_pos, vel, acc, rot_dt in zip(
+            sim_ids, ball_init_positions, ball_vels, ball_accs, ball_rot_dts
+        ):
+            ball = make_ball(init_pos, vel, acc, rot_dt, name=f"Ball {sim_id}")
+            ball.GetCollisionModel().SetFamily(BALL_COLLISION_FAMILY)
+            ball.GetCollisionModel().SetFamilyMaskNoCollisionWithFamily(
+                BALL_COLLISION_FAMILY
+            )
+            self._sys.Add(ball)
+            self._balls.append(ball)
+
+        for body in make_court():
+            self._sys.Add(body)
+
+    @classmethod
+    def from_scenarios(
+        cls, scenarios: Sequence[SimScenario], root: Path, sim_step_sz: float
+    ) -> "BallFlightSimulator":
+        """
+        Simulate the balls of scenarios, their players are ignored
+        :param scenarios: The scenarios, see sample_scenarios
+        :param root: Root of the data directory
+        :param sim_step_sz: Simulation step size, in seconds
+        :return: The simulator
+        """
+        params = [scenario.to_dict() for scenario in scenarios]
+        return cls(
+            [p["sim_id"] for p in params],
+            root,
+            sim_step_sz,
+            [chrono.ChVectorD(*p["ball_init_pos"]) for p in params],
+            [chrono.ChVectorD(*p["ball_vel"]) for p in params],
+            [chrono.ChVectorD(*p["ball_acc"]) for p in params],
+            [chrono.ChQuaternionD(*p["ball_rot_dt"]) for p in params],
+        )
+
+    def run_sim(
+        self, duration: float, export: bool = True, disable_progbar: bool = False
+    ) -> np.ndarray:
+        """
+        Run the simulation, stepping every ball at once
+        :param duration: Duration of simulation, in seconds
+        :param export: Export each ball's positions to its own file
+        :param disable_progbar: Disable the progress bar
+        :return: The ball positions over time, shape (n balls, n steps, 3)
+        """
+        ball_pos: List[List[tuple]] = [[] for _ in self._balls]
+        pbar: tqdm = tqdm(
+            total=int(duration / self._time_step),
+            desc=f"Simulating {len(self._balls)} balls",
+            disable=disable_progbar,
+        )
+        while self._sys.GetChTime() < duration - self._time_step:
+            for positions, ball in zip(ball_pos, self._balls):
+                pos = ball.GetPos()
+                positions.append((pos.x, pos.y, pos.z))
+            self._sys.DoStepDynamics(self._time_step)
+            pbar.update(1)
+        pbar.close()
+        ball_pos_arr = np.array(ball_pos, dtype=float).reshape(len(self._balls), -1, 3)
+
+        # Split the trajectories per ball on export
+        if export:
+            self._ball_pos_out_path.mkdir(parents=True, exist_ok=True)
+            for sim_id, positions in zip(self._ids, ball_pos_arr):
+                df: pd.DataFrame = pd.DataFrame(positions, columns=["x", "y", "z"])
+                df.to_csv(str(self._ball_pos_out_path / f"sim_{sim_id}.csv"))
+            logging.info(
+                f"Exported {len(self._ids)} ball trajectories to {self._ball_pos_out_path}."
+            )
+        return ball_pos_arr
+
+    def get_sim_time(self) -> float:
+        return self._sys.GetChTime()
+
+    def get_step_sz(self) -> float:
+        return self._time_step
+
+    def get_n_balls(self) -> int:
+        return len(self._balls)
@@ -0,0 +1,175 @@
+__all__ = ["BallisticSimulator", "sample_ball_launches"]
+
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ai_umpire.util.field_constants import (
+    BACK_WALL_OUT_LINE_HEIGHT,
+    HALF_COURT_LENGTH,
+    HALF_COURT_WIDTH,
+    WALL_HEIGHT,
+)
+
+# Radius of the ball simulated by MatchSimulator, in meters
+BALL_RADIUS: float = 0.04
+
+
+class BallisticSimulator:
+    """
+    Simulates the flight of many balls at once under gravity and quadratic air drag, bouncing off the floor and walls
+    with a coefficient of restitution. Every trajectory is stepped together with semi-implicit Euler integration, so
+    it's far cheaper than a PyChrono simulation when only the ground truth ball positions are needed. The court is
+    centred on the origin with the floor at y=0, the side walls at x=±HALF_COURT_WIDTH and the front and back walls at
+    z=±HALF_COURT_LENGTH. A ball above a wall's height, or beyond the end of a wall, passes it.
+    """
+
+    def __init__(
+        self,
+        sim_step_sz: float = 0.005,
+        gravity: float = 9.81,
+        drag_coef: float = 0.5,
+        restitution: float = 0.7,
+        ball_radius: float = BALL_RADIUS,
+        ball_mass: float = 0.024,
+        air_density: float = 1.2,
+    ) -> None:
+        """
+        :param sim_step_sz: Simulation step size, in seconds
+        :param gravity: Acceleration due to gravity, in m/s^2
+        :param drag_coef: Drag coefficient of the ball, 0 disables drag
+        :param restitution: Ratio of the speed normal to a surface after and before bouncing off it
+        :param ball_radius: Radius of the ball, in meters
+        :param ball_mass: Mass of the ball, in kilograms
+        :param air_density: Density of the air, in kg/m^3
+        """
+        if sim_step_sz <= 0:
+            raise ValueError("Simulation step size must be positive.")
+        if not 0 <= restitution <= 1:
+            raise ValueError("Restitution must be between 0 and 1.")
+        self._time_step: float = sim_step_sz
+        self._gravity: np.ndarray = np.array([0.0, -gravity, 0.0])
+        self._restitution: float = restitution
+        self._ball_radius: float = ball_radius
+        # Drag acceleration is -k|v|v with k = 0.5 * rho * Cd * A / m
+        self._drag_k: float = (
+            0.5 * air_density * drag_coef * np.pi * ball_radius**2 / ball_mass
+        )
+
+        # Bouncing surfaces as the axis of their normal, their position along it, the sign of the normal pointing into
+        # the court, the height above which balls pass over them, and the horizontal axis along the surface with the
+        # distance from the centre of the court beyond which balls pass by them
+        self._surfaces: Tuple[Tuple[int, float, float, float, int, float], ...] = (
+            (1, 0.0, 1.0, np.inf, 0, np.inf),
+            (0, -HALF_COURT_WIDTH, 1.0, WALL_HEIGHT, 2, HALF_COURT_LENGTH),
+            (0, HALF_COURT_WIDTH, -1.0, WALL_HEIGHT, 2, HALF_COURT_LENGTH),
+            (2, HALF_COURT_LENGTH, -1.0, WALL_HEIGHT, 0, HALF_COURT_WIDTH),
+            (
+                2,
+                -HALF_COURT_LENGTH,
+                1.0,
+                BACK_WALL_OUT_LINE_HEIGHT,
+                0,
+                HALF_COURT_WIDTH,
+            ),
+        )
+
+    def run_sim(
+        self,
+        init_positions: np.ndarray,
+        init_velocities: np.ndarray,
+        duration: float,
+    ) -> np.ndarray:
+        """
+        Simulate each ball's flight
+        :param init_positions: (N, 3) array of the balls' initial positions
+        :param init_velocities: (N, 3) array of the balls' initial velocities
+        :param duration: Duration of simulation, in seconds
+        :return: The ball positions over time, shape (N, duration / step size, 3), the first being the initial position
+        """
+        pos = np.array(init_positions, dtype=float)
+        vel = np.array(init_velocities, dtype=float)
+        if pos.ndim != 2 or pos.shape[1] != 3 or pos.shape != vel.shape:
+            raise ValueError("Expecting (N, 3) arrays of positions and velocities.")
+
+        n_steps = int(round(duration / self._time_step))
+        ball_pos = np.empty((pos.shape[0], n_steps, 3))
+        for step in range(n_steps):
+            ball_pos[:, step] = pos
+
+            # Semi-implicit Euler, velocity is updated first and then moves the balls
+            speed = np.linalg.norm(vel, axis=1)
+            vel += self._time_step * (
+                self._gravity - self._drag_k * speed[:, None] * vel
+            )
+            prev_pos = pos.copy()
+            pos += self._time_step * vel
+            self._bounce(prev_pos, pos, vel)
+        return ball_pos
+
+    def _bounce(self, prev_pos: np.ndarray, pos: np.ndarray, vel: np.ndarray) -> None:
+        # Balls which have moved through a surface during this step are reflected back off it, in place. Balls which
+        # were already on the far side, having gone over a wall, are left alone.
+        for axis, plane, normal_sign, height, span_axis, span in self._surfaces:
+            contact = plane + normal_sign * self._ball_radius
+            penetration = normal_sign * (contact - pos[:, axis])
+            was_inside = normal_sign * (prev_pos[:, axis] - contact) >= 0
+            hit = (penetration > 0) & was_inside & (normal_sign * vel[:, axis] < 0)
+            if height != np.inf:
+                hit &= pos[:, 1] < height
+            if span != np.inf:
+                hit &= np.abs(pos[:, span_axis]) <= span
+            if not np.any(hit):
+                continue
+            pos[hit, axis] = (
+                contact + normal_sign * self._restitution * penetration[hit]
+            )
+            vel[hit, axis] *= -self._restitution
+
+    @staticmethod
+    def export(
+        ball_pos: np.ndarray, root: Path, sim_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """
+        Save each ball's positions in the same format as MatchSimulator, to root/ball_pos/sim_<sim id>.csv
+        :param ball_pos: The ball positions over time, as returned by run_sim
+        :param root: Root of the data directory
+        :param sim_ids: The id number of each ball's simulation, defaults to 0 to N - 1
+        """
+        if sim_ids is None:
+            sim_ids = range(ball_pos.shape[0])
+        if len(sim_ids) != ball_pos.shape[0]:
+            raise ValueError("Expecting a simulation id for every ball.")
+        ball_pos_out_path = Path(root) / "ball_pos"
+        ball_pos_out_path.mkdir(parents=True, exist_ok=True)
+        for sim_id, positions in zip(sim_ids, ball_pos):
+            df: pd.DataFrame = pd.DataFrame(positions, columns=["x", "y", "z"])
+            df.to_csv(str(ball_pos_out_path / f"sim_{sim_id}.csv"))
+        logging.info(
+            f"Exported {len(sim_ids)} ball trajectories to {ball_pos_out_path}."
+        )
+
+    def get_step_sz(self) -> float:
+        return self._time_step
+
+
+def sample_ball_launches(n_balls: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Randomly sample serves from near the back of the court, from the same ranges as SimScenario.sample
+    :param n_balls: Number of balls
+    :param seed: Seed of the random number generator
+    :return: (N, 3) arrays of the initial positions and velocities
+    """
+    rng = np.random.default_rng(seed)
+    init_positions = np.c_[
+        rng.choice([-1, 1], size=n_balls) * rng.uniform(2.5, 3.0, size=n_balls),
+        rng.uniform(0.15, 0.8, size=n_balls),
+        rng.uniform(-4.5, -2.0, size=n_balls),
+    ]
+    init_velocities = rng.uniform(
+        [-5.0, 4.0, 7.0], [5.0, 15.0, 25.0], size=(n_balls, 3)
+    )
+    return init_positions, init_velocities
@@ -1,316 +1,314 @@
+from typing import List
+
 import pychrono as chrono
 
 from ai_umpire.util.POV_textures import *
 from ai_umpire.util.field_constants import *
 
-__all__ = [
-    "FLOOR",
-    "TIN",
-    "LEFT_WALL",
-    "RIGHT_WALL",
-    "FRONT_WALL",
-    "BACK_WALL",
-    "FRONT_WALL_OUT_LINE",
-    "SERVICE_LINE",
-    "LEFT_WALL_OUT_LINE",
-    "RIGHT_WALL_OUT_LINE",
-    "FRONT_WALL_DECAL_CENTERED",
-    "FRONT_WALL_DECAL_LEFT",
-    "FRONT_WALL_DECAL_RIGHT",
-    "HALF_COURT_LINE",
-    "SHORT_LINE",
-    "LSB_VERTICAL",
-    "LSB_HORIZONTAL",
-    "RSB_VERTICAL",
-    "RSB_HORIZONTAL",
-]
-
-# Floor material
-FLOOR_MAT: chrono.ChMaterialSurfaceNSC = chrono.ChMaterialSurfaceNSC()
-FLOOR_MAT.SetSfriction(0.7)
-
-# Wall material
-WALL_MAT: chrono.ChMaterialSurfaceNSC = chrono.ChMaterialSurfaceNSC()
-WALL_MAT.SetSfriction(0.2)
-
-FLOOR: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, WALL_THICKNESS, COURT_LENGTH, 1, True, True, FLOOR_MAT
-)
-FLOOR.SetName("Floor")
-FLOOR.SetPos(chrono.ChVectorD(0, 0, 0))
-FLOOR.SetBodyFixed(True)
-
-
-TIN: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, TIN_HEIGHT, LINE_MARKING_WIDTH, 1, True, True, WALL_MAT
-)
-TIN.SetName("Tin")
-TIN.SetPos(
-    chrono.ChVectorD(0, TIN_HEIGHT / 2, (COURT_LENGTH / 2) - LINE_MARKING_WIDTH / 2)
-)
-TIN.SetBodyFixed(True)
-
-
-LEFT_WALL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    WALL_THICKNESS, WALL_HEIGHT, COURT_LENGTH, 1, True, True, WALL_MAT
-)
-LEFT_WALL.SetName("Left Wall")
-LEFT_WALL.SetPos(chrono.ChVectorD(-(COURT_WIDTH / 2), WALL_HEIGHT / 2, 0))
-LEFT_WALL.SetBodyFixed(True)
-
-
-RIGHT_WALL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    WALL_THICKNESS, WALL_HEIGHT, COURT_LENGTH, 1, True, True, WALL_MAT
-)
-RIGHT_WALL.SetName("Right Wall")
-RIGHT_WALL.SetPos(chrono.ChVectorD(COURT_WIDTH / 2, WALL_HEIGHT / 2, 0))
-RIGHT_WALL.SetBodyFixed(True)
-
-
-FRONT_WALL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, WALL_HEIGHT, WALL_THICKNESS, 1, True, True, WALL_MAT
-)
-FRONT_WALL.SetName("Front Wall")
-FRONT_WALL.SetPos(chrono.ChVectorD(0, WALL_HEIGHT / 2, COURT_LENGTH / 2))
-FRONT_WALL.SetBodyFixed(True)
-
-
-BACK_WALL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, BACK_WALL_OUT_LINE_HEIGHT, WALL_THICKNESS, 1, True, True, WALL_MAT
-)
-BACK_WALL.SetName("Back Wall")
-BACK_WALL.SetPos(chrono.ChVectorD(0, BACK_WALL_OUT_LINE_HEIGHT / 2, -COURT_LENGTH / 2))
-BACK_WALL.SetBodyFixed(True)
-
+__all__ = ["make_court"]
 
-FRONT_WALL_OUT_LINE: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, LINE_MARKING_WIDTH, PAINT_THICKNESS, 1, True, False, WALL_MAT
-)
-FRONT_WALL_OUT_LINE.SetName("Front Wall Out-Line")
-FRONT_WALL_OUT_LINE.SetPos(
-    chrono.ChVectorD(
-        0,
-        FRONT_WALL_OUT_LINE_HEIGHT + (LINE_MARKING_WIDTH / 2),
-        (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-    )
-)
-FRONT_WALL_OUT_LINE.SetBodyFixed(True)
 
+def make_court(include_side_decals: bool = False) -> List[chrono.ChBodyEasyBox]:
+    """
+    Create the fixed bodies of the court, the floor, walls, tin, line markings and decals. Every call creates new
+    bodies and materials, a body can only belong to one system so each ChSystemNSC needs its own court, which lets
+    simulations run at the same time.
+    :param include_side_decals: Also create the front wall decals either side of the centred decal
+    :return: The court's bodies, in the order they are added to a system
+    """
+    # Floor material
+    floor_mat: chrono.ChMaterialSurfaceNSC = chrono.ChMaterialSurfaceNSC()
+    floor_mat.SetSfriction(0.7)
 
-LEFT_WALL_OUT_LINE = chrono.ChBodyEasyBox(
-    PAINT_THICKNESS, LINE_MARKING_WIDTH, 10.051, 1000, True, False, WALL_MAT
-)
-LEFT_WALL_OUT_LINE.SetName("Left Wall Out-Line")
-LEFT_WALL_OUT_LINE.SetPos(
-    chrono.ChVectorD(
-        -(COURT_WIDTH / 2) + (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        BACK_WALL_OUT_LINE_HEIGHT + 1.22 + (LINE_MARKING_WIDTH / 2),
-        0,
-    )
-)
-LEFT_WALL_OUT_LINE.SetRot(chrono.ChQuaternionD(0, 0, 0.1222931, 0.992494))
-LEFT_WALL_OUT_LINE.SetBodyFixed(True)
-
-
-RIGHT_WALL_OUT_LINE = chrono.ChBodyEasyBox(
-    PAINT_THICKNESS, LINE_MARKING_WIDTH, 10.051, 1000, True, False, WALL_MAT
-)
-RIGHT_WALL_OUT_LINE.SetName("Right Wall Out-Line")
-RIGHT_WALL_OUT_LINE.SetPos(
-    chrono.ChVectorD(
-        COURT_WIDTH / 2 - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-        BACK_WALL_OUT_LINE_HEIGHT + 1.22 + (LINE_MARKING_WIDTH / 2),
-        0,
-    )
-)
-RIGHT_WALL_OUT_LINE.SetRot(chrono.ChQuaternionD(0, 0, 0.1222931, 0.992494))
-RIGHT_WALL_OUT_LINE.SetBodyFixed(True)
-
-
-SERVICE_LINE: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, LINE_MARKING_WIDTH, PAINT_THICKNESS, 1, True, False, WALL_MAT
-)
-SERVICE_LINE.SetName("Service Line")
-SERVICE_LINE.SetPos(
-    chrono.ChVectorD(
-        0,
-        SERVICE_LINE_HEIGHT + (LINE_MARKING_WIDTH / 2),
-        (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-    )
-)
-SERVICE_LINE.SetBodyFixed(True)
-
-
-HALF_COURT_LINE: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    LINE_MARKING_WIDTH, PAINT_THICKNESS, 4.26, 1, True, False, WALL_MAT
-)
-HALF_COURT_LINE.SetName("Half-Court Line")
-HALF_COURT_LINE.SetPos(
-    chrono.ChVectorD(
-        0,
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -2.745,
-    )
-)
-HALF_COURT_LINE.SetBodyFixed(True)
-
-
-SHORT_LINE: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    COURT_WIDTH, PAINT_THICKNESS, LINE_MARKING_WIDTH, 1, True, False, WALL_MAT
-)
-SHORT_LINE.SetName("Short Line")
-SHORT_LINE.SetPos(
-    chrono.ChVectorD(
-        -WALL_THICKNESS,
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -0.615 + LINE_MARKING_WIDTH,
-    )
-)
-SHORT_LINE.SetBodyFixed(True)
+    # Wall material
+    wall_mat: chrono.ChMaterialSurfaceNSC = chrono.ChMaterialSurfaceNSC()
+    wall_mat.SetSfriction(0.2)
 
+    floor: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, WALL_THICKNESS, COURT_LENGTH, 1, True, True, floor_mat
+    )
+    floor.SetName("Floor")
+    floor.SetPos(chrono.ChVectorD(0, 0, 0))
+    floor.SetBodyFixed(True)
 
-# Left Service Box = LSB
-LSB_VERTICAL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    LINE_MARKING_WIDTH,
-    PAINT_THICKNESS,
-    1.6 + LINE_MARKING_WIDTH,
-    1,
-    True,
-    False,
-    WALL_MAT,
-)
-LSB_VERTICAL.SetName("Left Service-Box Vertical")
-LSB_VERTICAL.SetPos(
-    chrono.ChVectorD(
-        -1.525 - (LINE_MARKING_WIDTH / 2),
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -0.615 - 0.8 + (LINE_MARKING_WIDTH / 2),
-    )
-)
-LSB_VERTICAL.SetBodyFixed(True)
+    tin: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, TIN_HEIGHT, LINE_MARKING_WIDTH, 1, True, True, wall_mat
+    )
+    tin.SetName("Tin")
+    tin.SetPos(
+        chrono.ChVectorD(0, TIN_HEIGHT / 2, (COURT_LENGTH / 2) - LINE_MARKING_WIDTH / 2)
+    )
+    tin.SetBodyFixed(True)
 
+    left_wall: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        WALL_THICKNESS, WALL_HEIGHT, COURT_LENGTH, 1, True, True, wall_mat
+    )
+    left_wall.SetName("Left Wall")
+    left_wall.SetPos(chrono.ChVectorD(-(COURT_WIDTH / 2), WALL_HEIGHT / 2, 0))
+    left_wall.SetBodyFixed(True)
 
-# Left Service Box = LSB
-LSB_HORIZONTAL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    1.6 + LINE_MARKING_WIDTH + WALL_THICKNESS,
-    PAINT_THICKNESS,
-    LINE_MARKING_WIDTH,
-    1,
-    True,
-    False,
-    WALL_MAT,
-)
-LSB_HORIZONTAL.SetName("Left Service-Box Horizontal")
-LSB_HORIZONTAL.SetPos(
-    chrono.ChVectorD(
-        -1.525 - 0.8 - (LINE_MARKING_WIDTH / 2) - (WALL_THICKNESS / 2),
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -(0.615 + 1.6) - (LINE_MARKING_WIDTH / 2),
-    )
-)
-LSB_HORIZONTAL.SetBodyFixed(True)
+    right_wall: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        WALL_THICKNESS, WALL_HEIGHT, COURT_LENGTH, 1, True, True, wall_mat
+    )
+    right_wall.SetName("Right Wall")
+    right_wall.SetPos(chrono.ChVectorD(COURT_WIDTH / 2, WALL_HEIGHT / 2, 0))
+    right_wall.SetBodyFixed(True)
 
+    front_wall: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, WALL_HEIGHT, WALL_THICKNESS, 1, True, True, wall_mat
+    )
+    front_wall.SetName("Front Wall")
+    front_wall.SetPos(chrono.ChVectorD(0, WALL_HEIGHT / 2, COURT_LENGTH / 2))
+    front_wall.SetBodyFixed(True)
 
-# Right Service Box = RSB
-RSB_HORIZONTAL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    1.6 + LINE_MARKING_WIDTH + WALL_THICKNESS,
-    PAINT_THICKNESS,
-    LINE_MARKING_WIDTH,
-    1,
-    True,
-    False,
-    WALL_MAT,
-)
-RSB_HORIZONTAL.SetName("Right Service-Box Horizontal")
-RSB_HORIZONTAL.SetPos(
-    chrono.ChVectorD(
-        1.525 + 0.8 + (LINE_MARKING_WIDTH / 2) + (WALL_THICKNESS / 2),
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -(0.615 + 1.6) - (LINE_MARKING_WIDTH / 2),
-    )
-)
-RSB_HORIZONTAL.SetBodyFixed(True)
+    back_wall: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, BACK_WALL_OUT_LINE_HEIGHT, WALL_THICKNESS, 1, True, True, wall_mat
+    )
+    back_wall.SetName("Back Wall")
+    back_wall.SetPos(
+        chrono.ChVectorD(0, BACK_WALL_OUT_LINE_HEIGHT / 2, -COURT_LENGTH / 2)
+    )
+    back_wall.SetBodyFixed(True)
 
+    front_wall_out_line: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, LINE_MARKING_WIDTH, PAINT_THICKNESS, 1, True, False, wall_mat
+    )
+    front_wall_out_line.SetName("Front Wall Out-Line")
+    front_wall_out_line.SetPos(
+        chrono.ChVectorD(
+            0,
+            FRONT_WALL_OUT_LINE_HEIGHT + (LINE_MARKING_WIDTH / 2),
+            (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+        )
+    )
+    front_wall_out_line.SetBodyFixed(True)
 
-# Right Service Box = LSB
-RSB_VERTICAL: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    LINE_MARKING_WIDTH,
-    PAINT_THICKNESS,
-    1.6 + LINE_MARKING_WIDTH,
-    1,
-    True,
-    False,
-    WALL_MAT,
-)
-RSB_VERTICAL.SetName("Right Service-Box Vertical")
-RSB_VERTICAL.SetPos(
-    chrono.ChVectorD(
-        1.525 + (LINE_MARKING_WIDTH / 2),
-        (WALL_THICKNESS / 2) + PAINT_THICKNESS,
-        -0.615 - 0.8 + (LINE_MARKING_WIDTH / 2),
-    )
-)
-RSB_VERTICAL.SetBodyFixed(True)
+    left_wall_out_line = chrono.ChBodyEasyBox(
+        PAINT_THICKNESS, LINE_MARKING_WIDTH, 10.051, 1000, True, False, wall_mat
+    )
+    left_wall_out_line.SetName("Left Wall Out-Line")
+    left_wall_out_line.SetPos(
+        chrono.ChVectorD(
+            -(COURT_WIDTH / 2) + (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            BACK_WALL_OUT_LINE_HEIGHT + 1.22 + (LINE_MARKING_WIDTH / 2),
+            0,
+        )
+    )
+    left_wall_out_line.SetRot(chrono.ChQuaternionD(0, 0, 0.1222931, 0.992494))
+    left_wall_out_line.SetBodyFixed(True)
 
+    right_wall_out_line = chrono.ChBodyEasyBox(
+        PAINT_THICKNESS, LINE_MARKING_WIDTH, 10.051, 1000, True, False, wall_mat
+    )
+    right_wall_out_line.SetName("Right Wall Out-Line")
+    right_wall_out_line.SetPos(
+        chrono.ChVectorD(
+            COURT_WIDTH / 2 - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+            BACK_WALL_OUT_LINE_HEIGHT + 1.22 + (LINE_MARKING_WIDTH / 2),
+            0,
+        )
+    )
+    right_wall_out_line.SetRot(chrono.ChQuaternionD(0, 0, 0.1222931, 0.992494))
+    right_wall_out_line.SetBodyFixed(True)
 
-FRONT_WALL_DECAL_CENTERED: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    1.9, 1.9, PAINT_THICKNESS, 1, True, True, WALL_MAT
-)
-FRONT_WALL_DECAL_CENTERED.SetName("Front Wall Decal (Centered)")
-FRONT_WALL_DECAL_CENTERED.SetPos(
-    chrono.ChVectorD(
-        0,
-        FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
-        (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-    )
-)
-FRONT_WALL_DECAL_CENTERED.SetBodyFixed(True)
+    service_line: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, LINE_MARKING_WIDTH, PAINT_THICKNESS, 1, True, False, wall_mat
+    )
+    service_line.SetName("Service Line")
+    service_line.SetPos(
+        chrono.ChVectorD(
+            0,
+            SERVICE_LINE_HEIGHT + (LINE_MARKING_WIDTH / 2),
+            (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+        )
+    )
+    service_line.SetBodyFixed(True)
 
+    half_court_line: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        LINE_MARKING_WIDTH, PAINT_THICKNESS, 4.26, 1, True, False, wall_mat
+    )
+    half_court_line.SetName("Half-Court Line")
+    half_court_line.SetPos(
+        chrono.ChVectorD(
+            0,
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -2.745,
+        )
+    )
+    half_court_line.SetBodyFixed(True)
 
-FRONT_WALL_DECAL_LEFT: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    1.9, 1.9, PAINT_THICKNESS, 1, True, True, WALL_MAT
-)
-FRONT_WALL_DECAL_LEFT.SetName("Front Wall Decal (Left)")
-FRONT_WALL_DECAL_LEFT.SetPos(
-    chrono.ChVectorD(
-        -2.1,
-        FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
-        (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-    )
-)
-FRONT_WALL_DECAL_LEFT.SetBodyFixed(True)
+    short_line: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        COURT_WIDTH, PAINT_THICKNESS, LINE_MARKING_WIDTH, 1, True, False, wall_mat
+    )
+    short_line.SetName("Short Line")
+    short_line.SetPos(
+        chrono.ChVectorD(
+            -WALL_THICKNESS,
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -0.615 + LINE_MARKING_WIDTH,
+        )
+    )
+    short_line.SetBodyFixed(True)
+
+    # Left Service Box = LSB
+    lsb_vertical: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        LINE_MARKING_WIDTH,
+        PAINT_THICKNESS,
+        1.6 + LINE_MARKING_WIDTH,
+        1,
+        True,
+        False,
+        wall_mat,
+    )
+    lsb_vertical.SetName("Left Service-Box Vertical")
+    lsb_vertical.SetPos(
+        chrono.ChVectorD(
+            -1.525 - (LINE_MARKING_WIDTH / 2),
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -0.615 - 0.8 + (LINE_MARKING_WIDTH / 2),
+        )
+    )
+    lsb_vertical.SetBodyFixed(True)
+
+    # Left Service Box = LSB
+    lsb_horizontal: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        1.6 + LINE_MARKING_WIDTH + WALL_THICKNESS,
+        PAINT_THICKNESS,
+        LINE_MARKING_WIDTH,
+        1,
+        True,
+        False,
+        wall_mat,
+    )
+    lsb_horizontal.SetName("Left Service-Box Horizontal")
+    lsb_horizontal.SetPos(
+        chrono.ChVectorD(
+            -1.525 - 0.8 - (LINE_MARKING_WIDTH / 2) - (WALL_THICKNESS / 2),
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -(0.615 + 1.6) - (LINE_MARKING_WIDTH / 2),
+        )
+    )
+    lsb_horizontal.SetBodyFixed(True)
+
+    # Right Service Box = RSB
+    rsb_horizontal: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        1.6 + LINE_MARKING_WIDTH + WALL_THICKNESS,
+        PAINT_THICKNESS,
+        LINE_MARKING_WIDTH,
+        1,
+        True,
+        False,
+        wall_mat,
+    )
+    rsb_horizontal.SetName("Right Service-Box Horizontal")
+    rsb_horizontal.SetPos(
+        chrono.ChVectorD(
+            1.525 + 0.8 + (LINE_MARKING_WIDTH / 2) + (WALL_THICKNESS / 2),
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -(0.615 + 1.6) - (LINE_MARKING_WIDTH / 2),
+        )
+    )
+    rsb_horizontal.SetBodyFixed(True)
+
+    # Right Service Box = LSB
+    rsb_vertical: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        LINE_MARKING_WIDTH,
+        PAINT_THICKNESS,
+        1.6 + LINE_MARKING_WIDTH,
+        1,
+        True,
+        False,
+        wall_mat,
+    )
+    rsb_vertical.SetName("Right Service-Box Vertical")
+    rsb_vertical.SetPos(
+        chrono.ChVectorD(
+            1.525 + (LINE_MARKING_WIDTH / 2),
+            (WALL_THICKNESS / 2) + PAINT_THICKNESS,
+            -0.615 - 0.8 + (LINE_MARKING_WIDTH / 2),
+        )
+    )
+    rsb_vertical.SetBodyFixed(True)
 
+    front_wall_decal_centered: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        1.9, 1.9, PAINT_THICKNESS, 1, True, True, wall_mat
+    )
+    front_wall_decal_centered.SetName("Front Wall Decal (Centered)")
+    front_wall_decal_centered.SetPos(
+        chrono.ChVectorD(
+            0,
+            FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
+            (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+        )
+    )
+    front_wall_decal_centered.SetBodyFixed(True)
 
-FRONT_WALL_DECAL_RIGHT: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
-    1.9, 1.9, PAINT_THICKNESS, 1, True, True, WALL_MAT
-)
-FRONT_WALL_DECAL_RIGHT.SetName("Front Wall Decal (Right)")
-FRONT_WALL_DECAL_RIGHT.SetPos(
-    chrono.ChVectorD(
-        2.1,
-        FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
-        (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
-    )
-)
-FRONT_WALL_DECAL_RIGHT.SetBodyFixed(True)
+    front_wall_decal_left: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        1.9, 1.9, PAINT_THICKNESS, 1, True, True, wall_mat
+    )
+    front_wall_decal_left.SetName("Front Wall Decal (Left)")
+    front_wall_decal_left.SetPos(
+        chrono.ChVectorD(
+            -2.1,
+            FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
+            (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+        )
+    )
+    front_wall_decal_left.SetBodyFixed(True)
 
-# Add textures that POV-Ray can render to objects
-FLOOR.AddAsset(WOOD_TEXTURE_POVRAY)
-TIN.AddAsset(RED_TEXTURE_POVRAY)
-LEFT_WALL.AddAsset(GLASS_TEXTURE_POVRAY)
-RIGHT_WALL.AddAsset(GLASS_TEXTURE_POVRAY)
-FRONT_WALL.AddAsset(GLASS_TEXTURE_POVRAY)
-BACK_WALL.AddAsset(GLASS_TEXTURE_POVRAY)
-FRONT_WALL_OUT_LINE.AddAsset(RED_TEXTURE_POVRAY)
-LEFT_WALL_OUT_LINE.AddAsset(RED_TEXTURE_POVRAY)
-RIGHT_WALL_OUT_LINE.AddAsset(RED_TEXTURE_POVRAY)
-SERVICE_LINE.AddAsset(RED_TEXTURE_POVRAY)
-HALF_COURT_LINE.AddAsset(RED_TEXTURE_POVRAY)
-SHORT_LINE.AddAsset(RED_TEXTURE_POVRAY)
-LSB_VERTICAL.AddAsset(RED_TEXTURE_POVRAY)
-LSB_HORIZONTAL.AddAsset(RED_TEXTURE_POVRAY)
-RSB_VERTICAL.AddAsset(RED_TEXTURE_POVRAY)
-RSB_HORIZONTAL.AddAsset(RED_TEXTURE_POVRAY)
-FRONT_WALL_DECAL_CENTERED.AddAsset(WALL_DECAL_A_POVRAY)
-FRONT_WALL_DECAL_LEFT.AddAsset(WALL_DECAL_B_POVRAY)
-FRONT_WALL_DECAL_RIGHT.AddAsset(WALL_DECAL_C_POVRAY)
+    front_wall_decal_right: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
+        1.9, 1.9, PAINT_THICKNESS, 1, True, True, wall_mat
+    )
+    front_wall_decal_right.SetName("Front Wall Decal (Right)")
+    front_wall_decal_right.SetPos(
+        chrono.ChVectorD(
+            2.1,
+            FRONT_WALL_OUT_LINE_HEIGHT - 1.395,
+            (COURT_LENGTH / 2) - (WALL_THICKNESS / 2) - PAINT_THICKNESS,
+        )
+    )
+    front_wall_decal_right.SetBodyFixed(True)
+
+    # Add textures that POV-Ray can render to objects
+    floor.AddAsset(WOOD_TEXTURE_POVRAY)
+    tin.AddAsset(RED_TEXTURE_POVRAY)
+    left_wall.AddAsset(GLASS_TEXTURE_POVRAY)
+    right_wall.AddAsset(GLASS_TEXTURE_POVRAY)
+    front_wall.AddAsset(GLASS_TEXTURE_POVRAY)
+    back_wall.AddAsset(GLASS_TEXTURE_POVRAY)
+    front_wall_out_line.AddAsset(RED_TEXTURE_POVRAY)
+    left_wall_out_line.AddAsset(RED_TEXTURE_POVRAY)
+    right_wall_out_line.AddAsset(RED_TEXTURE_POVRAY)
+    service_line.AddAsset(RED_TEXTURE_POVRAY)
+    half_court_line.AddAsset(RED_TEXTURE_POVRAY)
+    short_line.AddAsset(RED_TEXTURE_POVRAY)
+    lsb_vertical.AddAsset(RED_TEXTURE_POVRAY)
+    lsb_horizontal.AddAsset(RED_TEXTURE_POVRAY)
+    rsb_vertical.AddAsset(RED_TEXTURE_POVRAY)
+    rsb_horizontal.AddAsset(RED_TEXTURE_POVRAY)
+    front_wall_decal_centered.AddAsset(WALL_DECAL_A_POVRAY)
+    front_wall_decal_left.AddAsset(WALL_DECAL_B_POVRAY)
+    front_wall_decal_right.AddAsset(WALL_DECAL_C_POVRAY)
+
+    court: List[chrono.ChBodyEasyBox] = [
+        floor,
+        left_wall,
+        right_wall,
+        front_wall,
+        back_wall,
+        tin,
+        front_wall_out_line,
+        left_wall_out_line,
+        right_wall_out_line,
+        service_line,
+        half_court_line,
+        short_line,
+        lsb_vertical,
+        lsb_horizontal,
+        rsb_vertical,
+        rsb_horizontal,
+        front_wall_decal_centered,
+    ]
+    if include_side_decals:
+        court += [front_wall_decal_left, front_wall_decal_right]
+    return court
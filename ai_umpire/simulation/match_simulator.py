@@ -10,7 +10,7 @@ from tqdm import tqdm
 
 __all__ = ["MatchSimulator"]
 
-from ai_umpire.simulation.fixed_sim_objs import *
+from ai_umpire.simulation.fixed_sim_objs import make_court
 from ai_umpire.util import (
     PLAYER_HEIGHT,
     BALL_TEXTURE_POVRAY,
@@ -30,6 +30,35 @@ BALL_MAT.SetCompliance(0.001)
 PLAYER_MAT: chrono.ChMaterialSurfaceNSC = chrono.ChMaterialSurfaceNSC()
 PLAYER_MAT.SetSfriction(0.2)
 
+
+def make_ball(
+    init_pos: chrono.ChVectorD,
+    vel: chrono.ChVectorD,
+    acc: chrono.ChVectorD,
+    rot_dt: chrono.ChQuaternionD,
+    name: str = "Ball",
+) -> chrono.ChBodyEasySphere:
+    """
+    Create a squash ball body
+    :param init_pos: Initial position of the ball
+    :param vel: Initial velocity of the ball
+    :param acc: Initial acceleration of the ball
+    :param rot_dt: Rotational velocity of the ball as a quaternion
+    :param name: Name of the body
+    :return: The ball
+    """
+    ball: chrono.ChBodyEasySphere = chrono.ChBodyEasySphere(
+        0.04, 0.5, True, True, BALL_MAT
+    )
+    ball.SetPos(init_pos)
+    ball.SetName(name)
+    ball.SetPos_dt(vel)
+    ball.SetPos_dtdt(acc)
+    ball.SetRot_dt(rot_dt)
+    ball.AddAsset(BALL_TEXTURE_POVRAY)
+    return ball
+
+
 # ToDo list:
 """ 
      * Automatically include the screen.inc file in rendered povray folders on export.
@@ -96,21 +125,16 @@ class MatchSimulator:
             self._root / "generated_povray" / self._povray_out_file
         )
         self._ball_pos_out_path = root / "ball_pos"
+        self._player_pos_out_path = root / "player_pos"
         self._sys: chrono.ChSystemNSC = chrono.ChSystemNSC()
         self._time_step: float = sim_step_sz
 
         self._sys.SetStep(self._time_step)
 
         # Initialise ball body
-        self._ball: chrono.ChBodyEasySphere = chrono.ChBodyEasySphere(
-            0.04, 0.5, True, True, BALL_MAT
+        self._ball: chrono.ChBodyEasySphere = make_ball(
+            ball_init_pos, ball_vel, ball_acc, ball_rot_dt
         )
-        self._ball.SetPos(ball_init_pos)
-        self._ball.SetName("Ball")
-        self._ball.SetPos_dt(ball_vel)
-        self._ball.SetPos_dtdt(ball_acc)
-        self._ball.SetRot_dt(ball_rot_dt)
-        self._ball.AddAsset(BALL_TEXTURE_POVRAY)
 
         # Initialise player 1 body
         self._player1: chrono.ChBodyEasyBox = chrono.ChBodyEasyBox(
@@ -143,34 +167,23 @@ class MatchSimulator:
         self._add_fixed_objects()
 
     def _add_fixed_objects(self):
-        self._sys.Add(FLOOR)
-        self._sys.Add(LEFT_WALL)
-        self._sys.Add(RIGHT_WALL)
-        self._sys.Add(FRONT_WALL)
-        self._sys.Add(BACK_WALL)
-        self._sys.Add(TIN)
-        self._sys.Add(FRONT_WALL_OUT_LINE)
-        self._sys.Add(LEFT_WALL_OUT_LINE)
-        self._sys.Add(RIGHT_WALL_OUT_LINE)
-        self._sys.Add(SERVICE_LINE)
-        self._sys.Add(HALF_COURT_LINE)
-        self._sys.Add(SHORT_LINE)
-        self._sys.Add(LSB_VERTICAL)
-        self._sys.Add(LSB_HORIZONTAL)
-        self._sys.Add(RSB_VERTICAL)
-        self._sys.Add(RSB_HORIZONTAL)
-        self._sys.Add(FRONT_WALL_DECAL_CENTERED)
-        # self._sys.Add(FRONT_WALL_DECAL_LEFT)
-        # self._sys.Add(FRONT_WALL_DECAL_RIGHT)
+        # The court is created for this system, sharing bodies between systems isn't safe
+        for body in make_court():
+            self._sys.Add(body)
 
     def run_sim(
-        self, duration: float, export: bool = True, visualise: bool = False
+        self,
+        duration: float,
+        export: bool = True,
+        visualise: bool = False,
+        disable_progbar: bool = False,
     ) -> List[List]:
         """
         Use the PyChrono library to run the simulation with the parameters and objects set up in this objects init
         :param duration: Duration of simulation, in seconds
         :param export: Export simulation states to file
         :param visualise: Visualise using the PhChrono visualiser
+        :param disable_progbar: Disable the progress bar, e.g. when many simulations are run at once
         :return: The ball positions over time
         """
         if not visualise and not export:
@@ -193,6 +206,7 @@ class MatchSimulator:
         # Export the ball positions over time and the simulation states
         if export:
             ball_pos: List[List[float, float, float]] = [[], [], []]
+            players_pos: List[List[Tuple[float, float, float]]] = [[], []]
             logging.info("Simulating, rendering and exporting.")
             # Set up object that exports the simulation data to a format that POV-Ray can render
             pov_exporter: postprocess.ChPovRay = postprocess.ChPovRay(self._sys)
@@ -219,12 +233,20 @@ class MatchSimulator:
 
             # Run simulation one time step at a time exporting data for rendering at each time step
             pbar: tqdm = tqdm(
-                total=int(duration / self._time_step), desc="Running simulation"
+                total=int(duration / self._time_step),
+                desc="Running simulation",
+                disable=disable_progbar,
             )
             while self._sys.GetChTime() < duration - self._time_step:
                 ball_pos[0].append(self._ball.GetPos().x)
                 ball_pos[1].append(self._ball.GetPos().y)
                 ball_pos[2].append(self._ball.GetPos().z)
+                for positions, player in zip(
+                    players_pos, [self._player1, self._player2]
+                ):
+                    positions.append(
+                        (player.GetPos().x, player.GetPos().y, player.GetPos().z)
+                    )
                 pov_exporter.ExportData()
                 self._sys.DoStepDynamics(self._time_step)
                 pbar.update(1)
@@ -269,8 +291,20 @@ class MatchSimulator:
             df: pd.DataFrame = pd.DataFrame(
                 {"x": ball_pos[0], "y": ball_pos[1], "z": ball_pos[2]}
             )
+            self._ball_pos_out_path.mkdir(parents=True, exist_ok=True)
             df.to_csv(str(self._ball_pos_out_path / f"sim_{self._id}.csv"))
 
+            # Player positions are only needed to render the simulation without POV-Ray, see FastRenderer
+            self._player_pos_out_path.mkdir(parents=True, exist_ok=True)
+            for player_num, positions in enumerate(players_pos, start=1):
+                df = pd.DataFrame(positions, columns=["x", "y", "z"])
+                df.to_csv(
+                    str(
+                        self._player_pos_out_path
+                        / f"sim_{self._id}_player_{player_num}.csv"
+                    )
+                )
+
         if not export:
             return None
         else:
@@ -0,0 +1,271 @@
+__all__ = ["SimScenario", "sample_scenarios", "run_scenarios", "run_sim_farm"]
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pychrono as chrono
+from tqdm import tqdm
+
+from ai_umpire.simulation.match_simulator import MatchSimulator
+
+# Spin of the ball, as used for the development simulations
+DEFAULT_BALL_ROT_DT: Tuple[float, float, float, float] = (0, 0, 0.0436194, 0.9990482)
+
+
+class SimScenario:
+    """
+    The starting state of a simulated rally. Scenarios only hold plain floats, rather than PyChrono vectors, so they
+    can be sent to the worker processes of run_scenarios.
+    """
+
+    def __init__(
+        self,
+        sim_id: int,
+        ball_init_pos: Sequence[float],
+        ball_vel: Sequence[float],
+        ball_acc: Sequence[float],
+        p1_init_xz: Sequence[float],
+        p1_vel: Sequence[float],
+        p2_init_xz: Sequence[float],
+        p2_vel: Sequence[float],
+        ball_rot_dt: Sequence[float] = DEFAULT_BALL_ROT_DT,
+    ):
+        """
+        :param sim_id: The id number of the simulation
+        :param ball_init_pos: Initial x, y, z position of the ball
+        :param ball_vel: Initial x, y, z velocity of the ball
+        :param ball_acc: Initial x, y, z acceleration of the ball
+        :param p1_init_xz: Initial x, z position of player 1
+        :param p1_vel: x, y, z velocity of player 1
+        :param p2_init_xz: Initial x, z position of player 2
+        :param p2_vel: x, y, z velocity of player 2
+        :param ball_rot_dt: Rotational velocity of the ball as a quaternion
+        """
+        self._sim_id: int = int(sim_id)
+        self._ball_init_pos: tuple = tuple(float(v) for v in ball_init_pos)
+        self._ball_vel: tuple = tuple(float(v) for v in ball_vel)
+        self._ball_acc: tuple = tuple(float(v) for v in ball_acc)
+        self._p1_init_xz: tuple = tuple(float(v) for v in p1_init_xz)
+        self._p1_vel: tuple = tuple(float(v) for v in p1_vel)
+        self._p2_init_xz: tuple = tuple(float(v) for v in p2_init_xz)
+        self._p2_vel: tuple = tuple(float(v) for v in p2_vel)
+        self._ball_rot_dt: tuple = tuple(float(v) for v in ball_rot_dt)
+
+    @classmethod
+    def sample(cls, sim_id: int, rng: np.random.Generator) -> "SimScenario":
+        """
+        Randomly sample a serve from near the back of the court, with both players somewhere on the court
+        :param sim_id: The id number of the simulation
+        :param rng: Random number generator to sample with
+        :return: The scenario
+        """
+        ball_init_pos = (
+            rng.choice([-1, 1]) * rng.uniform(2.5, 3.0),
+            rng.uniform(0.15, 0.8),
+            rng.uniform(-4.5, -2.0),
+        )
+        ball_vel = rng.uniform([-5.0, 4.0, 7.0], [5.0, 15.0, 25.0])
+        ball_acc = rng.uniform([-2.0, 2.0, 3.0], [2.0, 4.0, 10.0])
+
+        # Players must start apart and away from the ball
+        while True:
+            p1_init_xz, p2_init_xz = rng.uniform([-2.5, -4.5], [2.5, 1.8], size=(2, 2))
+            ball_xz = np.array([ball_init_pos[0], ball_init_pos[2]])
+            if (
+                np.linalg.norm(p1_init_xz - p2_init_xz) > 1.0
+                and np.linalg.norm(p1_init_xz - ball_xz) > 0.5
+                and np.linalg.norm(p2_init_xz - ball_xz) > 0.5
+            ):
+                break
+        p1_vel, p2_vel = np.c_[
+            rng.uniform(-2.5, 2.5, size=2), np.zeros(2), rng.uniform(-2.5, 2.5, size=2)
+        ]
+        return cls(
+            sim_id,
+            ball_init_pos,
+            ball_vel,
+            ball_acc,
+            p1_init_xz,
+            p1_vel,
+            p2_init_xz,
+            p2_vel,
+        )
+
+    def to_simulator(
+        self, root: Path, sim_step_sz: float, output_res: Tuple[int, int]
+    ) -> MatchSimulator:
+        """
+        Create the simulator of the scenario
+        :param root: Root of the data directory the simulation is exported to
+        :param sim_step_sz: Simulation step size, in seconds
+        :param output_res: Resolution of the rendered images given as width x height
+        :return: The simulator
+        """
+        return MatchSimulator(
+            sim_id=self._sim_id,
+            root=root,
+            sim_step_sz=sim_step_sz,
+            ball_init_pos=chrono.ChVectorD(*self._ball_init_pos),
+            ball_vel=chrono.ChVectorD(*self._ball_vel),
+            ball_acc=chrono.ChVectorD(*self._ball_acc),
+            ball_rot_dt=chrono.ChQuaternionD(*self._ball_rot_dt),
+            p1_init_x=self._p1_init_xz[0],
+            p1_init_z=self._p1_init_xz[1],
+            p1_vel=chrono.ChVectorD(*self._p1_vel),
+            p2_init_x=self._p2_init_xz[0],
+            p2_init_z=self._p2_init_xz[1],
+            p2_vel=chrono.ChVectorD(*self._p2_vel),
+            output_res=output_res,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "sim_id": self._sim_id,
+            "ball_init_pos": self._ball_init_pos,
+            "ball_vel": self._ball_vel,
+            "ball_acc": self._ball_acc,
+            "p1_init_xz": self._p1_init_xz,
+            "p1_vel": self._p1_vel,
+            "p2_init_xz": self._p2_init_xz,
+            "p2_vel": self._p2_vel,
+            "ball_rot_dt": self._ball_rot_dt,
+        }
+
+    def get_sim_id(self) -> int:
+        return self._sim_id
+
+
+def sample_scenarios(
+    n_sims: int, seed: int = 0, first_sim_id: int = 0
+) -> List[SimScenario]:
+    """
+    Randomly sample scenarios, each scenario has its own random stream spawned from the seed so it's the same however
+    many scenarios are sampled alongside it
+    :param n_sims: Number of scenarios
+    :param seed: Seed of the random number generator
+    :param first_sim_id: Simulation id of the first scenario, the rest are numbered consecutively
+    :return: The scenarios
+    """
+    seed_seqs = np.random.SeedSequence(seed).spawn(first_sim_id + n_sims)
+    return [
+        SimScenario.sample(sim_id, np.random.default_rng(seed_seqs[sim_id]))
+        for sim_id in range(first_sim_id, first_sim_id + n_sims)
+    ]
+
+
+def _scenario_root(out_dir: Path, sim_id: int, separate_dirs: bool) -> Path:
+    return Path(out_dir) / f"sim_{sim_id}" if separate_dirs else Path(out_dir)
+
+
+def _run_scenario(
+    scenario: SimScenario,
+    root: Path,
+    sim_length: float,
+    sim_step_sz: float,
+    output_res: Tuple[int, int],
+) -> Path:
+    # Runs in a worker process, the simulator and its court are created in that process
+    scenario_path = root / "scenarios" / f"sim_{scenario.get_sim_id()}.json"
+    scenario_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(scenario_path, "w") as f:
+        json.dump(scenario.to_dict(), f, indent=4)
+
+    sim = scenario.to_simulator(root, sim_step_sz, output_res)
+    sim.run_sim(sim_length, export=True, visualise=False, disable_progbar=True)
+    return root / "ball_pos" / f"sim_{scenario.get_sim_id()}.csv"
+
+
+def run_scenarios(
+    scenarios: Sequence[SimScenario],
+    out_dir: Path,
+    *,
+    sim_length: float = 2.0,
+    sim_step_sz: float = 0.005,
+    output_res: Tuple[int, int] = (1280, 720),
+    n_workers: Optional[int] = None,
+    separate_dirs: bool = True,
+) -> List[Path]:
+    """
+    Run simulations headlessly in a process pool, exporting each one's ball positions and POV-Ray data. Scenarios
+    whose ball positions have already been exported are skipped, so an interrupted run can be resumed, and a scenario
+    failing is logged without stopping the others.
+    :param scenarios: The scenarios to simulate, with unique simulation ids
+    :param out_dir: Directory the simulations are exported to
+    :param sim_length: Duration of each simulation, in seconds
+    :param sim_step_sz: Simulation step size, in seconds
+    :param output_res: Resolution of the rendered images given as width x height
+    :param n_workers: Number of worker processes, defaults to the number of processors, 1 runs the simulations in
+    this process
+    :param separate_dirs: Export each scenario to its own sim_<sim id> directory within out_dir, with the same layout
+    as a data directory, otherwise every scenario is exported to out_dir itself
+    :return: Paths of the exported ball positions of the scenarios that succeeded, ordered by simulation id
+    """
+    sim_ids = [scenario.get_sim_id() for scenario in scenarios]
+    if len(set(sim_ids)) != len(sim_ids):
+        raise ValueError("Scenario simulation ids must be unique.")
+
+    to_run = []
+    ball_pos_paths = {}
+    for scenario in scenarios:
+        root = _scenario_root(out_dir, scenario.get_sim_id(), separate_dirs)
+        ball_pos_path = root / "ball_pos" / f"sim_{scenario.get_sim_id()}.csv"
+        if ball_pos_path.exists():
+            logging.info(
+                f"Simulation {scenario.get_sim_id()} already exported, skipping."
+            )
+            ball_pos_paths[scenario.get_sim_id()] = ball_pos_path
+        else:
+            to_run.append((scenario, root))
+    logging.info(f"Running {len(to_run)} simulations.")
+
+    args = (sim_length, sim_step_sz, output_res)
+    if n_workers == 1:
+        for scenario, root in tqdm(to_run, desc="Running simulations"):
+            try:
+                ball_pos_paths[scenario.get_sim_id()] = _run_scenario(
+                    scenario, root, *args
+                )
+            except Exception:
+                logging.exception(f"Simulation {scenario.get_sim_id()} failed.")
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {
+                executor.submit(_run_scenario, scenario, root, *args): scenario
+                for scenario, root in to_run
+            }
+            for future in tqdm(
+                as_completed(futures), total=len(futures), desc="Running simulations"
+            ):
+                sim_id = futures[future].get_sim_id()
+                try:
+                    ball_pos_paths[sim_id] = future.result()
+                except Exception:
+                    logging.exception(f"Simulation {sim_id} failed.")
+
+    return [ball_pos_paths[sim_id] for sim_id in sorted(ball_pos_paths)]
+
+
+def run_sim_farm(
+    out_dir: Path,
+    n_sims: int,
+    *,
+    seed: int = 0,
+    first_sim_id: int = 0,
+    **run_kwargs,
+) -> List[Path]:
+    """
+    Randomly sample scenarios and simulate them in a process pool, see sample_scenarios and run_scenarios
+    :param out_dir: Directory the simulations are exported to, each to its own sim_<sim id> directory
+    :param n_sims: Number of simulations
+    :param seed: Seed the scenarios are sampled with
+    :param first_sim_id: Simulation id of the first scenario
+    :param run_kwargs: Arguments of run_scenarios
+    :return: Paths of the exported ball positions of the scenarios that succeeded, ordered by simulation id
+    """
+    return run_scenarios(
+        sample_scenarios(n_sims, seed, first_sim_id), out_dir, **run_kwargs
+    )
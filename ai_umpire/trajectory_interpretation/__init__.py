@@ -1 +1,5 @@
+from .contact_windows import *
+from .estimators import *
+from .renderer import *
 from .trajectory_interpreter import *
+from .batch import *
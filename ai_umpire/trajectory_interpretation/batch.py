@@ -0,0 +1,114 @@
+__all__ = ["interpret_trajectories"]
+
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from ai_umpire import KalmanFilter
+from ai_umpire.trajectory_interpretation.trajectory_interpreter import (
+    TrajectoryInterpreter,
+)
+from ai_umpire.util import FIELD_BOUNDING_BOXES, CourtRegionIndex, bb_half_spaces
+
+# Court geometry built once by each worker process, see _init_worker
+_WORKER_REGION_INDEX: Optional[CourtRegionIndex] = None
+
+
+def _init_worker() -> None:
+    global _WORKER_REGION_INDEX
+    _WORKER_REGION_INDEX = CourtRegionIndex()
+    for bb_name in FIELD_BOUNDING_BOXES.keys():
+        bb_half_spaces(bb_name)  # Cached after the first call
+
+
+def _interpret_one(
+    rally_id: Hashable,
+    kalman_filter: KalmanFilter,
+    confidence_threshold: float,
+    early_exit: bool,
+    interpreter_kwargs: Dict,
+) -> Dict:
+    start = time.perf_counter()
+    # The worker's region index is only needed for culling, one given by the caller is used instead
+    if interpreter_kwargs.get("n_std_devs_to_cull") is not None:
+        interpreter_kwargs = {
+            "region_index": _WORKER_REGION_INDEX,
+            **interpreter_kwargs,
+        }
+    ti = TrajectoryInterpreter(kalman_filter=kalman_filter, **interpreter_kwargs)
+    # Per measurement progress would interleave between workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        label, confidence, bb_name = ti.classify_trajectory(
+            confidence_threshold, early_exit=early_exit
+        )
+
+    collision_probs = ti.get_collision_probs()
+    # The frame of the probability the label and confidence were derived from
+    _, _, frame = ti._highest_collision_prob(out_only=early_exit)
+    return {
+        "rally_id": rally_id,
+        "label": label,
+        "confidence": confidence,
+        "bb_name": bb_name,
+        "frame": frame,
+        "n_measurements": kalman_filter.get_trajectory().shape[0],
+        "n_processed": collision_probs.shape[0],
+        "n_samples": int(np.sum(ti.get_n_samples_used())),
+        "runtime": time.perf_counter() - start,
+    }
+
+
+def interpret_trajectories(
+    kalman_filters: Union[List[KalmanFilter], Dict[Hashable, KalmanFilter]],
+    confidence_threshold: float,
+    *,
+    n_workers: int = None,
+    early_exit: bool = False,
+    chunksize: int = 1,
+    **interpreter_kwargs,
+) -> pd.DataFrame:
+    """
+    Classifies many trajectories in parallel, each worker process is initialised once with the court geometry
+    :param kalman_filters: Kalman filters initialised with each rally's measurements, keyed by rally id or in a list
+    in which case the rally ids are the list indices
+    :param confidence_threshold: Confidence threshold passed to TrajectoryInterpreter.classify_trajectory
+    :param n_workers: Number of worker processes, defaults to the number of CPUs
+    :param early_exit: Stop interpreting each rally once it is confidently out
+    :param chunksize: Number of rallies sent to a worker at a time
+    :param interpreter_kwargs: Keyword arguments passed to each TrajectoryInterpreter, e.g. method="analytic", when
+    n_std_devs_to_cull is set the region index each worker builds is used unless one is given here
+    :return: One row per rally with its label, confidence, bb and the frame of that bb's probability, and the work
+    done, in the given order
+    """
+    if not 0.0 <= confidence_threshold <= 1.0:
+        raise ValueError("Confidence threshold must be in the range [0, 1].")
+    if not isinstance(kalman_filters, dict):
+        kalman_filters = dict(enumerate(kalman_filters))
+
+    n_rallies = len(kalman_filters)
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker
+    ) as executor:
+        rows = list(
+            tqdm(
+                executor.map(
+                    _interpret_one,
+                    kalman_filters.keys(),
+                    kalman_filters.values(),
+                    [confidence_threshold] * n_rallies,
+                    [early_exit] * n_rallies,
+                    [interpreter_kwargs] * n_rallies,
+                    chunksize=chunksize,
+                ),
+                total=n_rallies,
+                desc="Interpreting trajectories",
+            )
+        )
+
+    return pd.DataFrame(rows).set_index("rally_id")
@@ -0,0 +1,82 @@
+__all__ = ["dist_to_court_surfaces", "find_contact_windows", "kf_mean_positions"]
+
+import copy
+from typing import List, Tuple
+
+import numpy as np
+
+from ai_umpire import KalmanFilter
+from ai_umpire.util import HALF_COURT_LENGTH, HALF_COURT_WIDTH
+
+
+def dist_to_court_surfaces(positions: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance from each position to the nearest of the floor and the four walls
+    :param positions: (T, 3) array of ball positions
+    :return: (T,) array of distances, negative for positions beyond a surface
+    """
+    if positions.ndim != 2 or positions.shape[1] != 3:
+        raise ValueError("Expecting a (T, 3) array of positions.")
+    return np.min(
+        [
+            HALF_COURT_WIDTH - np.abs(positions[:, 0]),  # Side walls
+            positions[:, 1],  # Floor
+            HALF_COURT_LENGTH - np.abs(positions[:, 2]),  # Front and back walls
+        ],
+        axis=0,
+    )
+
+
+def find_contact_windows(
+    positions: np.ndarray,
+    *,
+    contact_dist: float = 0.5,
+    reversal_dist: float = 1.5,
+    padding: int = 3,
+) -> List[Tuple[int, int]]:
+    """
+    Finds the frames in which the ball could be in contact with a wall or the floor. A frame is a contact if the ball
+    is within contact_dist of a surface, or if its velocity changes sign in any dimension within reversal_dist of one,
+    the larger threshold allows for the lag of filtered positions behind the true bounce.
+    :param positions: (T, 3) array of ball positions, e.g. the Kalman filter's mean positions
+    :param contact_dist: Distance from a surface within which a frame is always a contact
+    :param reversal_dist: Distance from a surface within which a velocity reversal is a contact
+    :param padding: Number of frames to extend each window by on both sides
+    :return: Sorted, non-overlapping (start, end) frame ranges, end exclusive
+    """
+    if padding < 0:
+        raise ValueError("Window padding must be non-negative.")
+
+    dist = dist_to_court_surfaces(positions)
+    contacts = dist <= contact_dist
+
+    # Velocities before and after each frame, a change of sign means the ball bounced or peaked
+    velocities = np.diff(positions, axis=0)
+    reversals = np.zeros(positions.shape[0], dtype=bool)
+    reversals[1:-1] = np.any(velocities[:-1] * velocities[1:] < 0, axis=1)
+    contacts |= reversals & (dist <= reversal_dist)
+
+    windows: List[Tuple[int, int]] = []
+    for frame in np.flatnonzero(contacts):
+        start = max(int(frame) - padding, 0)
+        end = min(int(frame) + padding + 1, positions.shape[0])
+        if len(windows) > 0 and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+
+    return windows
+
+
+def kf_mean_positions(kalman_filter: KalmanFilter) -> np.ndarray:
+    """
+    Runs a copy of the Kalman filter over its remaining measurements, leaving the original untouched
+    :param kalman_filter: The Kalman filter to run ahead
+    :return: (T, 3) array of the predicted mean position after each remaining measurement
+    """
+    kf = copy.deepcopy(kalman_filter)
+    n_remaining = kf.get_trajectory().shape[0] - kf.get_t_step()
+    positions = np.empty((n_remaining, 3))
+    for t in range(n_remaining):
+        positions[t] = np.ravel(kf.step()[0][:3])
+    return positions
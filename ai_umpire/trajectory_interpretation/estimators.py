@@ -0,0 +1,412 @@
+__all__ = [
+    "ProbabilityEstimator",
+    "RegularGridEstimator",
+    "SobolEstimator",
+    "AdaptiveEstimator",
+    "AnalyticEstimator",
+]
+
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
+
+from ai_umpire.util import (
+    FIELD_BOUNDING_BOXES,
+    CourtVoxelGrid,
+    bb_aabb,
+    cov_factor,
+    gaussian_bb_prob,
+    gaussian_line_masses,
+    gen_grid_of_points,
+    points_in_bb,
+)
+
+
+class ProbabilityEstimator:
+    """
+    Strategy for estimating the probability of the ball being inside each court bounding box given the Gaussian
+    distribution of the ball's position produced by the Kalman filter
+    """
+
+    def __init__(
+        self, tol: Optional[float] = None, voxel_grid: Optional[CourtVoxelGrid] = None
+    ):
+        if tol is not None and tol <= 0:
+            raise ValueError("Error tolerance must be positive.")
+        self._tol: Optional[float] = tol
+        self._voxel_grid: Optional[CourtVoxelGrid] = voxel_grid
+        self._n_samples: int = 0
+        self._sample_points: Optional[np.ndarray] = None
+
+    def estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str] = None
+    ) -> Dict[str, float]:
+        """
+        Estimate the probability of the ball being inside each of the given bounding boxes
+        :param mu: Mean of the ball position, 3D
+        :param cov: Covariance of the ball position, 3x3
+        :param bb_names: Names of the bounding boxes to estimate probabilities for, defaults to all court bounding boxes
+        :return: Probability of the ball being inside each bounding box, keyed by bounding box name
+        """
+        if bb_names is None:
+            bb_names = list(FIELD_BOUNDING_BOXES.keys())
+        mu = np.reshape(mu, (3,))
+        if cov.shape != (3, 3):
+            raise ValueError("Expecting a 3x3 covariance matrix.")
+        self._n_samples = 0
+        self._sample_points = None
+        return self._estimate(mu, cov, bb_names)
+
+    def _estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def _points_in_bbs(
+        self, points: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Region membership of each point for each bounding box, looked up in the voxel grid if one was given"""
+        if self._voxel_grid is None:
+            return {bb_name: points_in_bb(points, bb_name) for bb_name in bb_names}
+
+        labels = self._voxel_grid.point_labels(points)
+        return {
+            bb_name: (labels & self._voxel_grid.get_bb_bit(bb_name)) != 0
+            for bb_name in bb_names
+        }
+
+    def get_n_samples(self) -> int:
+        """Number of sample points or integration nodes used by the most recent estimate"""
+        return self._n_samples
+
+    def get_sample_points(self) -> Optional[np.ndarray]:
+        """Sample points used by the most recent estimate, None if the estimator does not sample"""
+        return self._sample_points
+
+    def get_tol(self) -> Optional[float]:
+        return self._tol
+
+
+class RegularGridEstimator(ProbabilityEstimator):
+    """
+    Weights a regular grid of sample points around the mean by their density. The grid spans n_std_devs_to_sample
+    standard deviations of each whitened dimension and is mapped to world space through the Cholesky factor of the
+    covariance. If a tolerance is given the grid is refined, keeping the existing points, until the probabilities
+    change by less than the tolerance.
+    """
+
+    def __init__(
+        self,
+        n_dim_samples: List[int] = None,
+        n_std_devs_to_sample: float = 1,
+        *,
+        tol: Optional[float] = None,
+        max_refinements: int = 3,
+        voxel_grid: Optional[CourtVoxelGrid] = None,
+    ):
+        super().__init__(tol, voxel_grid)
+        if n_dim_samples is None:
+            n_dim_samples = [5, 5, 5]
+        if len(n_dim_samples) != 3:
+            raise ValueError(
+                "You must indicate how many sample points to generate for each dimension."
+            )
+        self._dim_samples: List[int] = list(n_dim_samples)
+        self._sample_size_coef: float = n_std_devs_to_sample
+        self._max_refinements: int = max_refinements
+        # {(n_x, n_y, n_z): (whitened sample points, normalised weights), ...}
+        self._stencils: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _stencil(self, dims: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the grid of sample points in whitened space and their normalised weights, built once for each number of
+        samples per dimension
+        """
+        key = tuple(dims)
+        if key not in self._stencils:
+            stencil = gen_grid_of_points(
+                np.zeros(3), list(dims), [self._sample_size_coef] * 3
+            )
+            weights = np.exp(-0.5 * np.sum(stencil**2, axis=1))
+            self._stencils[key] = (stencil, weights / np.sum(weights))
+        return self._stencils[key]
+
+    def _grid_probs(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str], dims: List[int]
+    ) -> Dict[str, float]:
+        # The whitened weights are the same for every Gaussian so only the affine transform is needed for each step
+        stencil, weights = self._stencil(dims)
+        sample_points = mu + stencil @ cov_factor(cov).T
+
+        self._n_samples += sample_points.shape[0]
+        self._sample_points = sample_points
+
+        return {
+            bb_name: float(np.sum(weights[collided]))
+            for bb_name, collided in self._points_in_bbs(
+                sample_points, bb_names
+            ).items()
+        }
+
+    def _estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, float]:
+        dims = self._dim_samples
+        probs = self._grid_probs(mu, cov, bb_names, dims)
+        if self._tol is None:
+            return probs
+
+        for _ in range(self._max_refinements):
+            # Halve the spacing, every existing point remains part of the refined grid
+            dims = [2 * n - 1 for n in dims]
+            refined_probs = self._grid_probs(mu, cov, bb_names, dims)
+            max_change = max(abs(refined_probs[n] - probs[n]) for n in bb_names)
+            probs = refined_probs
+            if max_change < self._tol:
+                break
+
+        return probs
+
+
+class SobolEstimator(ProbabilityEstimator):
+    """
+    Randomised quasi-Monte-Carlo estimator. Several independently scrambled Sobol sequences are mapped through the
+    inverse normal CDF and the Cholesky factor of the covariance, the spread between them gives the standard error
+    and the number of points is doubled until that error is within tolerance.
+    """
+
+    def __init__(
+        self,
+        tol: float = 1e-3,
+        *,
+        n_init_samples: int = 256,
+        max_samples: int = 2**16,
+        n_replicates: int = 4,
+        seed: int = None,
+        voxel_grid: Optional[CourtVoxelGrid] = None,
+    ):
+        super().__init__(tol, voxel_grid)
+        if n_init_samples & (n_init_samples - 1) != 0:
+            raise ValueError("Number of initial samples must be a power of 2.")
+        self._n_init_samples: int = n_init_samples
+        self._max_samples: int = max_samples
+        self._n_replicates: int = n_replicates
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+    def _estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, float]:
+        chol = cov_factor(cov)
+        engines = [
+            qmc.Sobol(d=3, scramble=True, seed=self._rng)
+            for _ in range(self._n_replicates)
+        ]
+        hits = np.zeros((self._n_replicates, len(bb_names)))
+        n_per_replicate, n_new = 0, self._n_init_samples
+        points: List[np.ndarray] = []
+
+        while True:
+            for r, engine in enumerate(engines):
+                # Clip away from 0 and 1 so the inverse CDF stays finite
+                u = np.clip(engine.random(n_new), 1e-12, 1 - 1e-12)
+                replicate_points = mu + ndtri(u) @ chol.T
+                collided = self._points_in_bbs(replicate_points, bb_names)
+                for j, bb_name in enumerate(bb_names):
+                    hits[r, j] += np.count_nonzero(collided[bb_name])
+                if r == 0:
+                    points.append(replicate_points)
+            n_per_replicate += n_new
+
+            replicate_probs = hits / n_per_replicate
+            std_err = np.std(replicate_probs, axis=0, ddof=1) / np.sqrt(
+                self._n_replicates
+            )
+            if (
+                np.max(std_err) <= self._tol
+                or n_per_replicate * 2 * self._n_replicates > self._max_samples
+            ):
+                break
+            n_new = n_per_replicate  # Doubling keeps each sequence balanced
+
+        self._n_samples = n_per_replicate * self._n_replicates
+        self._sample_points = np.concatenate(points)
+        probs = np.mean(replicate_probs, axis=0)
+
+        return {bb_name: float(probs[j]) for j, bb_name in enumerate(bb_names)}
+
+
+class AdaptiveEstimator(ProbabilityEstimator):
+    """
+    Boundary-adaptive quadrature. Each bounding box is integrated exactly along lines in whitened space, see
+    gaussian_line_masses, leaving a 2D integral over the lines' outer coordinates in probability space. That integrand
+    is smooth except where lines cross the bounding box's edges, so cells are refined, largest change between a cell's
+    midpoint estimate and its 4 children's first, until the total change is within tolerance or the bounding box's
+    sample budget is spent. Bounding boxes whose probability is bounded below the tolerance, by their extent along each
+    axis or by the voxel grid if one was given, are given probability 0 without being integrated.
+    """
+
+    def __init__(
+        self,
+        tol: float = 1e-3,
+        *,
+        n_init_cells: int = 16,
+        max_depth: int = 8,
+        max_samples: int = 2**13,
+        voxel_grid: Optional[CourtVoxelGrid] = None,
+    ):
+        super().__init__(tol, voxel_grid)
+        if max_samples < n_init_cells**2:
+            raise ValueError("Maximum number of samples must cover the initial cells.")
+        self._n_init_cells: int = n_init_cells
+        self._max_depth: int = max_depth
+        self._max_samples: int = max_samples
+        # Less than tol of the Gaussian's mass is outside this many standard deviations of the mean along any axis
+        self._n_std_devs_broad_phase: float = float(-ndtri(tol / 6))
+
+        # Offsets of a cell's corners in units of its half-width, its children's centres are at half these offsets
+        self._offsets: np.ndarray = np.array(
+            [[-1.0, -1.0], [-1.0, 1.0], [1.0, -1.0], [1.0, 1.0]]
+        )
+
+    def _bb_prob(self, mu: np.ndarray, cov: np.ndarray, bb_name: str) -> float:
+        n_samples_before = self._n_samples
+
+        def sample_lines(u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            # Clip away from 0 and 1 so the inverse CDF stays finite at the unit square's edges
+            self._n_samples += u.shape[0]
+            return gaussian_line_masses(
+                mu,
+                cov,
+                bb_name,
+                ndtri(np.clip(u, 1e-12, 1 - 1e-12)),
+                return_active_faces=True,
+            )
+
+        def sub_points(
+            centres: np.ndarray, half_width: np.ndarray, scale: float
+        ) -> np.ndarray:
+            offsets = scale * half_width[:, None, None] * self._offsets[None]
+            return (centres[:, None, :] + offsets).reshape(-1, 2)
+
+        # Regular initial partition of the unit square, each cell has the same probability mass
+        u = (np.arange(self._n_init_cells) + 0.5) / self._n_init_cells
+        u0, u1 = np.meshgrid(u, u, indexing="ij")
+        centres = np.c_[u0.ravel(), u1.ravel()]
+        half_width = np.full(centres.shape[0], 0.5 / self._n_init_cells)
+        line_masses, active_faces = sample_lines(centres)
+        est = (2 * half_width) ** 2 * line_masses
+
+        prob = 0.0
+        error_budget = self._tol
+        for depth in range(1, self._max_depth + 1):
+            # Each cell is refined with 4 children and 4 corners, when that would exceed the sample budget the current
+            # estimates of the cells left are accepted
+            if (
+                self._n_samples - n_samples_before + 8 * centres.shape[0]
+                > self._max_samples
+            ):
+                prob += np.sum(est)
+                break
+
+            child_centres = sub_points(centres, half_width, 0.5)
+            child_half_width = np.repeat(half_width / 2, 4)
+            child_line_masses, child_active_faces = sample_lines(child_centres)
+            child_est = (2 * child_half_width) ** 2 * child_line_masses
+            refined_est = child_est.reshape(-1, 4).sum(axis=1)
+            err = np.abs(refined_est - est)
+
+            # A cell whose lines, sampled at its corners and children's centres, are not all clipped by the same faces
+            # contains a kink or step that the midpoint estimates can miss entirely. Its error is then bounded by the
+            # spread of the sampled line masses instead.
+            corner_line_masses, corner_active_faces = sample_lines(
+                sub_points(centres, half_width, 1.0)
+            )
+            sampled_line_masses = np.c_[
+                child_line_masses.reshape(-1, 4), corner_line_masses.reshape(-1, 4)
+            ]
+            sampled_active_faces = np.c_[
+                child_active_faces.reshape(-1, 4), corner_active_faces.reshape(-1, 4)
+            ]
+            kinked = np.any(sampled_active_faces != active_faces[:, None], axis=1)
+            err[kinked] = np.maximum(
+                err[kinked],
+                (2 * half_width[kinked]) ** 2
+                * np.ptp(sampled_line_masses[kinked], axis=1),
+            )
+
+            # Accept the refined estimate where it changed least, using at most half the remaining error budget so
+            # deeper levels always have some budget left
+            order = np.argsort(err)
+            converged = np.zeros(err.shape[0], dtype=bool)
+            converged[order[np.cumsum(err[order]) <= error_budget / 2]] = True
+            if depth == self._max_depth:
+                converged[:] = True
+            error_budget -= np.sum(err[converged])
+            prob += np.sum(refined_est[converged])
+
+            refine = np.repeat(~converged, 4)
+            centres = child_centres[refine]
+            half_width = child_half_width[refine]
+            est = child_est[refine]
+            active_faces = child_active_faces[refine]
+            if centres.shape[0] == 0:
+                break
+
+        return float(np.clip(prob, 0.0, 1.0))
+
+    def _prob_upper_bound(
+        self, mu: np.ndarray, std_devs: np.ndarray, bb_name: str
+    ) -> float:
+        # The ball must be within the bounding box's extent along every axis, so each axis's marginal probability of
+        # that bounds the probability. Axes without variance give inf, or nan on the extent's edge which never culls.
+        lower, upper = bb_aabb(bb_name)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(
+                np.min(ndtr((upper - mu) / std_devs) - ndtr((lower - mu) / std_devs))
+            )
+
+    def _estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, float]:
+        std_devs = np.sqrt(np.diag(cov))
+        labels = None
+        if self._voxel_grid is not None:
+            half_size = self._n_std_devs_broad_phase * std_devs
+            labels = self._voxel_grid.box_labels(mu - half_size, mu + half_size)
+
+        probs = {}
+        for bb_name in bb_names:
+            if labels is not None and not labels & self._voxel_grid.get_bb_bit(bb_name):
+                probs[bb_name] = 0.0
+            elif self._prob_upper_bound(mu, std_devs, bb_name) < self._tol:
+                probs[bb_name] = 0.0
+            else:
+                probs[bb_name] = self._bb_prob(mu, cov, bb_name)
+        return probs
+
+
+class AnalyticEstimator(ProbabilityEstimator):
+    """
+    Integrates the Gaussian over each bounding box directly, see gaussian_bb_prob. The tolerance only applies to the
+    axis-aligned bounding boxes, the accuracy for the polyhedral ones is set by n_quad_points. The sample count
+    reported is the number of integration lines used for the polyhedral bounding boxes.
+    """
+
+    def __init__(self, tol: float = 1e-5, *, n_quad_points: int = 64):
+        super().__init__(tol)
+        self._n_quad_points: int = n_quad_points
+
+    def _estimate(
+        self, mu: np.ndarray, cov: np.ndarray, bb_names: List[str]
+    ) -> Dict[str, float]:
+        probs = {}
+        for bb_name in bb_names:
+            probs[bb_name] = gaussian_bb_prob(
+                mu, cov, bb_name, tol=self._tol, n_quad_points=self._n_quad_points
+            )
+            if "verts" in FIELD_BOUNDING_BOXES[bb_name]:
+                self._n_samples += self._n_quad_points**2
+
+        return probs
@@ -0,0 +1,254 @@
+__all__ = ["InterpretationRenderer"]
+
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import cv2 as cv
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d import Axes3D  # noqa: F401, registers the 3d projection
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from ai_umpire.util import FIELD_BOUNDING_BOXES, bb_inner_face, bb_verts
+
+
+class InterpretationRenderer:
+    """
+    Renders the interpretation of each measurement to an MP4 video or a directory of PNGs on a background thread. The
+    court bounding boxes and measured trajectory are drawn once, only the predicted mean, sample points and collision
+    probability annotations are updated for each measurement.
+    """
+
+    def __init__(
+        self,
+        trajectory: np.ndarray,
+        out_path: Path,
+        *,
+        fps: int = 10,
+        bbs_to_show: str = "all",
+        show_bb_verts: bool = True,
+        show_sample_points: bool = False,
+        max_queue_size: int = 16,
+    ):
+        """
+        :param trajectory: The (T, 3) measurements being interpreted
+        :param out_path: Path of the MP4 to write, any other path is a directory to write a PNG per measurement into
+        :param fps: Frame rate of the MP4
+        :param bbs_to_show: Which bounding boxes to show
+        :param show_bb_verts: Whether to show the vertices of the bounding boxes
+        :param show_sample_points: Show the sample points used to calculate the collision probabilities
+        :param max_queue_size: Number of measurements that can wait to be rendered before submit blocks
+        """
+        if bbs_to_show not in ["all", "out", "in"]:
+            raise ValueError(
+                "Options for bbs to show are: ['all', 'out_bbs', 'in_bbs']"
+            )
+        self._out_path: Path = Path(out_path)
+        self._fps: int = fps
+        self._show_sample_points: bool = show_sample_points
+        self._video_writer: Optional[cv.VideoWriter] = None
+        self._error: Optional[BaseException] = None
+        # Set when the output is abandoned, the measurements still queued are then dropped
+        self._aborted: bool = False
+        if self._out_path.suffix.lower() == ".mp4":
+            self._out_path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            self._out_path.mkdir(parents=True, exist_ok=True)
+
+        self._bb_names: List[str] = [
+            name
+            for name in FIELD_BOUNDING_BOXES.keys()
+            if bbs_to_show == "all"
+            or FIELD_BOUNDING_BOXES[name]["in_out"] == bbs_to_show
+        ]
+        self._build_figure(trajectory, show_bb_verts)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._worker: threading.Thread = threading.Thread(
+            target=self._render_worker, daemon=True
+        )
+        self._worker.start()
+
+    def _build_figure(self, trajectory: np.ndarray, show_bb_verts: bool) -> None:
+        # Agg figures don't touch pyplot's global state so can be drawn off the main thread
+        self._fig: Figure = Figure(figsize=(5.5, 4.5))
+        self._canvas: FigureCanvasAgg = FigureCanvasAgg(self._fig)
+        ax = self._fig.add_subplot(projection="3d")
+        ax.view_init(elev=30, azim=-110)
+        ax.grid(False)
+        ax.set_xlim3d(-4, 4)
+        ax.set_zlim3d(0, 7)
+        ax.set_ylim3d(-6, 6)
+        ax.set_xlabel("$x$")
+        ax.set_zlabel("$y$")
+        ax.set_ylabel("$z$")
+        self._title = ax.set_title("")
+
+        ax.plot3D(
+            trajectory[:, 0],
+            trajectory[:, 1],
+            trajectory[:, 2],
+            "r-",
+            label="Measurements",
+            alpha=0.5,
+            zdir="y",
+        )
+        (self._mean_artist,) = ax.plot3D(
+            [], [], [], "*", alpha=0.7, label="Mean", markersize=15, zorder=4
+        )
+        (self._samples_artist,) = ax.plot3D(
+            [], [], [], "r+", label="Sampled Points", alpha=0.5
+        )
+        self._samples_artist.set_visible(False)
+
+        # Static bounding box faces, each with an annotation that is only shown when its probability is significant
+        self._annotations = {}
+        for bb_name in self._bb_names:
+            bb = FIELD_BOUNDING_BOXES[bb_name]
+            face_verts = bb_inner_face(bb_name)
+            ax.add_collection3d(
+                Poly3DCollection(
+                    [list(zip(face_verts[:, 0], face_verts[:, 2], face_verts[:, 1]))],
+                    color=bb["colour"],
+                    alpha=0.3,
+                    lw=0.1,
+                )
+            )
+            if show_bb_verts:
+                verts = bb_verts(bb_name)
+                ax.scatter3D(
+                    verts[:, 0], verts[:, 1], verts[:, 2], zdir="y", color=bb["colour"]
+                )
+            face_center_vert = np.mean(face_verts, axis=0)
+            self._annotations[bb_name] = ax.text(
+                face_center_vert[0],
+                face_center_vert[2],
+                face_center_vert[1],
+                "",
+                zdir="x",
+                bbox=dict(boxstyle="round", facecolor="wheat", alpha=0.7),
+                visible=False,
+            )
+
+        ax.legend()
+
+    def submit(
+        self,
+        t_step: int,
+        mu: np.ndarray,
+        collision_probs: np.ndarray,
+        sample_points: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Queue a measurement's interpretation for rendering, only blocks if the renderer has fallen max_queue_size
+        measurements behind
+        :param t_step: The measurement number
+        :param mu: The predicted ball position
+        :param collision_probs: Collision probability of each bb in FIELD_BOUNDING_BOXES order
+        :param sample_points: The sample points used to calculate the collision probabilities, if any
+        """
+        if self._error is not None:
+            raise self._error
+        if not self._worker.is_alive():
+            raise RuntimeError("Renderer has been closed.")
+        self._queue.put(
+            (
+                t_step,
+                np.ravel(mu[:3]).copy(),
+                dict(zip(FIELD_BOUNDING_BOXES.keys(), np.array(collision_probs))),
+                None if sample_points is None else sample_points.copy(),
+            )
+        )
+
+    def _render_worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                # Keep consuming after an error so submit never blocks on a full queue
+                if self._error is not None or self._aborted:
+                    continue
+                self._write_frame(self._render(*item), item[0])
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _render(
+        self,
+        t_step: int,
+        mu: np.ndarray,
+        collision_probs: dict,
+        sample_points: Optional[np.ndarray],
+    ) -> np.ndarray:
+        self._title.set_text(f"Probabilistic Interpretation of Measurement #{t_step}")
+        # Swap y and z as for the static artists, y is up
+        self._mean_artist.set_data_3d([mu[0]], [mu[2]], [mu[1]])
+        show_samples = self._show_sample_points and sample_points is not None
+        if show_samples:
+            self._samples_artist.set_data_3d(
+                sample_points[:, 0], sample_points[:, 2], sample_points[:, 1]
+            )
+        self._samples_artist.set_visible(show_samples)
+        for bb_name, annotation in self._annotations.items():
+            annotation.set_text("{:.4f}".format(collision_probs[bb_name]))
+            annotation.set_visible(collision_probs[bb_name] > 0.001)
+
+        self._canvas.draw()
+        return cv.cvtColor(np.asarray(self._canvas.buffer_rgba()), cv.COLOR_RGBA2BGR)
+
+    def _write_frame(self, frame: np.ndarray, t_step: int) -> None:
+        if self._out_path.suffix.lower() != ".mp4":
+            cv.imwrite(str(self._out_path / f"measurement_{t_step}.png"), frame)
+            return
+        if self._video_writer is None:
+            self._video_writer = cv.VideoWriter(
+                str(self._out_path),
+                cv.VideoWriter_fourcc(*"mp4v"),
+                self._fps,
+                (frame.shape[1], frame.shape[0]),
+            )
+        self._video_writer.write(frame)
+
+    def close(self) -> None:
+        """Wait for all queued measurements to be rendered and finalise the output"""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+        if self._error is not None:
+            raise self._error
+
+    def abort(self) -> None:
+        """
+        Stop rendering without raising, measurements still queued are dropped and a partial MP4 is deleted, PNGs
+        already written are kept. Any error rendering is only logged.
+        """
+        self._aborted = True
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+        if self._out_path.suffix.lower() == ".mp4":
+            self._out_path.unlink(missing_ok=True)
+        if self._error is not None:
+            logging.error(f"Rendering to {self._out_path} failed. {self._error}")
+
+    def __enter__(self) -> "InterpretationRenderer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # A rendering error must not replace the exception already propagating
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -1,4 +1,5 @@
-from typing import List, Dict, Tuple
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
 
 import numpy as np
 
@@ -7,14 +8,25 @@ __all__ = ["TrajectoryInterpreter"]
 from matplotlib import pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
-from tqdm import tqdm
-
 from ai_umpire import KalmanFilter
+from ai_umpire.trajectory_interpretation.contact_windows import (
+    find_contact_windows,
+    kf_mean_positions,
+)
+from ai_umpire.trajectory_interpretation.renderer import InterpretationRenderer
+from ai_umpire.trajectory_interpretation.estimators import (
+    ProbabilityEstimator,
+    RegularGridEstimator,
+    SobolEstimator,
+    AdaptiveEstimator,
+    AnalyticEstimator,
+)
 from ai_umpire.util import (
     FIELD_BOUNDING_BOXES,
-    gen_grid_of_points,
+    CourtRegionIndex,
+    CourtVoxelGrid,
     plot_bb,
-    point_bb_collided,
+    segments_bb_intersection,
 )
 
 plt.rcParams["figure.figsize"] = (5.5, 4.5)
@@ -27,14 +39,26 @@ class TrajectoryInterpreter:
         kalman_filter: KalmanFilter,
         n_dim_samples: List = None,
         n_std_devs_to_sample: int = 1,
+        method: str = "grid",
+        estimator: ProbabilityEstimator = None,
+        n_std_devs_to_cull: Optional[float] = None,
+        event_driven: bool = False,
+        contact_window_padding: int = 3,
+        swept: bool = False,
+        region_index: CourtRegionIndex = None,
+        voxel_grid: CourtVoxelGrid = None,
+        render_path: Path = None,
     ):
         # ToDo: Bring KF init into this constructor, makes more sense
+        if method not in ["grid", "sobol", "adaptive", "analytic"]:
+            raise ValueError(
+                "Options for method are: ['grid', 'sobol', 'adaptive', 'analytic']"
+            )
         if n_dim_samples is None:
             n_dim_samples = [5, 5, 5]
         self._kf: KalmanFilter = kalman_filter
         self._trajectory: np.ndarray = self._kf.get_trajectory()
         self._n_measurements = self._trajectory.shape[0]
-        self._kf_states_dim = 3
         if len(n_dim_samples) != 3:
             raise ValueError(
                 "You must indicate how many sample points to generate for each dimension."
@@ -42,11 +66,64 @@ class TrajectoryInterpreter:
         self._dim_samples = n_dim_samples
         self._sample_size_coef = n_std_devs_to_sample
 
-        # Dictionary to store collision probabilities for all bounding boxes after processing each measurement
-        # {bb:[p(m_1), p(m_2), ...], ...}
-        self._bb_collision_probs: Dict = {
-            name: [] for name in FIELD_BOUNDING_BOXES.keys()
-        }
+        # An explicitly provided estimator takes precedence over the named method's default configuration, the voxel
+        # grid is given to the default estimators that sample points
+        if voxel_grid is not None and (estimator is not None or method == "analytic"):
+            raise ValueError(
+                "A voxel grid can only be used by the default grid, sobol or adaptive estimators, give it to the "
+                "estimator instead."
+            )
+        if estimator is None:
+            estimator = {
+                "grid": lambda: RegularGridEstimator(
+                    self._dim_samples, self._sample_size_coef, voxel_grid=voxel_grid
+                ),
+                "sobol": lambda: SobolEstimator(voxel_grid=voxel_grid),
+                "adaptive": lambda: AdaptiveEstimator(voxel_grid=voxel_grid),
+                "analytic": AnalyticEstimator,
+            }[method]()
+        self._estimator: ProbabilityEstimator = estimator
+
+        # Bounding boxes further than this many standard deviations from the predicted position are given probability
+        # 0 without being estimated, None disables culling. Culling is opt in as the probability it drops depends on
+        # the estimator's own sampling span
+        self._cull_coef: Optional[float] = n_std_devs_to_cull
+        if n_std_devs_to_cull is None:
+            if region_index is not None:
+                raise ValueError(
+                    "A region index is only used for culling, set n_std_devs_to_cull to use it."
+                )
+        elif region_index is None:
+            region_index = CourtRegionIndex()
+        self._region_index: Optional[CourtRegionIndex] = region_index
+
+        # Only interpret measurements in windows around likely wall and floor contacts, the rest get probability 0
+        self._event_driven: bool = event_driven
+        self._contact_window_padding: int = contact_window_padding
+        self._contact_windows: List[Tuple[int, int]] = []
+
+        # Also test the segment between consecutive predicted positions so fast balls can't skip over thin bbs, the
+        # previous position's mean and covariance are kept for this
+        self._swept: bool = swept
+        self._prev_pos_dist: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        # Each measurement's interpretation is rendered to this MP4 or directory of PNGs off the main thread, the
+        # renderer only exists while the trajectory is being interpreted
+        self._render_path: Optional[Path] = render_path
+        self._renderer: Optional[InterpretationRenderer] = None
+
+        # Collision probabilities for all bounding boxes after processing each measurement, one row per measurement
+        # and one column per bb in the order of self._bb_names
+        self._bb_names: List[str] = list(FIELD_BOUNDING_BOXES.keys())
+        self._out_bbs: np.ndarray = np.array(
+            [FIELD_BOUNDING_BOXES[name]["in_out"] == "out" for name in self._bb_names]
+        )
+        self._collision_probs: np.ndarray = np.zeros(
+            (self._n_measurements, len(self._bb_names))
+        )
+        self._n_recorded: int = 0
+        # Number of samples the estimator used for each measurement
+        self._n_samples_used: np.ndarray = np.zeros(self._n_measurements, dtype=int)
 
     def _visualise_interpretation(
         self,
@@ -112,8 +189,8 @@ class TrajectoryInterpreter:
             zorder=4,
         )
 
-        # Plot sample points
-        if show_sample_points:
+        # Plot sample points, there are none when probabilities are computed analytically
+        if show_sample_points and sample_points is not None:
             self._ax.plot3D(
                 sample_points[:, 0],
                 sample_points[:, 1],
@@ -125,10 +202,9 @@ class TrajectoryInterpreter:
             )
 
         # Plot bounding boxes corresponding to court walls and out-of-court regions
-        for bb_name in FIELD_BOUNDING_BOXES.keys():
-            bb_collision_prob = self._bb_collision_probs[bb_name][
-                self._kf.get_t_step() - 1
-            ]
+        for bb_name, bb_collision_prob in zip(
+            self._bb_names, self._collision_probs[self._kf.get_t_step() - 1]
+        ):
             if bbs_to_show == "all":
                 plot_bb(
                     bb_name=bb_name,
@@ -161,31 +237,35 @@ class TrajectoryInterpreter:
         visualise: bool = False,
         save: bool = False,
         show_sample_points: bool = False,
+        early_exit: bool = False,
     ) -> Tuple[str, float, str]:
         """
         Returns the in/out classification of the trajectory
 
+        :param early_exit: Stop interpreting measurements as soon as an out bb's collision probability reaches the
+        confidence threshold. The verdict is then the highest probability over the out bbs only, the same bbs the
+        stop test uses, rather than over all bbs.
         :return: "out" if the trajectory is interpreted as out, "in" otherwise and confidence in this label
         """
         if not 0.0 <= confidence_threshold <= 1.0:
             raise ValueError("Confidence threshold must be in the range [0, 1].")
 
-        no_probs_recorded = len(list(self._bb_collision_probs.values())[0]) == 0
-        if no_probs_recorded:
+        no_probs_recorded = self._n_recorded == 0
+        if no_probs_recorded and early_exit:
+            for _ in self.iter_interpretation(
+                confidence_threshold,
+                visualise=visualise,
+                save=save,
+                show_sample_points=show_sample_points,
+            ):
+                pass
+        elif no_probs_recorded:
             _, _, _ = self.interpret_trajectory(
                 visualise=visualise, save=save, show_sample_points=show_sample_points
             )
 
-        p_out, out_bb_name, frame_out = 0.0, "", 0
-        # Scan through stored probability detections_IC and keep track of the highest prob out, bb name and frame
-        for i in tqdm(
-            range(self._n_measurements),
-            desc="Scanning stored collision probabilities",
-        ):
-            for bb_name in FIELD_BOUNDING_BOXES.keys():
-                bb_out_prob_frame = self._bb_collision_probs[bb_name][i]
-                if bb_out_prob_frame >= p_out:
-                    p_out, out_bb_name, frame_out = bb_out_prob_frame, bb_name, i
+        # Highest probability over all stored measurements and bbs, or only the out bbs early exit stops on
+        p_out, out_bb_name, _ = self._highest_collision_prob(out_only=early_exit)
 
         return (
             "out" if p_out >= confidence_threshold else "in",
@@ -205,16 +285,11 @@ class TrajectoryInterpreter:
 
         :return: Returns the probability the trajectory was out, which out BB it hit to be out and in which frame
         """
-
-        if len(list(self._bb_collision_probs.values())[0]) > 0:
-            raise NotImplementedError("Attempted to interpret trajectory twice.")
-            # warnings.warn("Warning, trajectory already interpreted, resetting and recalculating probabilities")
-
         highest_p_out, out_bb_name, out_frame = 0.0, "", 0
-        for i in range(self._n_measurements):
-            p, bb = self._interpret_next_measurement(
-                visualise=visualise, save=save, show_sample_points=show_sample_points
-            )
+        for i, _ in self.iter_interpretation(
+            visualise=visualise, save=save, show_sample_points=show_sample_points
+        ):
+            p, bb = self._most_likely_collision(i)
             if p >= highest_p_out and FIELD_BOUNDING_BOXES[bb]["in_out"] == "out":
                 highest_p_out, out_bb_name, out_frame = p, bb, i
                 print(
@@ -226,52 +301,122 @@ class TrajectoryInterpreter:
 
         return highest_p_out, out_bb_name, out_frame
 
+    def iter_interpretation(
+        self,
+        confidence_threshold: Optional[float] = None,
+        *,
+        visualise: bool = False,
+        save: bool = False,
+        show_sample_points: bool = False,
+    ) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """
+        Interprets the trajectory one measurement at a time, yielding each measurement's collision probabilities as
+        soon as they are computed. Measurements outside the contact windows of an event driven interpreter are not
+        yielded.
+
+        :param confidence_threshold: If given, stop after the first measurement whose collision probability with an
+        out bb reaches this threshold
+        :return: Iterator of the measurement number and the collision probability of each bb
+        """
+        if confidence_threshold is not None and not 0.0 <= confidence_threshold <= 1.0:
+            raise ValueError("Confidence threshold must be in the range [0, 1].")
+        if self._n_recorded > 0:
+            raise NotImplementedError("Attempted to interpret trajectory twice.")
+            # warnings.warn("Warning, trajectory already interpreted, resetting and recalculating probabilities")
+
+        # Cheap pre-pass over the KF's mean positions to find the frames worth interpreting
+        to_interpret = np.ones(self._n_measurements, dtype=bool)
+        if self._event_driven:
+            self._contact_windows = find_contact_windows(
+                kf_mean_positions(self._kf), padding=self._contact_window_padding
+            )
+            to_interpret[:] = False
+            for start, end in self._contact_windows:
+                to_interpret[start:end] = True
+
+        if self._render_path is not None:
+            self._renderer = InterpretationRenderer(
+                self._trajectory,
+                self._render_path,
+                show_sample_points=show_sample_points,
+            )
+        try:
+            for i in range(self._n_measurements):
+                self._interpret_next_measurement(
+                    visualise=visualise,
+                    save=save,
+                    show_sample_points=show_sample_points,
+                    estimate=to_interpret[i],
+                )
+                if not to_interpret[i]:
+                    continue
+
+                yield i, dict(zip(self._bb_names, self._collision_probs[i]))
+
+                if confidence_threshold is not None and np.any(
+                    self._collision_probs[i, self._out_bbs] >= confidence_threshold
+                ):
+                    break
+        except GeneratorExit:
+            # Iteration stopped early by the caller, what was rendered so far is kept
+            self._close_renderer()
+            raise
+        except BaseException:
+            # A rendering error must not replace the exception already propagating
+            if self._renderer is not None:
+                self._renderer.abort()
+                self._renderer = None
+            raise
+        self._close_renderer()
+
+    def _close_renderer(self) -> None:
+        if self._renderer is not None:
+            renderer, self._renderer = self._renderer, None
+            renderer.close()
+
     def _interpret_next_measurement(
         self,
         *,
         visualise: bool = False,
         save: bool = False,
         show_sample_points: bool = False,
+        estimate: bool = True,
     ) -> Tuple[float, str]:
         """Return the probability of a measurement being out of court"""
         mu, cov = self._kf.step()  # KF inference
 
-        std_dev_x = np.sqrt(cov[0, 0])
-        std_dev_y = np.sqrt(cov[1, 1])
-        std_dev_z = np.sqrt(cov[2, 2])
-
-        # Generate sample area size with dimension sizes scaled by dimension's standard deviation
-        sampling_area_size: List = [
-            self._sample_size_coef * std_dev_x,
-            self._sample_size_coef * std_dev_y,
-            self._sample_size_coef * std_dev_z,
-        ]
-
-        # Generate grid of sample points
-        sample_points = gen_grid_of_points(
-            mu[:3], self._dim_samples, sampling_area_size
-        )
+        # Estimate probability of the ball's position being inside each bb, only position elements of the state are used
+        bb_names = list(FIELD_BOUNDING_BOXES.keys()) if estimate else []
+        if estimate and self._region_index is not None:
+            bb_names = self._region_index.query_gaussian(
+                mu[:3], cov[:3, :3], self._cull_coef
+            )
+        collision_probs = {bb_name: 0.0 for bb_name in FIELD_BOUNDING_BOXES.keys()}
+        n_samples, sample_points = 0, None
+        if len(bb_names) > 0:
+            collision_probs.update(
+                self._estimator.estimate(mu[:3], cov[:3, :3], bb_names)
+            )
+            n_samples = self._estimator.get_n_samples()
+            sample_points = self._estimator.get_sample_points()
 
-        # Generate sample points' probabilities given KF internal parameters for each bounding box
-        sample_points_probs = [
-            self._kf.prob_of_point(np.reshape(p, (self._kf_states_dim, 1)))
-            for p in sample_points
-        ]
-        for bb_name in tqdm(
-            FIELD_BOUNDING_BOXES.keys(), desc="Calculating collision probabilities"
-        ):
-            # Calculate prob of collision with bb
-            sample_points_weighted_probs = [
-                int(point_bb_collided(p, bb_name))
-                * self._kf.prob_of_point(np.reshape(p, (self._kf_states_dim, 1)))
-                for p in sample_points
-            ]
+        pos_dist = (np.reshape(mu[:3], (3,)).copy(), cov[:3, :3].copy())
+        if estimate and self._swept and self._prev_pos_dist is not None:
+            swept_probs, n_swept_samples = self._swept_collision_probs(
+                *self._prev_pos_dist, *pos_dist
+            )
+            for bb_name, swept_prob in swept_probs.items():
+                collision_probs[bb_name] = max(collision_probs[bb_name], swept_prob)
+            n_samples += n_swept_samples
+        self._prev_pos_dist = pos_dist
 
-            weighted_summed_p_samples = sum(sample_points_weighted_probs)
-            summed_p_samples = sum(sample_points_probs)
-            collision_prob = weighted_summed_p_samples / summed_p_samples
+        t = self._kf.get_t_step() - 1
+        self._collision_probs[t] = [collision_probs[name] for name in self._bb_names]
+        self._n_samples_used[t] = n_samples
+        self._n_recorded = t + 1
 
-            self._bb_collision_probs[bb_name].append(collision_prob)
+        if self._renderer is not None:
+            self._renderer.submit(t, mu, self._collision_probs[t], sample_points)
 
         if save or visualise:
             self._visualise_interpretation(
@@ -284,19 +429,79 @@ class TrajectoryInterpreter:
 
         return self._most_likely_collision(self._kf.get_t_step() - 1)
 
+    def _swept_collision_probs(
+        self,
+        prev_mu: np.ndarray,
+        prev_cov: np.ndarray,
+        mu: np.ndarray,
+        cov: np.ndarray,
+    ) -> Tuple[Dict[str, float], int]:
+        """
+        Returns the collision probabilities of the bbs crossed by the segment between two consecutive predicted
+        positions, and the number of samples used. Each is evaluated with the mean and covariance interpolated to the
+        middle of the part of the segment inside the bb.
+        """
+        start, end = np.reshape(prev_mu, (1, 3)), np.reshape(mu, (1, 3))
+        bb_names = list(FIELD_BOUNDING_BOXES.keys())
+        if self._region_index is not None:
+            half_size = self._cull_coef * np.sqrt(
+                np.maximum(np.diag(prev_cov), np.diag(cov))
+            )
+            bb_names = self._region_index.query(
+                np.minimum(start, end) - half_size, np.maximum(start, end) + half_size
+            )
+
+        swept_probs, n_samples = {}, 0
+        for bb_name in bb_names:
+            hit, t_enter, t_exit = segments_bb_intersection(start, end, bb_name)
+            if not hit[0]:
+                continue
+            s = (t_enter[0] + t_exit[0]) / 2
+            swept_probs[bb_name] = self._estimator.estimate(
+                (1 - s) * prev_mu + s * mu, (1 - s) * prev_cov + s * cov, [bb_name]
+            )[bb_name]
+            n_samples += self._estimator.get_n_samples()
+
+        return swept_probs, n_samples
+
     def _most_likely_collision(self, measurement_num: int) -> Tuple[float, str]:
         """
         Returns the bounding box with the highest probability of colliding with the ball given a specific measurement
         """
-        collision_prob = 0.0
-        first_bb_name = list(self._bb_collision_probs)[0]
-        collision_bb_name = first_bb_name  # Default to first bb in dict
-
-        # Search all collision probabilities with each bounding box and return the bb with the highest
-        for bb_name in FIELD_BOUNDING_BOXES.keys():
-            bb_collision_prob = self._bb_collision_probs[bb_name][measurement_num]
-            if bb_collision_prob > collision_prob:
-                collision_prob = bb_collision_prob
-                collision_bb_name = bb_name
-
-        return collision_prob, collision_bb_name
+        # Ties go to the first bb, which is also the default when all probabilities are 0
+        i = int(np.argmax(self._collision_probs[measurement_num]))
+        return float(self._collision_probs[measurement_num, i]), self._bb_names[i]
+
+    def _highest_collision_prob(self, out_only: bool = False) -> Tuple[float, str, int]:
+        """
+        Returns the highest collision probability over all measurements processed so far, with its bb and measurement
+        :param out_only: Only consider the out bbs
+        """
+        bbs = self._out_bbs if out_only else np.ones(len(self._bb_names), dtype=bool)
+        probs = self._collision_probs[: self._n_recorded, bbs]
+        if probs.size == 0:
+            return 0.0, "", 0
+        # Ties go to the last measurement and then the last bb, argmax of the reversed probabilities finds the last
+        # maximum
+        flat_i = probs.size - 1 - int(np.argmax(probs.ravel()[::-1]))
+        frame, i = np.unravel_index(flat_i, probs.shape)
+        bb_names = [name for name, included in zip(self._bb_names, bbs) if included]
+        return float(probs[frame, i]), bb_names[i], int(frame)
+
+    def get_collision_probs(self) -> np.ndarray:
+        """
+        Returns the collision probabilities of the measurements processed so far, as a (n_measurements, n_bbs) array
+        with columns in the order of get_bb_names
+        """
+        return self._collision_probs[: self._n_recorded]
+
+    def get_bb_names(self) -> List[str]:
+        return self._bb_names
+
+    def get_n_samples_used(self) -> np.ndarray:
+        """Returns the number of samples the estimator used to interpret each measurement"""
+        return self._n_samples_used[: self._n_recorded]
+
+    def get_contact_windows(self) -> List[Tuple[int, int]]:
+        """Returns the (start, end) measurement ranges interpreted when event driven, end exclusive"""
+        return self._contact_windows
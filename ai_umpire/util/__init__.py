@@ -1,3 +1,12 @@
-from .POV_textures import *
 from .field_constants import *
+from .camera import *
 from .util import *
+from .calibration import *
+from .court_regions import *
+
+# PyChrono is optional, its textures are only needed by the PyChrono simulations
+try:
+    from .POV_textures import *
+except ModuleNotFoundError as e:
+    if e.name is None or not e.name.startswith("pychrono"):
+        raise
@@ -0,0 +1,287 @@
+__all__ = [
+    "CameraCalibration",
+    "load_calibration",
+    "approximate_homography",
+]
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from ai_umpire.util.util import (
+    FRONT_WALL_WORLD_COORDS,
+    FourCoordsStore,
+    calibrate_camera,
+    detect_front_wall_coords,
+)
+
+
+class CameraCalibration:
+    """
+    The homography and camera parameters derived from 4 front wall image coordinates, along with their inverses so
+    that they are computed once rather than for every back-projection. Calibrations are saved to a sidecar file so that
+    each video is only calibrated once, see load_calibration.
+    """
+
+    def __init__(
+        self,
+        image_coords: np.ndarray,
+        img_dims: Sequence[int],
+        homography: np.ndarray,
+        camera_params: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        video_key: str = "",
+    ):
+        """
+        :param image_coords: The 4 image coordinates, ordered as FRONT_WALL_WORLD_COORDS
+        :param img_dims: Image dimensions given as height x width, as OpenCV loaded images are
+        :param homography: 3x3 homography from the image plane to the front wall plane
+        :param camera_params: The camera intrinsics, rotation matrix and translation vector
+        :param video_key: Identity of the video the calibration was made from, see load_calibration
+        """
+        if image_coords.shape != (4, 2):
+            raise ValueError("Image coordinates matrix shape should be (4,2).")
+        self._image_coords: np.ndarray = np.asarray(image_coords, dtype="float32")
+        self._img_dims: tuple = (int(img_dims[0]), int(img_dims[1]))
+        self._homography: np.ndarray = homography
+        self._intrinsics, self._rot_mtx, self._t_vec = camera_params
+        self._video_key: str = video_key
+
+        # The inverse of a rotation is its transpose
+        self._homography_inv: np.ndarray = np.linalg.inv(homography)
+        self._intrinsics_inv: np.ndarray = np.linalg.inv(self._intrinsics)
+        self._rot_mtx_inv: np.ndarray = self._rot_mtx.T
+
+    @classmethod
+    def calibrate(
+        cls, image_coords: np.ndarray, img_dims: Sequence[int], video_key: str = ""
+    ) -> "CameraCalibration":
+        """
+        Calibrate from the 4 image coordinates of the ends of the front wall out line and service line
+        :param image_coords: The 4 image coordinates, ordered as FRONT_WALL_WORLD_COORDS
+        :param img_dims: Image dimensions given as height x width, as OpenCV loaded images are
+        :param video_key: Identity of the video the calibration was made from, see load_calibration
+        :return: The calibration
+        """
+        image_coords = np.asarray(image_coords, dtype="float32")
+        homography, _ = cv.findHomography(
+            image_coords, FRONT_WALL_WORLD_COORDS, method=cv.RANSAC
+        )
+        if homography is None:
+            raise ValueError(
+                "Could not approximate a homography from the given points."
+            )
+        # OpenCV image sizes are width x height
+        camera_params = calibrate_camera(
+            FRONT_WALL_WORLD_COORDS, image_coords, (img_dims[1], img_dims[0])
+        )
+        # A perfectly fronto-parallel front wall gives an infinite focal length
+        if not np.all(np.isfinite(camera_params[0])):
+            raise ValueError(
+                "Could not approximate the camera parameters from the given points."
+            )
+        return cls(image_coords, img_dims, homography, camera_params, video_key)
+
+    @classmethod
+    def load(cls, path: Path) -> "CameraCalibration":
+        """Load a calibration saved with save"""
+        with np.load(str(path)) as saved:
+            return cls(
+                saved["image_coords"],
+                saved["img_dims"],
+                saved["homography"],
+                (saved["intrinsics"], saved["rot_mtx"], saved["t_vec"]),
+                str(saved["video_key"]),
+            )
+
+    def save(self, path: Path) -> None:
+        """Save the calibration, including its inverses, to an npz file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            str(path),
+            image_coords=self._image_coords,
+            img_dims=np.array(self._img_dims),
+            homography=self._homography,
+            homography_inv=self._homography_inv,
+            intrinsics=self._intrinsics,
+            intrinsics_inv=self._intrinsics_inv,
+            rot_mtx=self._rot_mtx,
+            rot_mtx_inv=self._rot_mtx_inv,
+            t_vec=self._t_vec,
+            video_key=self._video_key,
+        )
+
+    def is_valid(
+        self,
+        img_dims: Sequence[int],
+        video_key: str = "",
+        frame: Optional[np.ndarray] = None,
+        max_drift: float = 5.0,
+    ) -> bool:
+        """
+        Check the calibration can be used for a video
+        :param img_dims: Image dimensions of the video given as height x width
+        :param video_key: Identity of the video, if given it must match the one calibrated from
+        :param frame: A frame of the video, if given the front wall lines must be detected where they were calibrated
+        :param max_drift: Maximum distance in pixels between the detected and calibrated front wall coordinates
+        :return: Whether the calibration is valid
+        """
+        if tuple(int(dim) for dim in img_dims) != self._img_dims:
+            return False
+        if video_key and video_key != self._video_key:
+            return False
+        arrays = [self._homography, self._intrinsics, self._rot_mtx, self._t_vec]
+        if not all(np.all(np.isfinite(array)) for array in arrays):
+            return False
+
+        # The homography must map the image coordinates onto the front wall, which OpenCV treats as homogeneous points
+        front_wall = FRONT_WALL_WORLD_COORDS[:, :2] / FRONT_WALL_WORLD_COORDS[:, 2:]
+        mapped = cv.perspectiveTransform(
+            self._image_coords[None].astype(float), self._homography
+        )[0]
+        if not np.allclose(mapped, front_wall, atol=1e-2):
+            return False
+
+        if frame is not None:
+            try:
+                detected = detect_front_wall_coords(frame)
+            except ValueError:
+                return False
+            drift = np.linalg.norm(detected - self._image_coords, axis=1)
+            if np.any(drift > max_drift):
+                return False
+        return True
+
+    def get_image_coords(self) -> np.ndarray:
+        return self._image_coords
+
+    def get_img_dims(self) -> tuple:
+        return self._img_dims
+
+    def get_homography(self) -> np.ndarray:
+        return self._homography
+
+    def get_homography_inv(self) -> np.ndarray:
+        return self._homography_inv
+
+    def get_camera_params(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._intrinsics, self._rot_mtx, self._t_vec
+
+    def get_intrinsics_inv(self) -> np.ndarray:
+        return self._intrinsics_inv
+
+    def get_rot_mtx_inv(self) -> np.ndarray:
+        return self._rot_mtx_inv
+
+    def get_video_key(self) -> str:
+        return self._video_key
+
+
+def _video_key(video_path: Path, img_dims: Sequence[int]) -> str:
+    # Identifies the video by its name, size and resolution, re-encoding or replacing it invalidates its calibration
+    digest = hashlib.sha1(video_path.name.encode())
+    digest.update(str(video_path.stat().st_size).encode())
+    digest.update(str(tuple(img_dims)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _read_first_frame(video_path: Path) -> np.ndarray:
+    v_cap = cv.VideoCapture(str(video_path))
+    ret, frame = v_cap.read()
+    v_cap.release()
+    if not ret:
+        raise ValueError(f"Could not read a frame from {video_path}.")
+    return frame
+
+
+def _click_front_wall_coords(first_frame: np.ndarray) -> np.ndarray:
+    # Camera calibration: obtain the image coordinates of the ends of the front wall's out line and service line,
+    # ordered as FRONT_WALL_WORLD_COORDS, which are used to derive the inverse of the camera projection for 2D->3D
+    coords_store = FourCoordsStore(first_frame)
+    cv.namedWindow("Click on the four specified locations")
+    cv.setMouseCallback(
+        "Click on the four specified locations", coords_store.img_clicked
+    )
+
+    print(
+        "Double-click at these locations on the front wall in the order presented, the ends of the out line and\n"
+        "service line rather than the front wall's corners:\n"
+        "   1. Front Wall Line Left\n"
+        "   2. Service Line Left\n"
+        "   3. Front Wall Line Right\n"
+        "   4. Service Line Right"
+    )
+
+    while True:
+        # Display the image and wait for either exit via escape key or 4 coordinates clicked
+        cv.imshow("Click on the four specified locations", first_frame)
+        key = cv.waitKey(1) & 0xFF
+
+        if key == ord("c") or coords_store.click_pos().shape[0] == 4:
+            break
+    cv.destroyAllWindows()
+
+    return coords_store.click_pos()
+
+
+def load_calibration(
+    video_path: Path,
+    *,
+    automatic: bool = False,
+    recalibrate: bool = False,
+    cache_dir: Optional[Path] = None,
+) -> CameraCalibration:
+    """
+    Load a video's calibration from its sidecar file, the video is only calibrated if it has no sidecar file, the
+    sidecar file is invalid, or recalibration is asked for
+    :param video_path: Video to calibrate
+    :param automatic: Find the front wall lines with detect_front_wall_coords rather than asking the user to click
+    on them, a loaded calibration is also checked against the detected lines
+    :param recalibrate: Calibrate even if there is a valid sidecar file
+    :param cache_dir: Directory of the sidecar files, defaults to the video's directory
+    :return: The calibration
+    """
+    video_path = Path(video_path)
+    first_frame = _read_first_frame(video_path)
+    img_dims = first_frame.shape[:2]
+    video_key = _video_key(video_path, img_dims)
+    sidecar_path = (
+        Path(cache_dir) if cache_dir is not None else video_path.parent
+    ) / f"{video_path.stem}.calibration.npz"
+
+    if sidecar_path.exists() and not recalibrate:
+        calibration = CameraCalibration.load(sidecar_path)
+        if calibration.is_valid(
+            img_dims, video_key, first_frame if automatic else None
+        ):
+            return calibration
+        logging.info(f"Calibration in {sidecar_path} is invalid, recalibrating.")
+
+    if automatic:
+        image_coords = detect_front_wall_coords(first_frame)
+    else:
+        image_coords = _click_front_wall_coords(first_frame.copy())
+    calibration = CameraCalibration.calibrate(image_coords, img_dims, video_key)
+    calibration.save(sidecar_path)
+    return calibration
+
+
+def approximate_homography(
+    video_path: Path, automatic: bool = False, recalibrate: bool = False
+) -> np.ndarray:
+    """
+    Approximate the homography which transforms points from the image plane to a given world plane and vice-versa
+    :param video_path: Video to extract frame from to approximate homography
+    :param automatic: Find the front wall lines with detect_front_wall_coords rather than asking the user to click
+    on them, for unattended processing
+    :param recalibrate: Approximate the homography even if the video's calibration has been saved, see
+    load_calibration
+    :return: The homography matrix
+    """
+    return load_calibration(
+        video_path, automatic=automatic, recalibrate=recalibrate
+    ).get_homography()
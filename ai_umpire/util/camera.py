@@ -0,0 +1,152 @@
+__all__ = [
+    "Camera",
+    "CAM_EXTRINSICS_HOMOG",
+    "project_wc_to_ic",
+    "back_project_ic_to_wc",
+    "reprojection_error",
+]
+
+import warnings
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Extracted from POV-Ray, will only work with wc_to_ic function for a image resolution of [852, 480]
+CAM_EXTRINSICS_HOMOG: np.ndarray = np.array(
+    [
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.5625, 0.0, 0.0],
+        [0.0, 0.0, 1.0, 0.0],
+        [0.0, 3.0, -16.0, 1.0],
+    ]
+)
+
+
+def project_wc_to_ic(
+    points_wc: np.ndarray, img_dims: Sequence[int], extrinsics_inv: np.ndarray
+) -> np.ndarray:
+    """
+    Project world coordinate points into image coordinates
+    :param points_wc: (N, 3) array of world coordinate points
+    :param img_dims: Image dimensions given as height x width, as OpenCV loaded images are
+    :param extrinsics_inv: Inverse of the homogeneous camera extrinsics, applied to row vectors
+    :return: (N, 2) array of x, y image coordinates
+    """
+    if points_wc.ndim != 2 or points_wc.shape[1] != 3:
+        raise ValueError("Expecting an (N, 3) array of points.")
+
+    # Homogenise, transform and convert back to Cartesian
+    tformed_wc = np.c_[points_wc, np.ones(points_wc.shape[0])] @ extrinsics_inv
+    pos_ic_coefs = np.c_[
+        0.5 + (tformed_wc[:, 0] / tformed_wc[:, 2]),
+        0.5 - (tformed_wc[:, 1] / tformed_wc[:, 2]),
+    ]
+
+    height, width = img_dims
+    return pos_ic_coefs * np.array([width, height])
+
+
+def back_project_ic_to_wc(
+    points_ic: np.ndarray,
+    *,
+    homography: Optional[np.ndarray] = None,
+    scale: float = 1.0,
+    camera_params: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    w: float = 1.0,
+) -> np.ndarray:
+    """
+    Back-project image coordinate detections into world coordinates, either through a homography to the world plane or
+    through the calibrated camera's point to line transformation w . R^T K^-1 [x, y, 1]^T - R^-1 t
+    :param points_ic: (N, 2) array of image coordinates, or (N, 3) with a z estimate for each detection which is used
+    as the world z coordinate
+    :param homography: 3x3 homography from the image plane to the world plane, see approximate_homography
+    :param scale: Scale applied to the homography's output
+    :param camera_params: The camera intrinsics, rotation matrix and translation vector, see calibrate_camera
+    :param w: Distance along each back-projected ray
+    :return: (N, 3) array of world coordinates
+    """
+    if (homography is None) == (camera_params is None):
+        raise ValueError("Provide exactly one of a homography or camera parameters.")
+    if points_ic.ndim != 2 or points_ic.shape[1] not in [2, 3]:
+        raise ValueError("Expecting an (N, 2) or (N, 3) array of points.")
+
+    xy_homog = np.c_[points_ic[:, :2], np.ones(points_ic.shape[0])]
+    if homography is not None:
+        projected = xy_homog @ homography.T
+        points_wc = np.c_[
+            scale * projected[:, :2] / projected[:, 2:], np.zeros(points_ic.shape[0])
+        ]
+    else:
+        cam_intrinsics, rot_mtx, t_vec = camera_params
+        # The inverse of a rotation is its transpose
+        points_wc = w * xy_homog @ np.linalg.inv(cam_intrinsics).T @ rot_mtx - np.ravel(
+            rot_mtx.T @ t_vec
+        )
+
+    if points_ic.shape[1] == 3:
+        points_wc[:, 2] = points_ic[:, 2]
+    return points_wc
+
+
+def reprojection_error(
+    points_wc: np.ndarray, points_ic: np.ndarray, **back_projection_kwargs
+) -> np.ndarray:
+    """
+    Euclidean distance between known world coordinates and the back-projection of their image coordinates
+    :param points_wc: (N, 3) array of known world coordinates
+    :param points_ic: (N, 2) or (N, 3) array of the corresponding image coordinates
+    :param back_projection_kwargs: The homography or camera parameters, see back_project_ic_to_wc
+    :return: (N,) array of errors
+    """
+    return np.linalg.norm(
+        back_project_ic_to_wc(points_ic, **back_projection_kwargs) - points_wc, axis=1
+    )
+
+
+class Camera:
+    """
+    The camera the court was filmed with, the inverse of its extrinsics is computed once so many points can be
+    projected cheaply
+    """
+
+    def __init__(
+        self,
+        img_dims: Sequence[int],
+        extrinsics_homog: np.ndarray = CAM_EXTRINSICS_HOMOG,
+    ):
+        """
+        :param img_dims: Image dimensions given as height x width, as OpenCV loaded images are
+        :param extrinsics_homog: Homogeneous camera extrinsics, applied to row vectors
+        """
+        if len(img_dims) != 2:
+            raise ValueError("Expecting image dimensions given as height x width.")
+        # Check the provided dimensions are in the format that OpenCV loaded images are in
+        if img_dims[0] > img_dims[1]:
+            warnings.warn(
+                "Warning, expecting image dimensions given as height x width, possible opposite provided."
+            )
+        self._img_dims: tuple = (int(img_dims[0]), int(img_dims[1]))
+        self._extrinsics_homog: np.ndarray = extrinsics_homog.copy()
+        self._extrinsics_inv: np.ndarray = np.linalg.inv(extrinsics_homog)
+
+    def wc_to_ic(self, points_wc: np.ndarray) -> np.ndarray:
+        """
+        Project world coordinate points into image coordinates
+        :param points_wc: (N, 3) array of world coordinate points, or a single (3,) point
+        :return: (N, 2) array of x, y image coordinates, or (2,) for a single point
+        """
+        points_wc = np.asarray(points_wc, dtype=float)
+        if points_wc.shape == (3,):
+            return project_wc_to_ic(
+                points_wc[None], self._img_dims, self._extrinsics_inv
+            )[0]
+        return project_wc_to_ic(points_wc, self._img_dims, self._extrinsics_inv)
+
+    def get_img_dims(self) -> tuple:
+        return self._img_dims
+
+    def get_extrinsics(self) -> np.ndarray:
+        return self._extrinsics_homog
+
+    def get_extrinsics_inv(self) -> np.ndarray:
+        return self._extrinsics_inv
@@ -0,0 +1,552 @@
+__all__ = [
+    "bb_half_spaces",
+    "points_in_bb",
+    "gaussian_bb_prob",
+    "gaussian_line_masses",
+    "cov_factor",
+    "bb_aabb",
+    "CourtRegionIndex",
+    "CourtVoxelGrid",
+    "segments_bb_intersection",
+]
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from scipy.spatial import ConvexHull
+from scipy.special import ndtr, ndtri
+from scipy.stats import multivariate_normal
+
+from ai_umpire.util.field_constants import FIELD_BOUNDING_BOXES
+
+# Tolerance used when testing points against half-spaces so points lying on a face count as inside
+HALF_SPACE_EPS: float = 1e-9
+
+
+def _is_axis_aligned(bb_name: str) -> bool:
+    return "verts" not in FIELD_BOUNDING_BOXES[bb_name]
+
+
+@lru_cache(maxsize=None)
+def bb_half_spaces(bb_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the half-space representation of the given bounding box such that a point p is inside the box iff A @ p <= b
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :return: The (n_faces, 3) matrix of outward face normals A and the (n_faces,) vector of offsets b
+    """
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    if _is_axis_aligned(bb_name):
+        a = np.vstack([np.identity(3), -np.identity(3)])
+        b = np.array(
+            [
+                bb["max_x"],
+                bb["max_y"],
+                bb["max_z"],
+                -bb["min_x"],
+                -bb["min_y"],
+                -bb["min_z"],
+            ],
+            dtype=float,
+        )
+        return a, b
+
+    # Hull facets are triangles so coplanar facets are repeated, keep one copy of each plane
+    equations = np.unique(np.round(ConvexHull(bb["verts"]).equations, 12), axis=0)
+    return equations[:, :3], -equations[:, 3]
+
+
+@lru_cache(maxsize=None)
+def bb_aabb(bb_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the axis-aligned bounding box of the given court bounding box
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :return: The minimum and maximum corners of the axis-aligned bounding box
+    """
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    if _is_axis_aligned(bb_name):
+        lower = np.array([bb["min_x"], bb["min_y"], bb["min_z"]], dtype=float)
+        upper = np.array([bb["max_x"], bb["max_y"], bb["max_z"]], dtype=float)
+        return lower, upper
+    return np.min(bb["verts"], axis=0), np.max(bb["verts"], axis=0)
+
+
+class CourtRegionIndex:
+    """
+    Broad-phase index over the court bounding boxes. A uniform grid of cells covers the bounding boxes' axis-aligned
+    bounding boxes and each cell records which bounding boxes overlap it, so a query only needs to look at the cells
+    it touches.
+    """
+
+    def __init__(self, bb_names: List[str] = None, cell_size: float = 1.0):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive.")
+        if bb_names is None:
+            bb_names = list(FIELD_BOUNDING_BOXES.keys())
+        self._bb_names: List[str] = list(bb_names)
+        self._cell_size: float = cell_size
+
+        aabbs = [bb_aabb(bb_name) for bb_name in self._bb_names]
+        self._lowers: np.ndarray = np.array([lower for lower, _ in aabbs])
+        self._uppers: np.ndarray = np.array([upper for _, upper in aabbs])
+        self._origin: np.ndarray = np.min(self._lowers, axis=0)
+        self._n_cells: np.ndarray = np.maximum(
+            np.ceil((np.max(self._uppers, axis=0) - self._origin) / cell_size), 1
+        ).astype(int)
+
+        # (n_x, n_y, n_z, n_bbs) occupancy of each cell by each bounding box
+        self._cells: np.ndarray = np.zeros((*self._n_cells, len(self._bb_names)), bool)
+        for i in range(len(self._bb_names)):
+            first, last = self._cell_range(self._lowers[i], self._uppers[i])
+            self._cells[
+                first[0] : last[0], first[1] : last[1], first[2] : last[2], i
+            ] = True
+
+    def _cell_range(
+        self, lower: np.ndarray, upper: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Cells are clamped to the grid, a box outside of it touches the outermost cells and is rejected by query
+        first = np.floor((lower - self._origin) / self._cell_size).astype(int)
+        last = np.floor((upper - self._origin) / self._cell_size).astype(int) + 1
+        return (
+            np.clip(first, 0, self._n_cells - 1),
+            np.clip(last, 1, self._n_cells),
+        )
+
+    def query(self, lower: np.ndarray, upper: np.ndarray) -> List[str]:
+        """
+        Returns the names of the bounding boxes whose axis-aligned bounding boxes overlap the given box
+        :param lower: Minimum corner of the query box
+        :param upper: Maximum corner of the query box
+        :return: Names of the overlapping bounding boxes, in the index's order
+        """
+        lower, upper = np.reshape(lower, (3,)), np.reshape(upper, (3,))
+        first, last = self._cell_range(lower, upper)
+        candidates = np.any(
+            self._cells[first[0] : last[0], first[1] : last[1], first[2] : last[2]],
+            axis=(0, 1, 2),
+        )
+        overlapping = (
+            candidates
+            & np.all(self._lowers <= upper, axis=1)
+            & np.all(self._uppers >= lower, axis=1)
+        )
+        return [self._bb_names[i] for i in np.flatnonzero(overlapping)]
+
+    def query_gaussian(
+        self, mu: np.ndarray, cov: np.ndarray, n_std_devs: float = 6
+    ) -> List[str]:
+        """
+        Returns the names of the bounding boxes which overlap the box spanning n_std_devs standard deviations either
+        side of the mean of N(mu, cov) in each dimension
+        :param mu: Mean of the ball position, 3D
+        :param cov: Covariance of the ball position, 3x3
+        :param n_std_devs: Number of standard deviations to extend the query box by either side of the mean
+        :return: Names of the bounding boxes the ball could be inside
+        """
+        mu = np.reshape(mu, (3,))
+        half_size = n_std_devs * np.sqrt(np.diag(cov))
+        return self.query(mu - half_size, mu + half_size)
+
+    def get_bb_names(self) -> List[str]:
+        return self._bb_names
+
+
+class CourtVoxelGrid:
+    """
+    Precomputed label volume covering all court bounding boxes. Each voxel stores a bitmask of the bounding boxes
+    containing it entirely and a bitmask of those whose faces pass through it, so membership of a point is a single
+    array lookup and only points in boundary voxels are checked exactly against the bounding box's half-spaces. Points
+    outside the volume are outside every bounding box.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.05,
+        *,
+        cache_dir: Optional[Path] = None,
+    ):
+        """
+        :param resolution: Edge length of each voxel in metres
+        :param cache_dir: Directory to load the label volume from and save it to, by default it is always built
+        """
+        if resolution <= 0:
+            raise ValueError("Voxel resolution must be positive.")
+        self._resolution: float = resolution
+        self._bb_names: List[str] = list(FIELD_BOUNDING_BOXES.keys())
+        if len(self._bb_names) > 16:
+            raise ValueError("Voxel labels support at most 16 bounding boxes.")
+
+        aabbs = [bb_aabb(bb_name) for bb_name in self._bb_names]
+        self._origin: np.ndarray = np.min([lower for lower, _ in aabbs], axis=0)
+        extent = np.max([upper for _, upper in aabbs], axis=0) - self._origin
+        self._n_voxels: np.ndarray = np.ceil(extent / resolution).astype(int)
+
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = Path(cache_dir) / f"court_voxels_{self._cache_key()}.npz"
+        if cache_path is not None and cache_path.exists():
+            with np.load(str(cache_path)) as cached:
+                self._inside, self._boundary = cached["inside"], cached["boundary"]
+        else:
+            self._inside, self._boundary = self._build()
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                np.savez_compressed(
+                    str(cache_path), inside=self._inside, boundary=self._boundary
+                )
+
+    def _cache_key(self) -> str:
+        # Changing the court geometry, resolution or boundary tolerance invalidates previously cached volumes
+        digest = hashlib.sha1(f"{self._resolution}_{HALF_SPACE_EPS}".encode())
+        for bb_name in self._bb_names:
+            a, b = bb_half_spaces(bb_name)
+            digest.update(bb_name.encode())
+            digest.update(np.ascontiguousarray(a).tobytes())
+            digest.update(np.ascontiguousarray(b).tobytes())
+        return digest.hexdigest()[:16]
+
+    def _build(self) -> Tuple[np.ndarray, np.ndarray]:
+        inside = np.zeros(self._n_voxels, dtype=np.uint16)
+        boundary = np.zeros(self._n_voxels, dtype=np.uint16)
+        for i, bb_name in enumerate(self._bb_names):
+            # Only voxels overlapping the bounding box's AABB can touch it, padded by a voxel as a face lying on a voxel
+            # boundary may round into the neighbouring voxel when points are located
+            lower, upper = bb_aabb(bb_name)
+            first = np.clip(
+                np.floor((lower - self._origin) / self._resolution).astype(int) - 1,
+                0,
+                self._n_voxels - 1,
+            )
+            last = np.clip(
+                np.ceil((upper - self._origin) / self._resolution).astype(int) + 1,
+                first + 1,
+                self._n_voxels,
+            )
+            corners = [
+                self._origin[d] + np.arange(first[d], last[d] + 1) * self._resolution
+                for d in range(3)
+            ]
+
+            # A voxel is inside a convex bounding box iff all of its corners are, and certainly outside if all of its
+            # corners are outside the same face by more than the tolerance of points_in_bb. Anything else is treated as
+            # boundary.
+            all_in = np.ones(last - first, dtype=bool)
+            any_face_out = np.zeros(last - first, dtype=bool)
+            for a, b in zip(*bb_half_spaces(bb_name)):
+                dist = (
+                    a[0] * corners[0][:, None, None]
+                    + a[1] * corners[1][None, :, None]
+                    + a[2] * corners[2][None, None, :]
+                    - b
+                )
+                voxel_corner_dists = [
+                    dist[
+                        dx : dist.shape[0] - 1 + dx,
+                        dy : dist.shape[1] - 1 + dy,
+                        dz : dist.shape[2] - 1 + dz,
+                    ]
+                    for dx in (0, 1)
+                    for dy in (0, 1)
+                    for dz in (0, 1)
+                ]
+                all_in &= np.max(voxel_corner_dists, axis=0) <= 0
+                any_face_out |= np.min(voxel_corner_dists, axis=0) > HALF_SPACE_EPS
+
+            region = tuple(slice(first[d], last[d]) for d in range(3))
+            bit = np.uint16(1 << i)
+            inside[region] |= np.where(all_in, bit, np.uint16(0))
+            boundary[region] |= np.where(~all_in & ~any_face_out, bit, np.uint16(0))
+
+        return inside, boundary
+
+    def point_labels(self, points: np.ndarray) -> np.ndarray:
+        """
+        Returns which bounding boxes contain each point as a bitmask, bit i being set if the point is inside the i-th
+        bounding box of FIELD_BOUNDING_BOXES
+        :param points: (N, 3) array of points to label
+        :return: (N,) array of bitmasks
+        """
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("Expecting an (N, 3) array of points.")
+
+        # Points on the volume's faces, within the tolerance used by points_in_bb, are located in the outermost voxels
+        # so the upper faces of the bounding boxes there are included like the lower ones. Those outside the volume
+        # are checked exactly against every bounding box of their voxel.
+        upper = self._origin + self._n_voxels * self._resolution
+        in_volume = np.all(
+            (points >= self._origin - HALF_SPACE_EPS)
+            & (points <= upper + HALF_SPACE_EPS),
+            axis=1,
+        )
+        idx = np.floor((points[in_volume] - self._origin) / self._resolution).astype(
+            int
+        )
+        clamped = np.any((idx < 0) | (idx >= self._n_voxels), axis=1)
+        idx = np.clip(idx, 0, self._n_voxels - 1)
+        voxels = np.ravel_multi_index(tuple(idx.T), self._n_voxels)
+
+        labels = np.zeros(points.shape[0], dtype=np.uint16)
+        boundary = np.zeros(points.shape[0], dtype=np.uint16)
+        inside = self._inside.ravel().take(voxels)
+        labels[in_volume] = np.where(clamped, np.uint16(0), inside)
+        boundary[in_volume] = self._boundary.ravel().take(voxels) | np.where(
+            clamped, inside, np.uint16(0)
+        )
+
+        # Resolve the bounding boxes whose faces pass through a point's voxel exactly
+        for i, bb_name in enumerate(self._bb_names):
+            bit = np.uint16(1 << i)
+            on_boundary = np.flatnonzero(boundary & bit)
+            if on_boundary.shape[0] > 0:
+                collided = points_in_bb(points[on_boundary], bb_name)
+                labels[on_boundary[collided]] |= bit
+
+        return labels
+
+    def box_labels(self, lower: np.ndarray, upper: np.ndarray) -> np.uint16:
+        """
+        Returns which bounding boxes may intersect an axis-aligned box as a bitmask, a bit is set if the bounding box
+        contains or passes through any voxel overlapping the box
+        :param lower: Minimum corner of the box
+        :param upper: Maximum corner of the box
+        :return: The bitmask
+        """
+        first = np.floor((np.reshape(lower, (3,)) - self._origin) / self._resolution)
+        last = np.floor((np.reshape(upper, (3,)) - self._origin) / self._resolution)
+        first = np.clip(first.astype(int), 0, None)
+        last = np.clip(last.astype(int) + 1, None, self._n_voxels)
+        if np.any(first >= last):
+            return np.uint16(0)
+
+        region = tuple(slice(first[d], last[d]) for d in range(3))
+        return np.bitwise_or.reduce(
+            self._inside[region] | self._boundary[region], axis=None
+        )
+
+    def points_in_bb(self, points: np.ndarray, bb_name: str) -> np.ndarray:
+        """
+        Equivalent to points_in_bb using the label volume, use point_labels when testing the same points against
+        several bounding boxes
+        :param points: (N, 3) array of points to check collision for
+        :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+        :return: (N,) boolean array, True where the point is in collision with the bounding box
+        """
+        return (self.point_labels(points) & self.get_bb_bit(bb_name)) != 0
+
+    def get_bb_bit(self, bb_name: str) -> np.uint16:
+        """Returns the bit representing the given bounding box in the point labels"""
+        return np.uint16(1 << self._bb_names.index(bb_name))
+
+    def get_resolution(self) -> float:
+        return self._resolution
+
+
+def points_in_bb(points: np.ndarray, bb_name: str) -> np.ndarray:
+    """
+    Vectorised version of point_bb_collided
+    :param points: (N, 3) array of points to check collision for
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :return: (N,) boolean array, True where the point is in collision with the bounding box
+    """
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError("Expecting an (N, 3) array of points.")
+
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    if _is_axis_aligned(bb_name):
+        lower = np.array([bb["min_x"], bb["min_y"], bb["min_z"]])
+        upper = np.array([bb["max_x"], bb["max_y"], bb["max_z"]])
+        return np.all((points >= lower) & (points <= upper), axis=1)
+
+    a, b = bb_half_spaces(bb_name)
+    return np.all(points @ a.T <= b + HALF_SPACE_EPS, axis=1)
+
+
+def segments_bb_intersection(
+    starts: np.ndarray, ends: np.ndarray, bb_name: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised test of line segments against a bounding box, the slab test is used for axis-aligned boxes and
+    Cyrus-Beck clipping against the half-spaces for the wall polyhedra
+    :param starts: (N, 3) array of segment start points
+    :param ends: (N, 3) array of segment end points
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :return: (N,) boolean array, True where the segment intersects the bounding box, and the (N,) segment parameters
+    in [0, 1] at which each segment enters and exits the bounding box, only meaningful where it intersects
+    """
+    if starts.shape != ends.shape or starts.ndim != 2 or starts.shape[1] != 3:
+        raise ValueError("Expecting two (N, 3) arrays of segment end points.")
+
+    directions = ends - starts
+    t_enter = np.zeros(starts.shape[0])
+    t_exit = np.ones(starts.shape[0])
+
+    if _is_axis_aligned(bb_name):
+        bb = FIELD_BOUNDING_BOXES[bb_name]
+        lower = np.array([bb["min_x"], bb["min_y"], bb["min_z"]])
+        upper = np.array([bb["max_x"], bb["max_y"], bb["max_z"]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_lower = (lower - starts) / directions
+            t_upper = (upper - starts) / directions
+        # Segments parallel to a slab are either always or never inside it
+        parallel = directions == 0
+        outside_slab = parallel & ((starts < lower) | (starts > upper))
+        t_near = np.where(parallel, -np.inf, np.minimum(t_lower, t_upper))
+        t_far = np.where(parallel, np.inf, np.maximum(t_lower, t_upper))
+        t_enter = np.maximum(t_enter, np.max(t_near, axis=1))
+        t_exit = np.minimum(t_exit, np.min(t_far, axis=1))
+        missed = np.any(outside_slab, axis=1)
+    else:
+        a, b = bb_half_spaces(bb_name)
+        # Each face constrains the segment parameter t through a_n * t <= r
+        a_n = directions @ a.T
+        r = b[None, :] + HALF_SPACE_EPS - starts @ a.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bound = r / a_n
+        t_enter = np.maximum(t_enter, np.max(np.where(a_n < 0, bound, -np.inf), axis=1))
+        t_exit = np.minimum(t_exit, np.min(np.where(a_n > 0, bound, np.inf), axis=1))
+        missed = np.any((a_n == 0) & (r < 0), axis=1)
+
+    hit = ~missed & (t_enter <= t_exit)
+    return hit, t_enter, t_exit
+
+
+def gaussian_bb_prob(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    bb_name: str,
+    *,
+    tol: float = 1e-5,
+    n_quad_points: int = 64,
+) -> float:
+    """
+    Returns the probability mass of the Gaussian N(mu, cov) that lies inside the given bounding box.
+
+    Axis-aligned boxes are evaluated directly with the multivariate normal CDF. The convex wall polyhedra are
+    integrated exactly along lines in whitened space, see gaussian_line_masses, and the two outer dimensions use a
+    midpoint rule in probability space. The midpoint rule only converges linearly where lines cross the polyhedron's
+    edges, so its accuracy is set by n_quad_points rather than tol, AdaptiveEstimator integrates to a tolerance.
+    :param mu: Mean of the ball position, 3D
+    :param cov: Covariance of the ball position, 3x3
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :param tol: Absolute error tolerance for the CDF evaluation, only used for axis-aligned bounding boxes
+    :param n_quad_points: Number of integration nodes per outer dimension for polyhedral bounding boxes
+    :return: The probability of the ball being inside the bounding box
+    """
+    mu = np.reshape(mu, (3,))
+    if cov.shape != (3, 3):
+        raise ValueError("Expecting a 3x3 covariance matrix.")
+
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    if _is_axis_aligned(bb_name):
+        lower = np.array([bb["min_x"], bb["min_y"], bb["min_z"]])
+        upper = np.array([bb["max_x"], bb["max_y"], bb["max_z"]])
+        p = multivariate_normal.cdf(
+            upper,
+            mean=mu,
+            cov=cov,
+            allow_singular=True,
+            abseps=tol,
+            releps=0,
+            lower_limit=lower,
+        )
+        return float(np.clip(p, 0.0, 1.0))
+
+    # Midpoint rule over equal probability cells of the two outer dimensions
+    u = (np.arange(n_quad_points) + 0.5) / n_quad_points
+    u0, u1 = np.meshgrid(u, u, indexing="ij")
+    outer = ndtri(np.c_[u0.ravel(), u1.ravel()])
+
+    return float(
+        np.clip(np.mean(gaussian_line_masses(mu, cov, bb_name, outer)), 0.0, 1.0)
+    )
+
+
+def cov_factor(cov: np.ndarray) -> np.ndarray:
+    """
+    Returns an invertible square root L of the covariance, cov = L @ L.T, mapping whitened space to world space. This
+    is the Cholesky factor unless the covariance is singular, e.g. when the ball's position is only uncertain in a
+    plane, in which case its eigenvalues are raised to a tiny fraction of the largest one first. The mass that moves
+    outside the degenerate Gaussian's support is negligible.
+    :param cov: Covariance of the ball position, 3x3
+    :return: The 3x3 factor
+    """
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eig_vals, eig_vecs = np.linalg.eigh(cov)
+        floor = max(eig_vals[-1] * 1e-12, HALF_SPACE_EPS**2)
+        return eig_vecs * np.sqrt(np.maximum(eig_vals, floor))
+
+
+def gaussian_line_masses(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    bb_name: str,
+    outer: np.ndarray,
+    *,
+    return_active_faces: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Integrates the Gaussian N(mu, cov) along lines through the given bounding box in whitened space, where
+    p = mu + L @ z and z ~ N(0, I). Lines run along the whitened axis in which the bounding box is thinnest and each is
+    clipped exactly against the bounding box's faces. L is given by cov_factor so singular covariances are supported.
+    :param mu: Mean of the ball position, 3D
+    :param cov: Covariance of the ball position, 3x3
+    :param bb_name: Name of bounding box which will be obtained from predefined list of court bounding boxes
+    :param outer: (N, 2) whitened coordinates of each line in the two remaining axes
+    :param return_active_faces: Whether to also return which faces clip each line. The line masses are a smooth
+    function of the outer coordinates wherever this does not change.
+    :return: (N,) probability mass along each line inside the bounding box, conditional on the outer coordinates
+    """
+    mu = np.reshape(mu, (3,))
+    a, b = bb_half_spaces(bb_name)
+    chol = cov_factor(cov)
+    a_w = a @ chol
+    b_w = b - a @ mu
+
+    # Integrating along the thinnest axis leaves a function of the outer coordinates that is smooth over most of its
+    # range
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    if _is_axis_aligned(bb_name):
+        verts = np.array(
+            [
+                [x, y, z]
+                for x in (bb["min_x"], bb["max_x"])
+                for y in (bb["min_y"], bb["max_y"])
+                for z in (bb["min_z"], bb["max_z"])
+            ]
+        )
+    else:
+        verts = bb["verts"]
+    verts_w = np.linalg.solve(chol, (verts - mu).T).T
+    inner = int(np.argmin(np.ptp(verts_w, axis=0)))
+    a_w = a_w[:, [i for i in range(3) if i != inner] + [inner]]
+
+    # Clip each line (z0, z1, t) against all faces, a_t * t <= r
+    r = b_w[None, :] - outer @ a_w[:, :2].T
+    a_t = a_w[:, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bound = r / a_t
+    upper_bounds = np.where(a_t > 0, bound, np.inf)
+    lower_bounds = np.where(a_t < 0, bound, -np.inf)
+    upper = np.min(upper_bounds, axis=1)
+    lower = np.max(lower_bounds, axis=1)
+    missed = np.any((a_t == 0) & (r < 0), axis=1) | (upper <= lower)
+
+    line_mass = np.clip(ndtr(upper) - ndtr(lower), 0.0, None)
+    line_mass[missed] = 0.0
+
+    if not return_active_faces:
+        return line_mass
+
+    # Encode the pair of clipping faces as one integer, lines that miss the bounding box share the code -1
+    n_faces = a_t.shape[0]
+    active_faces = np.argmin(upper_bounds, axis=1) * n_faces + np.argmax(
+        lower_bounds, axis=1
+    )
+    active_faces[missed] = -1
+
+    return line_mass, active_faces
@@ -22,19 +22,22 @@ __all__ = [
     "wc_to_ic",
     "multivariate_norm_pdf",
     "gen_grid_of_points",
-    "CAM_EXTRINSICS_HOMOG",
     "calibrate_camera",
     "SinglePosStore",
     "FourCoordsStore",
     "plot_bb",
+    "bb_verts",
+    "bb_inner_face",
     "point_bb_collided",
     "transform_nums_to_range",
-    "approximate_homography",
+    "detect_front_wall_coords",
     "load_sim_ball_pos",
     "get_init_ball_pos",
 ]
 
 from ai_umpire.util import (
+    CAM_EXTRINSICS_HOMOG,
+    project_wc_to_ic,
     FIELD_BOUNDING_BOXES,
     HALF_COURT_LENGTH,
     BB_DEPTH,
@@ -69,16 +72,6 @@ FRONT_WALL_WORLD_COORDS: np.ndarray = np.array(
     dtype="float32",
 )
 
-# Extracted from POV-Ray, will only work with wc_to_ic function for a image resolution of [852, 480]
-CAM_EXTRINSICS_HOMOG: np.ndarray = np.array(
-    [
-        [1.0, 0.0, 0.0, 0.0],
-        [0.0, 0.5625, 0.0, 0.0],
-        [0.0, 0.0, 1.0, 0.0],
-        [0.0, 3.0, -16.0, 1.0],
-    ]
-)
-
 CAM_EXTRINSICS_HOMOG_INV: np.ndarray = np.linalg.inv(CAM_EXTRINSICS_HOMOG)
 
 
@@ -141,31 +134,14 @@ def wc_to_ic(
     """
     Project the given world coordinate point into image coordinates
     Only works for synthetic videos in 720p as the camera matrix has been extracted specifically for that camera.
+    Use Camera.wc_to_ic to project many points at once.
     """
     # Check the provided dimensions are in the format that OpenCV loaded images are in
     if img_dims[0] > img_dims[1]:
         warnings.warn(
             "Warning, expecting image dimensions given as height x width, possible opposite provided."
         )
-    img_dims.reverse()
-    pos_x_wc, pos_y_wc, pos_z_wc = pos_wc[0], pos_wc[1], pos_wc[2]
-
-    # Homogensise
-    homog_ball_wc: np.ndarray = np.reshape(
-        np.array([pos_x_wc, pos_y_wc, pos_z_wc, 1]), (1, 4)
-    )
-    homog_tformed_ball_wc: np.ndarray = homog_ball_wc @ m
-    tformed_ball_wc: np.ndarray = homog_tformed_ball_wc[
-        :, :-1
-    ]  # Convert homogenous to Cartesian
-    pos_ic_coefs: np.ndarray = np.array(
-        [
-            0.5 + (tformed_ball_wc[:, 0] / tformed_ball_wc[:, -1]),
-            0.5 - (tformed_ball_wc[:, 1] / tformed_ball_wc[:, -1]),
-        ]
-    )
-
-    pos_ic: np.ndarray = np.reshape(img_dims, (2, 1)) * pos_ic_coefs
+    pos_ic = project_wc_to_ic(np.reshape(pos_wc[:3], (1, 3)), img_dims, m)[0]
 
     return pos_ic[0].item(), pos_ic[1].item()
 
@@ -422,15 +398,8 @@ def point_bb_collided(point: np.ndarray, bb_name: str) -> bool:
     )
 
 
-def plot_bb(
-    bb_name: str,
-    ax: plt.axes,
-    *,
-    bb_face_annotation: str = None,
-    show_vertices: bool = False,
-    show_annotation: bool = False,
-) -> None:
-    """Plot the given bounding box (obtained from predefined list of court BBs) on the given axis - ax"""
+def bb_verts(bb_name: str) -> np.ndarray:
+    """Returns the vertices of the given bounding box (obtained from predefined list of court BBs)"""
     bb = FIELD_BOUNDING_BOXES[bb_name]
 
     if bb_name.startswith(("left", "right")):
@@ -442,7 +411,12 @@ def plot_bb(
             for y in [bb["min_y"], bb["max_y"]]
             for z in [bb["min_z"], bb["max_z"]]
         ]
-    verts = np.array(verts)
+    return np.array(verts)
+
+
+def bb_inner_face(bb_name: str) -> np.ndarray:
+    """Returns the vertices of the given bounding box's face on the court side, ordered for plotting as a polygon"""
+    verts = bb_verts(bb_name)
 
     # Isolate vertices of plane which correspond to the inner face of the wall polyhedron via masking
     if bb_name.startswith(("front", "tin")):
@@ -459,6 +433,21 @@ def plot_bb(
         face_verts[[0, 1]] = face_verts[[1, 0]]
     else:  # Back wall case
         raise ValueError(f"Plotting face for {bb_name} not implemented")
+    return face_verts
+
+
+def plot_bb(
+    bb_name: str,
+    ax: plt.axes,
+    *,
+    bb_face_annotation: str = None,
+    show_vertices: bool = False,
+    show_annotation: bool = False,
+) -> None:
+    """Plot the given bounding box (obtained from predefined list of court BBs) on the given axis - ax"""
+    bb = FIELD_BOUNDING_BOXES[bb_name]
+    verts = bb_verts(bb_name)
+    face_verts = bb_inner_face(bb_name)
 
     # Annotate center of bounding boxes inner face
     if show_annotation:
@@ -489,47 +478,85 @@ def plot_bb(
         )
 
 
-def approximate_homography(video_path: Path) -> np.ndarray:
+def detect_front_wall_coords(
+    frame: np.ndarray,
+    *,
+    max_line_angle: float = 5.0,
+    min_line_length: float = 0.1,
+    line_sep: float = 0.01,
+) -> np.ndarray:
     """
-    Approximate the homography which transforms points from the image plane to a given world plane and vice-versa
-    :param video_path: Video to extract frame from to approximate homography
-    :return: The homography matrix
+    Find the image coordinates of the ends of the front wall out line and service line, without the user clicking on
+    them. The red court lines are segmented, their edges found with Canny and straight segments found with a
+    probabilistic Hough transform. Near horizontal segments are grouped into lines and the pair of lines whose
+    extents and separation best fit the front wall's dimensions is chosen.
+    :param frame: BGR frame showing the front wall, e.g. the first frame of a video
+    :param max_line_angle: Maximum angle from horizontal in degrees of the segments considered
+    :param min_line_length: Minimum length of the segments considered, as a fraction of the frame width
+    :param line_sep: Maximum vertical separation of segments of the same line, as a fraction of the frame height
+    :return: The 4 image coordinates, ordered as FRONT_WALL_WORLD_COORDS
     """
-    frames = extract_frames_from_vid(video_path, disable_progbar=True)
-    first_frame = frames[0].copy()
-
-    # Camera calibration: obtain the coordinates of the 4 corners of the front wall which
-    # will be used to derive the inverse of camera projection matrix for 2D->3D
-    coords_store = FourCoordsStore(first_frame)
-    cv.namedWindow("Click on the four specified locations")
-    cv.setMouseCallback(
-        "Click on the four specified locations", coords_store.img_clicked
+    height, width = frame.shape[:2]
+    hsv = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
+    # Red wraps around the hue axis
+    red_mask = cv.inRange(hsv, (0, 120, 80), (10, 255, 255)) | cv.inRange(
+        hsv, (170, 120, 80), (180, 255, 255)
     )
-
-    print(
-        "Double-click at these locations on the front wall in the order presented:\n"
-        "   1. Front Wall Line Left\n"
-        "   2. Service Line Left\n"
-        "   3. Front Wall Line Right\n"
-        "   4. Service Line Left"
+    segments = cv.HoughLinesP(
+        cv.Canny(red_mask, 50, 150),
+        rho=1,
+        theta=pi / 180,
+        threshold=50,
+        minLineLength=min_line_length * width,
+        maxLineGap=10,
     )
-
-    while True:
-        # Display the image and wait for either exit via escape key or 4 coordinates clicked
-        cv.imshow("Click on the four specified locations", first_frame)
-        key = cv.waitKey(1) & 0xFF
-
-        if key == ord("c") or coords_store.click_pos().shape[0] == 4:
-            break
-    cv.destroyAllWindows()
-
-    front_wall_image_coords = coords_store.click_pos()
-
-    h, _ = cv.findHomography(
-        front_wall_image_coords, FRONT_WALL_WORLD_COORDS, method=cv.RANSAC
+    if segments is None:
+        raise ValueError("No court lines found in the frame.")
+    segments = segments.reshape(-1, 4).astype(float)
+    angles = np.degrees(
+        np.arctan2(segments[:, 3] - segments[:, 1], segments[:, 2] - segments[:, 0])
+    )
+    segments = segments[np.abs((angles + 90) % 180 - 90) <= max_line_angle]
+
+    # Group segments into lines, the edges either side of a painted line become one line along its centre
+    segments = segments[np.argsort(segments[:, [1, 3]].mean(axis=1))]
+    seg_y = segments[:, [1, 3]].mean(axis=1)
+    line_ids = np.cumsum(np.r_[0, np.diff(seg_y) > line_sep * height])
+    lines = []
+    for line_id in np.unique(line_ids):
+        line_segs = segments[line_ids == line_id]
+        xs, ys = (
+            np.r_[line_segs[:, 0], line_segs[:, 2]],
+            np.r_[line_segs[:, 1], line_segs[:, 3]],
+        )
+        slope, intercept = np.polyfit(xs, ys, 1)
+        left, right = xs.min(), xs.max()
+        lines.append(
+            [[left, slope * left + intercept], [right, slope * right + intercept]]
+        )
+    lines = np.array(lines)
+    if lines.shape[0] < 2:
+        raise ValueError("Could not find the front wall out line and service line.")
+
+    # Score each pair of upper and lower lines on how well they fit the front wall, both span the wall's width and
+    # they are separated in proportion to the difference in their heights
+    expected_ratio = (FRONT_WALL_OUT_LINE_HEIGHT - SERVICE_LINE_HEIGHT) / (
+        2 * HALF_COURT_WIDTH
+    )
+    upper, lower = np.triu_indices(lines.shape[0], k=1)
+    widths = lines[:, 1, 0] - lines[:, 0, 0]
+    mean_widths = (widths[upper] + widths[lower]) / 2
+    seps = lines[lower, :, 1].mean(axis=1) - lines[upper, :, 1].mean(axis=1)
+    scores = (
+        np.abs(lines[upper, :, 0] - lines[lower, :, 0]).sum(axis=1) / mean_widths
+        + np.abs(seps / mean_widths - expected_ratio) / expected_ratio
     )
+    best = np.argmin(scores)
+    out_line, service_line = lines[upper[best]], lines[lower[best]]
 
-    return h
+    return np.array(
+        [out_line[0], service_line[0], out_line[1], service_line[1]], dtype="float32"
+    )
 
 
 def load_sim_ball_pos(
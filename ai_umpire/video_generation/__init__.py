@@ -1 +1,2 @@
 from .data_gen import *
+from .fast_renderer import *
@@ -1,28 +1,286 @@
-__all__ = ["VideoGenerator"]
+__all__ = ["VideoGenerator", "VideoVariant"]
 
 import glob
 import logging
 import os
+import queue
+import threading
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
 from tqdm import tqdm
 
 
+class _ThreadedImageIO:
+    """
+    Decodes and encodes images on a thread pool, cv2.imread and cv2.imwrite release the GIL so many images are
+    processed at once. At most max_pending images are read ahead or waiting to be written, bounding memory.
+    """
+
+    def __init__(self, n_threads: Optional[int] = None, max_pending: int = 32):
+        """
+        :param n_threads: Number of threads, defaults to ThreadPoolExecutor's default
+        :param max_pending: Maximum number of images read ahead, and separately waiting to be written
+        """
+        if max_pending < 1:
+            raise ValueError("Maximum number of pending images must be at least 1.")
+        self._max_pending: int = max_pending
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=n_threads)
+        self._pending_writes: Deque[Future] = deque()
+
+    @staticmethod
+    def _imread(img_path: str) -> np.ndarray:
+        img = cv2.imread(str(img_path), 1)
+        if img is None:
+            raise ValueError(f"Could not read image {img_path}.")
+        return img
+
+    def imread_ordered(self, img_paths: Sequence[str]) -> Iterator[np.ndarray]:
+        """Read the images, yielded in the order of their paths"""
+        pending_reads: Deque[Future] = deque()
+        for img_path in img_paths:
+            if len(pending_reads) == self._max_pending:
+                yield pending_reads.popleft().result()
+            pending_reads.append(self._executor.submit(self._imread, img_path))
+        while pending_reads:
+            yield pending_reads.popleft().result()
+
+    def imwrite(self, img_path: Path, img: np.ndarray) -> None:
+        """Write the image in the background, only blocks if max_pending images are waiting to be written"""
+        if len(self._pending_writes) == self._max_pending:
+            self._wait_for_write()
+        self._pending_writes.append(
+            self._executor.submit(cv2.imwrite, str(img_path), img)
+        )
+
+    def _wait_for_write(self) -> None:
+        img_written = self._pending_writes.popleft().result()
+        if not img_written:
+            raise ValueError("Could not write image.")
+
+    def close(self) -> None:
+        """Wait for all images to be written"""
+        try:
+            while self._pending_writes:
+                self._wait_for_write()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "_ThreadedImageIO":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class _QueuedVideoWriter:
+    """
+    Encodes frames on a background thread, frames are passed through a bounded queue so the producer only blocks if
+    the encoder falls max_queue_size frames behind. Frames are resized on the same thread if img_dims is given.
+    """
+
+    def __init__(
+        self,
+        vid_path: Path,
+        fps: int,
+        max_queue_size: int = 8,
+        codec: str = "mp4v",
+        img_dims: Optional[Sequence[int]] = None,
+    ):
+        self._vid_path: Path = vid_path
+        self._fps: int = fps
+        self._codec: str = codec
+        self._img_dims: Optional[tuple] = (
+            None if img_dims is None else (int(img_dims[0]), int(img_dims[1]))
+        )
+        self._video_writer: Optional[cv2.VideoWriter] = None
+        self._error: Optional[BaseException] = None
+        # Set when the video is abandoned, the frames still queued are then dropped
+        self._aborted: bool = False
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._worker: threading.Thread = threading.Thread(
+            target=self._write_worker, daemon=True
+        )
+        self._worker.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+
+    def _write_worker(self) -> None:
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            # Keep consuming after an error so the producer never blocks on a full queue
+            if self._error is not None or self._aborted:
+                continue
+            try:
+                if self._img_dims is not None and frame.shape[:2] != self._img_dims:
+                    # OpenCV image sizes are width x height
+                    frame = cv2.resize(
+                        frame,
+                        (self._img_dims[1], self._img_dims[0]),
+                        interpolation=cv2.INTER_AREA,
+                    )
+                if self._video_writer is None:
+                    self._video_writer = cv2.VideoWriter(
+                        filename=str(self._vid_path),
+                        fourcc=cv2.VideoWriter_fourcc(*self._codec),
+                        fps=self._fps,
+                        frameSize=(frame.shape[1], frame.shape[0]),
+                    )
+                    if not self._video_writer.isOpened():
+                        raise ValueError(
+                            f"Could not open video {self._vid_path} for writing."
+                        )
+                self._video_writer.write(frame)
+            except BaseException as e:
+                self._error = e
+
+    def close(self) -> None:
+        """Wait for all queued frames to be written and finalise the video"""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+        if self._error is not None:
+            raise self._error
+
+    def abort(self) -> None:
+        """Stop writing without raising, the partial video is deleted and any error writing it is only logged"""
+        self._aborted = True
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+        self._vid_path.unlink(missing_ok=True)
+        if self._error is not None:
+            logging.error(f"Writing video {self._vid_path} failed. {self._error}")
+
+    def __enter__(self) -> "_QueuedVideoWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # An error writing the video must not replace the exception already propagating
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class VideoVariant:
+    """
+    One of the videos encoded from a single pass over the rendered frames, see VideoGenerator.convert_frames_to_vids
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fps: int = 50,
+        n_frames_avg: Optional[int] = None,
+        img_dims: Optional[Sequence[int]] = None,
+        codec: str = "mp4v",
+        ext: str = ".mp4",
+    ):
+        """
+        :param name: Name of the variant, the video is saved as sim_<sim id>_<name><ext>
+        :param fps: Frames per second of the video
+        :param n_frames_avg: How many rendered images are averaged into each frame, defaults to the number of rendered
+        images divided by fps, as in convert_frames_to_vid
+        :param img_dims: Image dimensions of the video given as height x width, defaults to the rendered resolution
+        :param codec: FourCC code of the video codec
+        :param ext: File extension of the video's container
+        """
+        if len(codec) != 4:
+            raise ValueError("Codec must be a four character code.")
+        if n_frames_avg is not None and n_frames_avg < 1:
+            raise ValueError("Number of frames to average must be at least 1.")
+        if img_dims is not None and len(img_dims) != 2:
+            raise ValueError("Expecting image dimensions given as height x width.")
+        self._name: str = name
+        self._fps: int = fps
+        self._n_frames_avg: Optional[int] = n_frames_avg
+        self._img_dims: Optional[tuple] = (
+            None if img_dims is None else (int(img_dims[0]), int(img_dims[1]))
+        )
+        self._codec: str = codec
+        self._ext: str = ext
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_fps(self) -> int:
+        return self._fps
+
+    def get_n_frames_avg(self, n_rendered_frames: int) -> int:
+        if self._n_frames_avg is not None:
+            return self._n_frames_avg
+        return max(1, int(n_rendered_frames / self._fps))
+
+    def get_img_dims(self) -> Optional[tuple]:
+        return self._img_dims
+
+    def get_codec(self) -> str:
+        return self._codec
+
+    def get_fname(self, sim_id: int) -> str:
+        return f"sim_{sim_id}_{self._name}{self._ext}"
+
+
 class VideoGenerator:
-    def __init__(self, root_dir: Path):
+    def __init__(self, root_dir: Path, n_io_threads: Optional[int] = None):
+        """
+        :param root_dir: Root of the data directory
+        :param n_io_threads: Number of threads reading and writing images, defaults to ThreadPoolExecutor's default
+        """
         self._root_dir: Path = root_dir
+        self._n_io_threads: Optional[int] = n_io_threads
         self._vid_dir: Path = self._root_dir / "videos"
         self._sim_frames_dir: Path = self._root_dir / "frames"
 
-    def _apply_motion_blur(self, n_frames_avg: int, sim_id: int) -> None:
+    def _apply_motion_blur(
+        self, n_frames_avg: int, sim_id: int, blur_mode: str = "full"
+    ) -> None:
         """
         Applies motion blur to the generated video images by averaging images
         :param n_frames_avg: How many images to average
         :param sim_id: The id number of the simulation to which the images correspond
+        :param blur_mode: Average every pixel, "full", or only the changed regions, "dirty_rects"
         """
         logging.info("Blurring frames...")
+        blurred_frames_out_dir: Path = self._make_blurred_frames_dir(sim_id)
+        frame_paths: list = self._rendered_frame_paths(sim_id)
+        blurred_frame_count: int = 0
+        with _ThreadedImageIO(self._n_io_threads) as image_io:
+            for blurred in self._blurred_frames(
+                frame_paths, n_frames_avg, image_io, blur_mode
+            ):
+                fname = (
+                    blurred_frames_out_dir
+                    / f"frame{str(blurred_frame_count).zfill(5)}.jpg"
+                )
+                image_io.imwrite(fname, blurred)
+                logging.info(
+                    f"Saving blurred frame #{str(blurred_frame_count).zfill(5)} to {fname}."
+                )
+                blurred_frame_count += 1
+
+        logging.info(
+            f"{blurred_frame_count} blurred frames  and saved to {blurred_frames_out_dir}."
+        )
+
+    def _make_blurred_frames_dir(self, sim_id: int) -> Path:
         blurred_frames_out_dir: Path = self._sim_frames_dir / f"sim_{sim_id}"
         try:
             blurred_frames_out_dir.mkdir(parents=True, exist_ok=False)
@@ -33,57 +291,133 @@ class VideoGenerator:
             )
         else:
             logging.info(f"Directory {blurred_frames_out_dir} created.")
+        return blurred_frames_out_dir
 
+    def _rendered_frame_paths(self, sim_id: int) -> List[str]:
         sim_rendered_images_dir_path: Path = (
             self._root_dir / "generated_povray" / f"sim_{sim_id}_povray" / "anim"
         )
-        frame_paths: list = glob.glob(
-            f"{str(sim_rendered_images_dir_path)}{os.path.sep}*.jpg"
+        return sorted(
+            glob.glob(f"{str(sim_rendered_images_dir_path)}{os.path.sep}*.jpg")
         )
-        template_img: np.ndarray = cv2.imread(frame_paths[0], 1)
-        averaged_frames: np.ndarray = np.zeros_like(template_img, float)
-        i: int = 0
-        blurred_frame_count: int = 0
 
-        # ToDo: Do this with numpy, will be much faster
-        for f_path in tqdm(frame_paths, desc="Applying motion blur"):
-            frame = cv2.imread(f_path, 1)
-            frame_rbg = frame[..., ::-1].copy()
-            frame_arr = np.array(frame_rbg, dtype=float)
-            averaged_frames += frame_arr / n_frames_avg
-            i += 1
-
-            if i == n_frames_avg:
-                blurred = np.array(np.round(averaged_frames), dtype=np.uint8)
-                blurred = cv2.cvtColor(blurred, cv2.COLOR_BGR2RGB)
+    @staticmethod
+    def _blurred_frames(
+        frame_paths: List[str],
+        n_frames_avg: int,
+        image_io: Optional[_ThreadedImageIO] = None,
+        blur_mode: str = "full",
+        tile_size: int = 16,
+    ) -> Iterator[np.ndarray]:
+        """
+        Averages each consecutive group of n_frames_avg images, any images left over that don't fill a group are
+        dropped. Each group is read into the same buffer and averaged in a single reduction, so memory is bounded by
+        the group size rather than the number of images.
 
-                fname = (
-                    blurred_frames_out_dir
-                    / f"frame{str(blurred_frame_count).zfill(5)}.jpg"
-                )
+        With the dirty_rects blur mode only the regions of each group that differ from a static background plate are
+        averaged, the rest of the court is copied from the plate. Pixels outside of these regions equal the plate in
+        every image of the group so the result is identical to averaging every pixel.
+        :param frame_paths: Paths of the images in order
+        :param n_frames_avg: How many images to average
+        :param image_io: Thread pool to read the images with, images are read serially if None
+        :param blur_mode: Average every pixel, "full", or only the changed regions, "dirty_rects"
+        :param tile_size: Edge length in pixels of the tiles changed regions are made up of
+        :return: Generator of the blurred frames
+        """
+        if blur_mode not in ["full", "dirty_rects"]:
+            raise ValueError("Options for blur mode are: ['full', 'dirty_rects']")
+        if n_frames_avg < 1:
+            raise ValueError("Number of frames to average must be at least 1.")
+        n_groups = len(frame_paths) // n_frames_avg
+        if n_groups == 0:
+            return
 
-                cv2.imwrite(str(fname), blurred)
+        frame_paths = frame_paths[: n_groups * n_frames_avg]
 
-                averaged_frames = np.zeros_like(template_img, float)
-                logging.info(
-                    f"Saved blurred frame #{str(blurred_frame_count).zfill(5)} to {fname}."
-                )
-                i = 0
-                blurred_frame_count += 1
+        def read_frames(paths: List[str]) -> Iterator[np.ndarray]:
+            if image_io is None:
+                return (_ThreadedImageIO._imread(f_path) for f_path in paths)
+            return image_io.imread_ordered(paths)
 
-        logging.info(
-            f"{blurred_frame_count} blurred frames  and saved to {blurred_frames_out_dir}."
+        template_img: np.ndarray = next(read_frames(frame_paths[:1]))
+        group: np.ndarray = np.empty((n_frames_avg, *template_img.shape), np.uint8)
+        # Sums of up to 257 uint8 images fit in 16 bits
+        sum_dtype = (
+            np.uint16 if n_frames_avg * 255 <= np.iinfo(np.uint16).max else np.uint32
         )
+        summed: np.ndarray = np.empty(template_img.shape, sum_dtype)
+        averaged: np.ndarray = np.empty(template_img.shape, np.float32)
+
+        if blur_mode == "dirty_rects":
+            # The court is static so the median of a few images spread over the rendering is the background
+            sample_paths = frame_paths[:: max(1, len(frame_paths) // 9)]
+            background = np.median(np.array(list(read_frames(sample_paths))), axis=0)
+            background = np.rint(background).astype(np.uint8)
+            # Differences are accumulated in a buffer padded to a whole number of tiles
+            height, width, n_channels = template_img.shape
+            n_tile_rows, n_tile_cols = -(-height // tile_size), -(-width // tile_size)
+            padded_changed: np.ndarray = np.zeros(
+                (n_tile_rows * tile_size, n_tile_cols * tile_size, n_channels),
+                np.uint8,
+            )
+            changed: np.ndarray = padded_changed[:height, :width]
+            frame_changed: np.ndarray = np.empty_like(template_img)
+
+        frames = read_frames(frame_paths)
+        for _ in tqdm(range(n_groups), desc="Applying motion blur"):
+            if blur_mode == "full":
+                for j in range(n_frames_avg):
+                    group[j] = next(frames)
+                np.sum(group, axis=0, dtype=sum_dtype, out=summed)
+                np.divide(summed, n_frames_avg, out=averaged)
+                yield np.rint(averaged, out=averaged).astype(np.uint8)
+                continue
+
+            # Only the dirty regions are averaged, so the images don't need copying into the group buffer
+            group_frames = [next(frames) for _ in range(n_frames_avg)]
+            # Tiles where any image in the group differs from the background
+            changed[:] = 0
+            for frame in group_frames:
+                cv2.absdiff(frame, background, dst=frame_changed)
+                cv2.max(changed, frame_changed, dst=changed)
+            # Reducing over the rows of each tile first keeps the reduction over contiguous memory
+            dirty_tiles = np.bitwise_or.reduce(
+                padded_changed.reshape(n_tile_rows, tile_size, -1), axis=1
+            )
+            dirty_tiles = dirty_tiles.reshape(n_tile_rows, n_tile_cols, -1).any(axis=2)
+
+            blurred = background.copy()
+            n_regions, _, stats, _ = cv2.connectedComponentsWithStats(
+                dirty_tiles.view(np.uint8), connectivity=8
+            )
+            # Label 0 is the unchanged background
+            for x, y, w, h, _ in stats[1:n_regions] * tile_size:
+                # Tiles on the bottom and right edges can overhang the padded image
+                h, w = min(h, height - y), min(w, width - x)
+                region_sum = np.zeros((h, w, n_channels), sum_dtype)
+                for frame in group_frames:
+                    region_sum += frame[y : y + h, x : x + w]
+                region_avg = np.divide(region_sum, n_frames_avg, dtype=np.float32)
+                blurred[y : y + h, x : x + w] = np.rint(region_avg).astype(np.uint8)
+            yield blurred
 
     def convert_frames_to_vid(
         self,
         sim_id: int,
         desired_fps: int = 50,
+        *,
+        save_frames: bool = True,
+        max_queue_size: int = 8,
+        blur_mode: str = "full",
     ) -> None:
         """
-        Encode the blurred frames as a .mp4 video and saves it to file
+        Blur the rendered frames and encode them as a .mp4 video, saving it to file. Blurred frames are streamed to the
+        encoder on a background thread as they are averaged rather than read back from disk.
         :param sim_id: The id number of the simulation to which the images correspond
         :param desired_fps: The desired frames per second of the output video
+        :param save_frames: Also save each blurred frame as a JPEG, as _apply_motion_blur does
+        :param max_queue_size: Number of blurred frames that can wait to be encoded before blurring blocks
+        :param blur_mode: Average every pixel, "full", or only the changed regions, "dirty_rects"
         """
         logging.info("Converting blurred frames to video...")
         sim_rendered_images_dir_path: Path = (
@@ -94,36 +428,110 @@ class VideoGenerator:
                 f"Rendered frames from simulation {sim_id} not found."
             )
 
-        # Apply motion blur to frames
-        num_frames: int = len(
-            glob.glob(f"{sim_rendered_images_dir_path}{os.path.sep}*.jpg")
-        )
-        self._apply_motion_blur(int(num_frames / desired_fps), sim_id)
+        frame_paths: List[str] = self._rendered_frame_paths(sim_id)
+        blurred_frames_out_dir: Optional[Path] = None
+        if save_frames:
+            blurred_frames_out_dir = self._make_blurred_frames_dir(sim_id)
+        self._vid_dir.mkdir(parents=True, exist_ok=True)
+        vid_path: Path = self._vid_dir / f"sim_{sim_id}.mp4"
 
-        # Encode blurred frames with a .mp4 encoder
-        blurred_frames_out_dir: Path = self._sim_frames_dir / f"sim_{sim_id}"
-        frame_paths: list = glob.glob(f"{blurred_frames_out_dir}{os.path.sep}*.jpg")
-        img_array: list = [cv2.imread(f_path) for f_path in frame_paths]
-        f_height: int
-        f_width: int
-        f_height, f_width, _ = cv2.imread(frame_paths[0]).shape
-        f_size: tuple = (f_width, f_height)
-        vid_fname: str = f"sim_{sim_id}.mp4"
-
-        writer = cv2.VideoWriter(
-            filename=vid_fname,
-            fourcc=cv2.VideoWriter_fourcc(*"mp4v"),
-            fps=desired_fps,
-            frameSize=f_size,
-        )
+        # Apply motion blur to frames and encode them with a .mp4 encoder
+        with _ThreadedImageIO(self._n_io_threads) as image_io, _QueuedVideoWriter(
+            vid_path, desired_fps, max_queue_size
+        ) as writer:
+            for i, blurred in enumerate(
+                self._blurred_frames(
+                    frame_paths,
+                    int(len(frame_paths) / desired_fps),
+                    image_io,
+                    blur_mode,
+                )
+            ):
+                if blurred_frames_out_dir is not None:
+                    image_io.imwrite(
+                        blurred_frames_out_dir / f"frame{str(i).zfill(5)}.jpg", blurred
+                    )
+                writer.write(blurred)
 
-        for i in tqdm(range(len(img_array)), desc="Encoding video"):
-            logging.info(f"Processing blurred frame #{i}")
-            writer.write(img_array[i])
-        writer.release()
+        logging.info("Converted blurred frames to video.")
 
-        # Move video to data directory
-        vid_path: Path = Path(".") / vid_fname
-        vid_path.rename(self._vid_dir / vid_fname)
+    def convert_frames_to_vids(
+        self,
+        sim_id: int,
+        variants: Sequence[VideoVariant],
+        *,
+        max_queue_size: int = 8,
+    ) -> List[Path]:
+        """
+        Encode several videos, each with its own frame rate, blur window, resolution and codec, from a single pass
+        over the rendered frames. Each rendered image is read once and added to a running sum for every variant, a
+        variant's frame is averaged once its blur window is full and handed to its own encoder thread, which resizes
+        and encodes it. As in _blurred_frames, images left over that don't fill a variant's window are dropped.
+        :param sim_id: The id number of the simulation to which the images correspond
+        :param variants: The videos to encode
+        :param max_queue_size: Number of blurred frames that can wait to be encoded by each variant's encoder
+        :return: Paths of the encoded videos, in the order of the variants
+        """
+        if len(variants) == 0:
+            raise ValueError("At least one video variant must be given.")
+        names = [variant.get_name() for variant in variants]
+        if len(set(names)) != len(names):
+            raise ValueError("Video variant names must be unique.")
+        frame_paths: List[str] = self._rendered_frame_paths(sim_id)
+        if len(frame_paths) == 0:
+            raise FileNotFoundError(
+                f"Rendered frames from simulation {sim_id} not found."
+            )
 
-        logging.info("Converted blurred frames to video.")
+        logging.info(f"Converting rendered frames to {len(variants)} videos...")
+        self._vid_dir.mkdir(parents=True, exist_ok=True)
+        vid_paths: List[Path] = [
+            self._vid_dir / variant.get_fname(sim_id) for variant in variants
+        ]
+        windows: List[int] = [
+            variant.get_n_frames_avg(len(frame_paths)) for variant in variants
+        ]
+        # Sums of up to 257 uint8 images fit in 16 bits
+        sum_dtypes = [
+            np.uint16 if n * 255 <= np.iinfo(np.uint16).max else np.uint32
+            for n in windows
+        ]
+        sums: List[Optional[np.ndarray]] = [None] * len(variants)
+
+        # Every writer is closed, finishing its video, even if another fails
+        with ExitStack() as stack:
+            writers: List[_QueuedVideoWriter] = [
+                stack.enter_context(
+                    _QueuedVideoWriter(
+                        vid_path,
+                        variant.get_fps(),
+                        max_queue_size,
+                        variant.get_codec(),
+                        variant.get_img_dims(),
+                    )
+                )
+                for variant, vid_path in zip(variants, vid_paths)
+            ]
+            image_io = stack.enter_context(_ThreadedImageIO(self._n_io_threads))
+            frames = image_io.imread_ordered(frame_paths)
+            for i, frame in enumerate(
+                tqdm(frames, total=len(frame_paths), desc="Encoding videos")
+            ):
+                for j, n_frames_avg in enumerate(windows):
+                    if i % n_frames_avg == 0:
+                        # Images left over that don't fill a window are skipped
+                        if i + n_frames_avg > len(frame_paths):
+                            continue
+                        sums[j] = frame.astype(sum_dtypes[j])
+                    elif sums[j] is None:
+                        continue
+                    else:
+                        np.add(sums[j], frame, out=sums[j])
+
+                    if i % n_frames_avg == n_frames_avg - 1:
+                        averaged = np.divide(sums[j], n_frames_avg, dtype=np.float32)
+                        writers[j].write(np.rint(averaged).astype(np.uint8))
+                        sums[j] = None
+
+        logging.info(f"Converted rendered frames to {len(variants)} videos.")
+        return vid_paths
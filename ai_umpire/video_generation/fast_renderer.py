@@ -0,0 +1,296 @@
+__all__ = ["FastRenderer"]
+
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from ai_umpire.util.camera import Camera
+from ai_umpire.util.field_constants import (
+    BACK_WALL_OUT_LINE_HEIGHT,
+    FRONT_WALL_OUT_LINE_HEIGHT,
+    HALF_COURT_LENGTH,
+    HALF_COURT_WIDTH,
+    PLAYER_HEIGHT,
+    SERVICE_LINE_HEIGHT,
+    TIN_HEIGHT,
+    WALL_HEIGHT,
+)
+from ai_umpire.video_generation.data_gen import _QueuedVideoWriter
+
+# BGR colours of the court, ball and players, close to the POV-Ray textures
+FLOOR_COLOUR: Tuple[int, int, int] = (35, 65, 100)
+FRONT_WALL_COLOUR: Tuple[int, int, int] = (150, 150, 150)
+SIDE_WALL_COLOUR: Tuple[int, int, int] = (95, 95, 95)
+BACKGROUND_COLOUR: Tuple[int, int, int] = (51, 51, 51)
+LINE_COLOUR: Tuple[int, int, int] = (60, 20, 220)
+TIN_COLOUR: Tuple[int, int, int] = (60, 20, 170)
+BALL_COLOUR: Tuple[int, int, int] = (255, 255, 255)
+PLAYER_COLOURS: List[Tuple[int, int, int]] = [(0, 140, 255), (160, 50, 130)]
+
+# Radius of the ball simulated by MatchSimulator and player box sizes as width, height and depth, in meters
+BALL_RADIUS: float = 0.04
+PLAYER_BOX_SIZES: List[Tuple[float, float, float]] = [
+    (0.5, PLAYER_HEIGHT, 0.4),
+    (0.4, PLAYER_HEIGHT - 0.3, 0.4),
+]
+
+# Sub-pixel precision of the drawn ball, see cv2.circle
+_SHIFT: int = 4
+
+
+class FastRenderer:
+    """
+    Renders synthetic videos of simulated rallies without POV-Ray, by projecting the ball and player trajectories with
+    the camera model and drawing them onto a court background image, which is drawn once and cached. Each frame is the
+    average of n_frames_avg simulation steps, as with VideoGenerator's motion blur, but only the region of the frame
+    the ball and players cover during those steps is averaged.
+    """
+
+    def __init__(
+        self,
+        img_dims: Sequence[int] = (720, 1280),
+        camera: Optional[Camera] = None,
+        background: Optional[np.ndarray] = None,
+    ):
+        """
+        :param img_dims: Image dimensions given as height x width, as OpenCV loaded images are
+        :param camera: Camera the court is filmed with, defaults to the POV-Ray camera
+        :param background: Image of the empty court to draw onto, e.g. a POV-Ray render, defaults to a drawn court
+        """
+        self._camera: Camera = Camera(img_dims) if camera is None else camera
+        self._img_dims: tuple = self._camera.get_img_dims()
+        if background is None:
+            background = self._draw_court()
+        elif background.shape[:2] != self._img_dims:
+            raise ValueError("Background image dimensions must match the camera's.")
+        self._background: np.ndarray = background
+
+    def _project(self, points_wc: Sequence[Sequence[float]]) -> np.ndarray:
+        return self._camera.wc_to_ic(np.asarray(points_wc, dtype=float))
+
+    def _draw_court(self) -> np.ndarray:
+        court = np.full((*self._img_dims, 3), BACKGROUND_COLOUR, dtype=np.uint8)
+        w, ln = HALF_COURT_WIDTH, HALF_COURT_LENGTH
+        # Line thickness scales with the resolution
+        thickness = max(1, round(self._img_dims[0] / 240))
+
+        def fill(points_wc, colour):
+            cv2.fillPoly(
+                court, [np.round(self._project(points_wc)).astype(np.int32)], colour
+            )
+
+        def line(start_wc, end_wc):
+            start, end = np.round(self._project([start_wc, end_wc])).astype(int)
+            cv2.line(court, tuple(start), tuple(end), LINE_COLOUR, thickness)
+
+        fill([[-w, 0, -ln], [w, 0, -ln], [w, 0, ln], [-w, 0, ln]], FLOOR_COLOUR)
+        for x in [-w, w]:
+            fill(
+                [[x, 0, -ln], [x, 0, ln], [x, WALL_HEIGHT, ln], [x, WALL_HEIGHT, -ln]],
+                SIDE_WALL_COLOUR,
+            )
+        fill(
+            [[-w, 0, ln], [w, 0, ln], [w, WALL_HEIGHT, ln], [-w, WALL_HEIGHT, ln]],
+            FRONT_WALL_COLOUR,
+        )
+        fill(
+            [[-w, 0, ln], [w, 0, ln], [w, TIN_HEIGHT, ln], [-w, TIN_HEIGHT, ln]],
+            TIN_COLOUR,
+        )
+
+        # Front wall and side wall out lines, and the service line
+        line([-w, FRONT_WALL_OUT_LINE_HEIGHT, ln], [w, FRONT_WALL_OUT_LINE_HEIGHT, ln])
+        line([-w, SERVICE_LINE_HEIGHT, ln], [w, SERVICE_LINE_HEIGHT, ln])
+        for x in [-w, w]:
+            line(
+                [x, BACK_WALL_OUT_LINE_HEIGHT, -ln], [x, FRONT_WALL_OUT_LINE_HEIGHT, ln]
+            )
+
+        # Short line, half-court line and service boxes on the floor
+        short_z, box_sz, box_x = -0.615, 1.6, 1.525
+        line([-w, 0, short_z], [w, 0, short_z])
+        line([0, 0, short_z], [0, 0, -ln])
+        for x_sign in [-1, 1]:
+            line([x_sign * box_x, 0, short_z], [x_sign * box_x, 0, short_z - box_sz])
+            line(
+                [x_sign * box_x, 0, short_z - box_sz], [x_sign * w, 0, short_z - box_sz]
+            )
+        return court
+
+    def _ball_shape(self, pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Projected centres and radii of the ball, the radius is the projection of a horizontal offset
+        centres = self._project(pos)
+        edges = self._project(pos + np.array([BALL_RADIUS, 0.0, 0.0]))
+        return centres, np.linalg.norm(edges - centres, axis=1)
+
+    def _player_hulls(self, pos: np.ndarray, box_sz: Sequence[float]) -> np.ndarray:
+        # Projections of the corners of each player's box, shape (N, 8, 2)
+        w, h, d = box_sz
+        offsets = np.array(
+            [
+                [x, y, z]
+                for x in [-w / 2, w / 2]
+                for y in [-h / 2, h / 2]
+                for z in [-d / 2, d / 2]
+            ]
+        )
+        corners = pos[:, None, :] + offsets[None]
+        return self._project(corners.reshape(-1, 3)).reshape(-1, 8, 2)
+
+    def render_frames(
+        self,
+        ball_pos: np.ndarray,
+        players_pos: Sequence[np.ndarray] = (),
+        n_frames_avg: int = 8,
+    ) -> Iterator[np.ndarray]:
+        """
+        Render the motion blurred frames of a rally, any simulation steps left over that don't fill a frame are dropped
+        :param ball_pos: (N, 3) array of the ball position at each simulation step
+        :param players_pos: (N, 3) arrays of the centre of each player's box at each simulation step
+        :param n_frames_avg: How many simulation steps are averaged into each frame
+        :return: Generator of the frames
+        """
+        if n_frames_avg < 1:
+            raise ValueError("Number of frames to average must be at least 1.")
+        if len(players_pos) > len(PLAYER_BOX_SIZES):
+            raise ValueError(f"At most {len(PLAYER_BOX_SIZES)} players can be drawn.")
+        ball_pos = np.asarray(ball_pos, dtype=float)
+        players_pos = [np.asarray(pos, dtype=float) for pos in players_pos]
+        if any(pos.shape != ball_pos.shape for pos in players_pos):
+            raise ValueError("Expecting a player position for every ball position.")
+        n_frames = ball_pos.shape[0] // n_frames_avg
+
+        # Everything is projected at once, then drawn in depth order with the furthest first
+        ball_centres, ball_radii = self._ball_shape(ball_pos)
+        player_hulls = [
+            self._player_hulls(pos, box_sz)
+            for pos, box_sz in zip(players_pos, PLAYER_BOX_SIZES)
+        ]
+        depths = np.array([ball_pos[:, 2]] + [pos[:, 2] for pos in players_pos])
+        height, width = self._img_dims
+
+        for i in range(n_frames):
+            steps = slice(i * n_frames_avg, (i + 1) * n_frames_avg)
+            # Region the ball and players cover during the frame, clipped to the image
+            covered = np.concatenate(
+                [
+                    ball_centres[steps] - ball_radii[steps, None] - 1,
+                    ball_centres[steps] + ball_radii[steps, None] + 1,
+                ]
+                + [hulls[steps].reshape(-1, 2) for hulls in player_hulls]
+            )
+            img_size = np.array([width, height])
+            x0, y0 = np.clip(np.floor(covered.min(axis=0)), 0, img_size).astype(int)
+            x1, y1 = np.clip(np.ceil(covered.max(axis=0)) + 1, 0, img_size).astype(int)
+
+            frame = self._background.copy()
+            if x1 <= x0 or y1 <= y0:
+                yield frame
+                continue
+
+            roi_background = self._background[y0:y1, x0:x1]
+            summed = np.zeros(roi_background.shape, np.uint32)
+            origin = np.array([x0, y0])
+            for step in range(steps.start, steps.stop):
+                sub_frame = roi_background.copy()
+                for obj in np.argsort(-depths[:, step], kind="stable"):
+                    if obj == 0:
+                        centre = np.round((ball_centres[step] - origin) * (1 << _SHIFT))
+                        cv2.circle(
+                            sub_frame,
+                            tuple(centre.astype(int)),
+                            int(round(ball_radii[step] * (1 << _SHIFT))),
+                            BALL_COLOUR,
+                            -1,
+                            cv2.LINE_AA,
+                            _SHIFT,
+                        )
+                    else:
+                        hull = cv2.convexHull(
+                            np.round(player_hulls[obj - 1][step] - origin).astype(
+                                np.int32
+                            )
+                        )
+                        cv2.fillConvexPoly(sub_frame, hull, PLAYER_COLOURS[obj - 1])
+                summed += sub_frame
+            frame[y0:y1, x0:x1] = np.rint(
+                np.divide(summed, n_frames_avg, dtype=np.float32)
+            ).astype(np.uint8)
+            yield frame
+
+    def render_video(
+        self,
+        vid_path: Path,
+        ball_pos: np.ndarray,
+        players_pos: Sequence[np.ndarray] = (),
+        fps: int = 50,
+        n_frames_avg: Optional[int] = None,
+        codec: str = "mp4v",
+    ) -> int:
+        """
+        Render a rally and encode it as a video
+        :param vid_path: Path of the video
+        :param ball_pos: (N, 3) array of the ball position at each simulation step
+        :param players_pos: (N, 3) arrays of the centre of each player's box at each simulation step
+        :param fps: Frames per second of the video
+        :param n_frames_avg: How many simulation steps are averaged into each frame, defaults to the number of steps
+        divided by fps, as in VideoGenerator.convert_frames_to_vid
+        :param codec: FourCC code of the video codec
+        :return: The number of frames encoded
+        """
+        if n_frames_avg is None:
+            n_frames_avg = max(1, int(len(ball_pos) / fps))
+        vid_path = Path(vid_path)
+        vid_path.parent.mkdir(parents=True, exist_ok=True)
+        n_frames = 0
+        with _QueuedVideoWriter(vid_path, fps, codec=codec) as writer:
+            for frame in tqdm(
+                self.render_frames(ball_pos, players_pos, n_frames_avg),
+                total=len(ball_pos) // n_frames_avg,
+                desc="Rendering frames",
+            ):
+                writer.write(frame)
+                n_frames += 1
+        logging.info(f"Rendered {n_frames} frames to {vid_path}.")
+        return n_frames
+
+    def render_sim(self, root: Path, sim_id: int, fps: int = 50) -> Path:
+        """
+        Render the video of a simulation from its exported ball positions, e.g. those of MatchSimulator or
+        BallisticSimulator, saving it where VideoGenerator would. The players are drawn from their exported positions
+        if there are any, as MatchSimulator exports to player_pos/sim_<sim id>_player_<player number>.csv.
+        :param root: Root of the data directory
+        :param sim_id: The id number of the simulation
+        :param fps: Frames per second of the video
+        :return: Path of the video
+        """
+        ball_pos_path = Path(root) / "ball_pos" / f"sim_{sim_id}.csv"
+        if not ball_pos_path.exists():
+            raise FileNotFoundError(f"Ball positions of simulation {sim_id} not found.")
+        ball_pos = pd.DataFrame(pd.read_csv(ball_pos_path), columns=["x", "y", "z"])
+
+        players_pos = []
+        for player_num in range(1, len(PLAYER_BOX_SIZES) + 1):
+            player_pos_path = (
+                Path(root) / "player_pos" / f"sim_{sim_id}_player_{player_num}.csv"
+            )
+            if player_pos_path.exists():
+                player_pos = pd.DataFrame(
+                    pd.read_csv(player_pos_path), columns=["x", "y", "z"]
+                )
+                players_pos.append(player_pos.to_numpy())
+
+        vid_path = Path(root) / "videos" / f"sim_{sim_id}.mp4"
+        self.render_video(vid_path, ball_pos.to_numpy(), players_pos, fps=fps)
+        return vid_path
+
+    def get_background(self) -> np.ndarray:
+        return self._background
+
+    def get_camera(self) -> Camera:
+        return self._camera
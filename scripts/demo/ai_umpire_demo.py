@@ -18,12 +18,8 @@ from ai_umpire import (
 )
 from ai_umpire.util import (
     extract_frames_from_vid,
-    HALF_COURT_WIDTH,
-    HALF_COURT_LENGTH,
-    WALL_HEIGHT,
-    calibrate_camera,
-    SinglePosStore,
-    FourCoordsStore,
+    load_calibration,
+    back_project_ic_to_wc,
 )
 
 ROOT_DIR_PATH: Path = Path("C:\\Users\\david\\Data\\AI Umpire DS")
@@ -35,15 +31,6 @@ DESIRED_FPS: int = 50
 N_FRAMES_TO_AVERAGE: int = int(N_RENDERED_IMAGES / DESIRED_FPS)
 START_X_POS: List[int] = [-2, -1, 0, 1]
 START_Z_POS: List[int] = [-2, -1, 0, 1]
-FRONT_WALL_WORLD_COORDS: np.ndarray = np.array(
-    [
-        [-HALF_COURT_WIDTH, WALL_HEIGHT, HALF_COURT_LENGTH],  # Front-Wall Top Left
-        [-HALF_COURT_WIDTH, 0, HALF_COURT_LENGTH],  # Front-Wall Bottom Left
-        [HALF_COURT_WIDTH, WALL_HEIGHT, HALF_COURT_LENGTH],  # Front-Wall Top Right
-        [HALF_COURT_WIDTH, 0, HALF_COURT_LENGTH],  # Front-Wall Bottom Right
-    ],
-    dtype="float32",
-)
 
 if __name__ == "__main__":
     random.seed(1234)
@@ -86,33 +73,10 @@ if __name__ == "__main__":
         vid_gen = VideoGenerator(root_dir=ROOT_DIR_PATH)
         vid_gen.convert_frames_to_vid(SIM_ID, DESIRED_FPS)
 
-    # Manually initialise the initial ball position, this will be used for detection filtering and Kalman initialisation
-    # Load first frame of video, so we can get 4 points to approximate the inverse of the camera matrix
     frames = extract_frames_from_vid(video_file)
-    first_frame = frames[0].copy()
-    first_frame_grey = np.mean(first_frame, -1)
-    click_store = SinglePosStore(first_frame)
-    cv.namedWindow("First Frame")
-    cv.setMouseCallback("First Frame", click_store.img_clicked)
-
-    print(
-        "Click the ball, since it is a streak, click on the end of the streak you believe to be the leading end."
-    )
-
-    while True:
-        # Display the first frame and wait for a keypress
-        cv.imshow("First Frame", first_frame)
-        key = cv.waitKey(1) & 0xFF
-
-        # Press esc to exit or once clicked, exit
-        if key == 27 or click_store.click_pos() is not None:
-            break
-    cv.destroyAllWindows()
-
-    print(f"Initial ball position set to {click_store.click_pos()}")
 
-    # Get filtered detections from ball detector
-    first_frame_ball_pos = click_store.click_pos()
+    # Get filtered detections from ball detector, the ball is found in the first frame automatically and only needs to
+    # be clicked on if the detector isn't confident, this will be used for detection filtering and Kalman initialisation
     detector = BallDetector(root_dir=ROOT_DIR_PATH)
     measurements = detector.get_filtered_ball_detections(
         sim_id=SIM_ID,
@@ -125,62 +89,25 @@ if __name__ == "__main__":
         binary_thresh=130,
         struc_el_shape=cv.MORPH_RECT,
         disable_progbar=False,
-        init_ball_pos=first_frame_ball_pos,
         min_ball_travel_dist=5,
         max_ball_travel_dist=130,
         min_det_area=1.0,
         max_det_area=40.0,
     )
+    print(
+        f"Initial ball position set to {detector.get_init_ball_pos()}, "
+        f"confidence={detector.get_init_ball_pos_confidence():.2f}"
+    )
     print(f"Measurements: shape={measurements.shape}, measurements: \n{measurements}")
 
     plt.imshow(cv.cvtColor(frames[0], cv.COLOR_BGR2RGB))
     plt.scatter(measurements[:, 0], measurements[:, 1], s=measurements[:, 2] * 2)
     plt.show()
 
-    # Camera calibration: obtain the coordinates of the 4 corners of the front wall which
-    # will be used to derive the inverse of camera projection matrix for 2D->3D
-    coords_store = FourCoordsStore(first_frame)
-    cv.namedWindow("First Frame")
-    cv.setMouseCallback("First Frame", coords_store.img_clicked)
-
-    print(
-        "Double-Click on the corners of the Front-Wall in this order: Top-Left -> Bottom-Left -> "
-        "Top-Right -> Bottom-Right"
-    )
-
-    while True:
-        # Display the image and wait for wither exit via escape key or 4 coordinates clicked
-        cv.imshow("First Frame", first_frame)
-        key = cv.waitKey(1) & 0xFF
-
-        if key == ord("c") or coords_store.click_pos().shape[0] == 4:
-            break
-    cv.destroyAllWindows()
-
-    front_wall_image_coords = coords_store.click_pos()
-
-    print(
-        f"""Image coordinates of the four corners of the Front-Wall set to:
-    Top-Left     = {front_wall_image_coords[0]} 
-    Bottom-Left  = {front_wall_image_coords[1]} 
-    Top-Right    = {front_wall_image_coords[2]}
-    Bottom-Right = {front_wall_image_coords[3]}"""
-    )
-
-    # Derive projection matrix using 4 known image coordinates and their corresponding world coordinates
-    cam_intrinsics, rot_mtx, t_vec = calibrate_camera(
-        FRONT_WALL_WORLD_COORDS, front_wall_image_coords, first_frame_grey.shape
-    )
-
-    # Calculate inverse of intrinsics matrix, simplest case, no skew and distortion = 1
-    cam_intrinsics_inv = np.identity(3)
-    cam_intrinsics_inv[-1, -1] = cam_intrinsics[0, 0]
-    cam_intrinsics_inv[0, -1] = -cam_intrinsics[0, -1]
-    cam_intrinsics_inv[1, -1] = -cam_intrinsics[1, -1]
-    cam_intrinsics_inv = (1 / cam_intrinsics[0, 0]) * cam_intrinsics_inv
-
-    # Calculate the inverse of the rotation matrix
-    rot_mtx_inv = np.linalg.inv(rot_mtx)
+    # Camera calibration, only asks for the front wall to be clicked on if the video hasn't been calibrated before.
+    # The reference points are the ends of the front wall's out line and service line, FRONT_WALL_WORLD_COORDS, rather
+    # than the front wall's corners this demo used to ask for.
+    camera_params = load_calibration(video_file).get_camera_params()
 
     # # Get true ball positions (output at time of simulation data exporting)
     BALL_POS_TRUE = ROOT_DIR_PATH / "ball_pos" / f"sim_{SIM_ID}.csv"
@@ -195,25 +122,12 @@ if __name__ == "__main__":
     y = ball_pos_frames_WC["y"]
     z = ball_pos_frames_WC["z"]
 
-    # Convert detections_IC from image coordinates to world coordinates for KF
-    cam_x, cam_y = cam_intrinsics[0, -1], cam_intrinsics[1, -1]
-    measurements_WC = []
-    for i, m in enumerate(measurements):
-        print(f"Measurement #{i}".ljust(40, "-"))
-        # Calculate the point to line transformation, given by:
-        # w . [rot_mtx.T] [cam_intrinsics^-1] [x, y, 1].T - [rot_mtx^-1] [t_vec]
-        w = 1  # Typical to use 1 or the distance from the camera to the point, our z surrogate in this case
-        xy_homog = np.reshape(np.append(m[:-1], 1), (3, 1))
-        m_WC = w * rot_mtx.T @ cam_intrinsics_inv @ xy_homog - rot_mtx_inv @ t_vec
-
-        # ToDo: Z needs to be normalised to court depth range
-
-        measurements_WC.append([m_WC[0].item(), m_WC[1].item(), m[2]])
-        # print(f"In IC: shape={m.shape} \n{m}")
-        # print(f"In WC: shape={m_WC.shape} \n{m_WC}")
-        # print(f"True WC: \n{[x[i], y[i], z[i]]}")
-
-    measurements_WC = np.array(measurements_WC).squeeze()
+    # Convert detections_IC from image coordinates to world coordinates for KF, w is typically 1 or the distance from
+    # the camera to the point, our z surrogate in this case
+    # ToDo: Z needs to be normalised to court depth range
+    measurements_WC = back_project_ic_to_wc(
+        measurements, camera_params=camera_params, w=1
+    )
     print(f"Measurements WC, shape={measurements_WC.shape} \n{measurements_WC}")
 
     rng = np.random.default_rng(111)
@@ -224,12 +138,11 @@ if __name__ == "__main__":
     #     0, 0.02, size=(detections_IC.shape[0], 3)
     # )
 
-    # Convert manually selected ball position to world coordinates so we can initialise KF with it
-    init_ball_pos = click_store.click_pos()
-    init_ball_pos_homog = np.reshape(np.append(init_ball_pos, 1), (3, 1))
-    init_mu_WC = (
-        1 * rot_mtx.T @ cam_intrinsics_inv @ init_ball_pos_homog - rot_mtx_inv @ t_vec
-    )
+    # Convert the initial ball position to world coordinates so we can initialise KF with it
+    init_ball_pos = detector.get_init_ball_pos()
+    init_mu_WC = back_project_ic_to_wc(
+        np.array([init_ball_pos], dtype=float), camera_params=camera_params
+    ).reshape((3, 1))
     init_mu_WC[-1] = 0
     print(f"Init mu: {init_mu_WC}")
 
@@ -1,7 +1,7 @@
 """
 Evaluates the performance of the ball detector
 """
-import math
+
 from pathlib import Path
 
 import cv2 as cv
@@ -11,7 +11,7 @@ from matplotlib import pyplot as plt
 
 from ai_umpire import BallDetector
 from ai_umpire.util import (
-    wc_to_ic,
+    Camera,
     load_sim_ball_pos,
 )
 
@@ -26,6 +26,7 @@ N_FRAMES_TO_AVG = int(N_RENDERED_FRAMES / DESIRED_FPS)
 plt.rcParams["figure.figsize"] = (8, 4.5)
 
 if __name__ == "__main__":
+    camera = Camera([720, 1280])
     for i in range(4):
         # Generate video from simulation frames if it does not already exist
         video_fname: str = f"sim_{i}.mp4"
@@ -55,21 +56,12 @@ if __name__ == "__main__":
         ball_pos_true = load_sim_ball_pos(i, ROOT_DIR_PATH, N_FRAMES_TO_AVG)
 
         # Obtain true ball positions in image space
-        euclid_dists = []
-        true_ball_pos_IC = []
-        for j in range(len(filtered_dets)):
-            ball_x_ic, ball_y_ic = wc_to_ic(
-                ball_pos_true[j],
-                [720, 1280],
+        true_ball_pos_IC = camera.wc_to_ic(ball_pos_true[: len(filtered_dets)])
+        euclid_dists = list(
+            np.linalg.norm(
+                true_ball_pos_IC - np.array(filtered_dets)[:, :2].astype(float), axis=1
             )
-
-            true_ball_pos_IC.append((ball_x_ic, ball_y_ic, ball_pos_true[i][2]))
-
-            dist_to_true = math.sqrt(
-                ((ball_x_ic - filtered_dets[j][0]) ** 2)
-                + ((ball_y_ic - filtered_dets[j][1]) ** 2)
-            )
-            euclid_dists.append(dist_to_true)
+        )
 
         # Plot true ball pos and filtered detections
         first_frame = cv.imread(
@@ -79,8 +71,8 @@ if __name__ == "__main__":
 
         # Visualise detection performance
         plt.plot(
-            [x for x, y, z in true_ball_pos_IC],
-            [y for _, y, _ in true_ball_pos_IC],
+            true_ball_pos_IC[:, 0],
+            true_ball_pos_IC[:, 1],
             label="Ball True",
             color="green",
         )
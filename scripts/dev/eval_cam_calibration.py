@@ -1,7 +1,6 @@
 """
 Evaluates the performance of the camera calibration phase and, necessarily, the approximated homography
 """
-import math
 from pathlib import Path
 
 import numpy as np
@@ -9,6 +8,9 @@ from matplotlib import pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
 from ai_umpire.util import (
+    Camera,
+    back_project_ic_to_wc,
+    reprojection_error,
     extract_frames_from_vid,
     plot_bb,
     FIELD_BOUNDING_BOXES,
@@ -17,11 +19,7 @@ from ai_umpire.util import (
     SERVICE_LINE_HEIGHT,
     FRONT_WALL_OUT_LINE_HEIGHT,
 )
-from ai_umpire.util.util import (
-    wc_to_ic,
-    approximate_homography,
-    load_sim_ball_pos,
-)
+from ai_umpire.util import approximate_homography, load_sim_ball_pos
 
 ROOT_DIR_PATH: Path = Path() / "data"
 SIM_ID: int = 0
@@ -67,37 +65,18 @@ if __name__ == "__main__":
     frames = extract_frames_from_vid(video_file_path, disable_progbar=True)
     first_frame = frames[0].copy()
 
-    h = approximate_homography(video_path=video_file_path)
-
-    gt_reprojected = []
-    # det_projected = []
-    gt_reproj_mean_error = 0.0
-    # det_proj_mean_error = 0.0
-    for i in range(ball_pos_true.shape[0]):
-        # Project true ball positions from world coordinates to image coordinates
-        gt_pos_wc = ball_pos_true[i]
-        gt_pos_ic = wc_to_ic(gt_pos_wc, list(first_frame.shape[:-1]))
-        gt_xy_homog = np.reshape(np.append(gt_pos_ic, 1), (3, 1))
-
-        scale = 5  # Scale constant for homography
-
-        # OpenCV homography on true pos
-        reproj_pt = h @ gt_xy_homog
-        reproj_pt /= reproj_pt[-1]
-        reproj_pt *= scale
-        reproj_pt[-1] = gt_pos_wc[-1]
-
-        # Calculate error in projection/reprojection
-        reproj_error = math.sqrt(
-            ((gt_pos_wc[0] - reproj_pt[0]) ** 2)
-            + ((gt_pos_wc[1] - reproj_pt[1]) ** 2)
-            + ((gt_pos_wc[2] - reproj_pt[2]) ** 2)
-        )
+    h = approximate_homography(video_path=video_file_path, automatic=True)
 
-        gt_reprojected.append(reproj_pt)
-        gt_reproj_mean_error += reproj_error / ball_pos_true.shape[0]
+    # Project true ball positions from world coordinates to image coordinates
+    gt_pos_ic_all = Camera(first_frame.shape[:-1]).wc_to_ic(ball_pos_true)
 
-    gt_reprojected = np.array(gt_reprojected).squeeze()
+    # OpenCV homography on true pos, keeping the true z as the homography only recovers the front wall plane
+    scale = 5  # Scale constant for homography
+    gt_pos_ic_z = np.c_[gt_pos_ic_all, ball_pos_true[:, 2]]
+    gt_reprojected = back_project_ic_to_wc(gt_pos_ic_z, homography=h, scale=scale)
+    gt_reproj_mean_error = reprojection_error(
+        ball_pos_true, gt_pos_ic_z, homography=h, scale=scale
+    ).mean()
 
     print(f"GTs reprojection error = {gt_reproj_mean_error:.2f}m")
 
@@ -3,9 +3,10 @@ Evaluates the performance of the trajectory interpretation process
 """
 from pathlib import Path
 
+import cv2 as cv
 import numpy as np
 
-from ai_umpire import KalmanFilter, TrajectoryInterpreter
+from ai_umpire import BallDetector, KalmanFilter, TrajectoryInterpreter
 from ai_umpire.util import load_sim_ball_pos, approximate_homography, get_init_ball_pos
 
 ROOT_DIR_PATH = Path() / "data"
@@ -28,9 +29,26 @@ if __name__ == "__main__":
             0, 0.05, size=(ball_pos_true.shape[0], 3)
         )
 
-        # Obtain initial ball position (will be in image coords) and project into world coords
-        init_ball_pos_ic = get_init_ball_pos(vid_dir_path, vid_fname)
-        h = approximate_homography(video_path=vid_dir_path / vid_fname)
+        # Obtain initial ball position (will be in image coords) and project into world coords, the ball is found
+        # automatically so evaluation can run unattended, only asking for a click if it can't be found confidently
+        detector = BallDetector(root_dir=ROOT_DIR_PATH)
+        all_detections = detector.get_ball_detections(
+            vid_fname=vid_fname,
+            morph_op="close",
+            morph_op_iters=11,
+            morph_op_se_shape=(2, 2),
+            struc_el=cv.MORPH_RECT,
+            blur_kernel_size=(31, 31),
+            blur_sigma=3,
+            binary_thresh=130,
+            disable_progbar=True,
+        )
+        init_ball_pos_ic, confidence = detector.seed_init_ball_pos(
+            all_detections, min_det_area=1.0, max_det_area=40.0
+        )
+        if init_ball_pos_ic is None or confidence < 0.4:
+            init_ball_pos_ic = get_init_ball_pos(vid_dir_path, vid_fname)
+        h = approximate_homography(video_path=vid_dir_path / vid_fname, automatic=True)
         init_ball_pos_ic_homog = np.reshape(np.append(init_ball_pos_ic, 1), (3, 1))
         init_ball_pos_wc = h @ init_ball_pos_ic_homog
         init_ball_pos_wc /= init_ball_pos_wc[-1]
@@ -8,11 +8,10 @@ from typing import List
 import cv2 as cv
 import numpy as np
 import pandas as pd
-import pychrono as chrono
 from matplotlib import pyplot as plt
 
-from ai_umpire import MatchSimulator, VideoGenerator
-from ai_umpire.util import wc_to_ic
+from ai_umpire import SimScenario, VideoGenerator, run_scenarios
+from ai_umpire.util import Camera
 
 ROOT_DIR_PATH: Path = Path() / "data"
 SIM_LENGTH: float = 2.0
@@ -28,67 +27,55 @@ plt.rcParams["figure.figsize"] = (8, 4.5)
 if __name__ == "__main__":
     # Define starting positions and velocities of players and ball for each simulation and therefore video
     ball_start_positions = [
-        chrono.ChVectorD(-1.0, 0.5, -4.5),
-        chrono.ChVectorD(2.8, 0.2, -4.0),
-        chrono.ChVectorD(3.0, 0.15, -4.0),
-        chrono.ChVectorD(3.0, 0.15, -4.0),
-    ]
-    ball_start_velocities = [
-        chrono.ChVectorD(1, 9, 14),
-        chrono.ChVectorD(-5, 8, 20),
-        chrono.ChVectorD(0, 11, 23),
-        chrono.ChVectorD(0, 4, 11),
-    ]
-    ball_start_accelerations = [
-        chrono.ChVectorD(-1, 2, 3),
-        chrono.ChVectorD(-2, 4, 5),
-        chrono.ChVectorD(0, 4, 5),
-        chrono.ChVectorD(0, 3, 3),
+        (-1.0, 0.5, -4.5),
+        (2.8, 0.2, -4.0),
+        (3.0, 0.15, -4.0),
+        (3.0, 0.15, -4.0),
     ]
+    ball_start_velocities = [(1, 9, 14), (-5, 8, 20), (0, 11, 23), (0, 4, 11)]
+    ball_start_accelerations = [(-1, 2, 3), (-2, 4, 5), (0, 4, 5), (0, 3, 3)]
 
     p1_start_xy = [(-2.5, 1.0), (2.0, -4.5), (-1.5, 1.8), (-1.5, 1.8)]
     p1_start_velocities = [
-        chrono.ChVectorD(1.0, 0.0, -1.5),
-        chrono.ChVectorD(-2.5, 0.0, 2.0),
-        chrono.ChVectorD(2.0, 0.0, -1.5),
-        chrono.ChVectorD(2.0, 0.0, -1.5),
+        (1.0, 0.0, -1.5),
+        (-2.5, 0.0, 2.0),
+        (2.0, 0.0, -1.5),
+        (2.0, 0.0, -1.5),
     ]
 
     p2_start_xy = [(2.5, -4.0), (0.0, -1.5), (2.0, -3.5), (2.0, -3.5)]
     p2_start_velocities = [
-        chrono.ChVectorD(-1.0, 0.0, 1.5),
-        chrono.ChVectorD(-2.0, 0.0, -2.0),
-        chrono.ChVectorD(-1.5, 0.0, 2.0),
-        chrono.ChVectorD(-1.5, 0.0, 2.0),
+        (-1.0, 0.0, 1.5),
+        (-2.0, 0.0, -2.0),
+        (-1.5, 0.0, 2.0),
+        (-1.5, 0.0, 2.0),
     ]
 
-    # Run simulations
-    for i in range(4):
-        # Check that no simulation data has be stored for this sim id
-        pov_data_file = ROOT_DIR_PATH / "generated_povray" / f"sim_{i}_povray"
-        if pov_data_file.exists():
-            raise FileExistsError(
-                f"Simulation ID {i} already has simulation data generated."
-            )
-
-        # Run simulation
-        sim = MatchSimulator(
+    # Run simulations in parallel, simulations which have already been exported are skipped
+    scenarios = [
+        SimScenario(
             sim_id=i,
-            root=ROOT_DIR_PATH,
-            sim_step_sz=SIM_STEP_SIZE,
             ball_init_pos=ball_start_positions[i],
             ball_vel=ball_start_velocities[i],
             ball_acc=ball_start_accelerations[i],
-            ball_rot_dt=chrono.ChQuaternionD(0, 0, 0.0436194, 0.9990482),
-            p1_init_x=p1_start_xy[i][0],
-            p1_init_z=p1_start_xy[i][1],
+            p1_init_xz=p1_start_xy[i],
             p1_vel=p1_start_velocities[i],
-            p2_init_x=p2_start_xy[i][0],
-            p2_init_z=p2_start_xy[i][1],
+            p2_init_xz=p2_start_xy[i],
             p2_vel=p2_start_velocities[i],
-            output_res=(1280, 720),
         )
-        sim.run_sim(SIM_LENGTH)
+        for i in range(4)
+    ]
+    run_scenarios(
+        scenarios,
+        ROOT_DIR_PATH,
+        sim_length=SIM_LENGTH,
+        sim_step_sz=SIM_STEP_SIZE,
+        output_res=(1280, 720),
+        separate_dirs=False,
+    )
+
+    # Many more randomly sampled rallies can be generated, each exported to its own directory, with e.g.
+    # run_sim_farm(ROOT_DIR_PATH / "farm", 1000, seed=0, first_sim_id=4)
 
     exit()
 
@@ -126,15 +113,8 @@ if __name__ == "__main__":
             N_FRAMES_TO_AVERAGE::N_FRAMES_TO_AVERAGE, :
         ].reset_index(drop=True)
 
+        camera = None
         for j in range(len(ball_pos_blurred_WC["x"])):
-            frame_ball_pos = np.array(
-                [
-                    ball_pos_blurred_WC["x"][j],
-                    ball_pos_blurred_WC["y"][j],
-                    ball_pos_blurred_WC["z"][j],
-                ]
-            )
-
             frame = cv.imread(
                 str(
                     ROOT_DIR_PATH
@@ -143,11 +123,13 @@ if __name__ == "__main__":
                     / f"frame{str(j).zfill(5)}.jpg"
                 )
             )
-            frame_dims = list(frame.shape[:2])
-            ball_x_ic, ball_y_ic = wc_to_ic(
-                frame_ball_pos,
-                frame_dims,
-            )
+            # All frames share the first frame's resolution, project every position at once
+            if camera is None:
+                camera = Camera(frame.shape[:2])
+                ball_pos_ic = camera.wc_to_ic(
+                    ball_pos_blurred_WC[["x", "y", "z"]].to_numpy()
+                )
+            ball_x_ic, ball_y_ic = ball_pos_ic[j]
 
             plt.imshow(cv.cvtColor(frame, cv.COLOR_BGR2RGB))
             plt.scatter(ball_x_ic, ball_y_ic, label="Ball", alpha=0.5)
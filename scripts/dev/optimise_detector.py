@@ -12,7 +12,7 @@ import numpy as np
 import pandas as pd
 
 from ai_umpire import VideoGenerator, BallDetector
-from ai_umpire.util import wc_to_ic
+from ai_umpire.util import Camera
 
 ROOT_DIR_PATH = Path() / "data"
 SIM_ID = 0
@@ -61,24 +61,21 @@ def eval_detector(
     min_euclid_dists = []
     max_euclid_dists = []
 
+    # Project true ball positions from world coordinates to image coordinates
+    ball_pos_true_ic = Camera([720, 1280]).wc_to_ic(
+        ball_pos_blurred_WC[["x", "y", "z"]].to_numpy()[: len(all_detections)]
+    )
+
     z_surrogate_closest_dets = []
     for i in range(len(all_detections)):
         # Calculate Euclidean distances from true pos to detected positions
-        ball_pos_true = np.array(
-            [
-                ball_pos_blurred_WC["x"][i],
-                ball_pos_blurred_WC["y"][i],
-                ball_pos_blurred_WC["z"][i],
-            ]
-        )
-        ball_x_ic, ball_y_ic = wc_to_ic(
-            ball_pos_true,
-            [720, 1280],
-        )
+        ball_x_ic, ball_y_ic = ball_pos_true_ic[i]
         euclid_dists = [
-            math.sqrt(((det_x - ball_x_ic) ** 2) + ((det_y - ball_y_ic) ** 2))
-            if det_x != -1
-            else DIST_PENALTY
+            (
+                math.sqrt(((det_x - ball_x_ic) ** 2) + ((det_y - ball_y_ic) ** 2))
+                if det_x != -1
+                else DIST_PENALTY
+            )
             for (det_x, det_y, _) in all_detections[i]
         ]
 
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_umpire.simulation.ballistic_simulator import (
+    BallisticSimulator,
+    sample_ball_launches,
+)
+
+
+def test_free_flight() -> None:
+    sim = BallisticSimulator(sim_step_sz=0.001, drag_coef=0.0)
+    init_pos = np.array([[0.0, 1.0, 0.0]])
+    init_vel = np.array([[1.0, 3.0, 2.0]])
+    ball_pos = sim.run_sim(init_pos, init_vel, 0.5)
+
+    # Without drag the ball follows a parabola until it lands
+    t = np.arange(ball_pos.shape[1]) * sim.get_step_sz()
+    expected = (
+        init_pos + t[:, None] * init_vel - 0.5 * 9.81 * np.c_[0 * t, t**2, 0 * t]
+    )
+    assert ball_pos.shape == (1, 500, 3)
+    assert np.allclose(ball_pos[0], expected, atol=5e-3)
+
+
+def test_bounces(tmp_path) -> None:
+    init_pos, init_vel = sample_ball_launches(200, seed=0)
+    sim = BallisticSimulator(restitution=0.6)
+    ball_pos = sim.run_sim(init_pos, init_vel, 2.0)
+
+    # Balls never go through the floor and only leave the court over the side walls, behind the back wall there's no
+    # side wall to go over
+    assert ball_pos[:, :, 1].min() >= 0.04 - 1e-9
+    abs_x = np.abs(ball_pos[:, :, 0])
+    crossed = (abs_x[:, :-1] < 3.2) & (abs_x[:, 1:] >= 3.2)
+    crossed &= np.abs(ball_pos[:, 1:, 2]) <= 4.875
+    assert np.all(ball_pos[:, 1:, 1][crossed] >= 5.64)
+
+    sim.export(ball_pos[:3], tmp_path, sim_ids=[7, 8, 9])
+    df = pd.DataFrame(
+        pd.read_csv(tmp_path / "ball_pos" / "sim_8.csv"), columns=["x", "y", "z"]
+    )
+    assert np.allclose(df.to_numpy(), ball_pos[1])
+
+    with pytest.raises(ValueError):
+        sim.run_sim(init_pos, init_vel[:-1], 1.0)
+
+
+def test_leaves_court_over_wall() -> None:
+    sim = BallisticSimulator(drag_coef=0.0)
+    ball_pos = sim.run_sim([[0.0, 3.0, -2.0]], [[0.0, 2.0, -8.0]], 1.5)[0]
+
+    # The ball goes over the back wall and lands behind it, never jumping back into the court
+    step_dists = np.linalg.norm(np.diff(ball_pos, axis=0), axis=1)
+    assert step_dists.max() < 0.1
+    assert ball_pos[-1, 2] < -4.875
+    assert np.all(np.diff(ball_pos[:, 2]) < 0)
+
+
+def test_leaves_court_over_wall_near_corner() -> None:
+    sim = BallisticSimulator(drag_coef=0.0)
+    ball_pos = sim.run_sim([[3.0, 3.0, -4.5]], [[1.0, 2.0, -8.0]], 1.0)[0]
+
+    # After going over the back wall the ball passes the side wall's plane behind the court without bouncing off it
+    assert ball_pos[-1, 0] > 3.2 and ball_pos[-1, 2] < -4.875
+    assert np.all(np.diff(ball_pos[:, 0]) > 0)
+    assert np.all(np.diff(ball_pos[:, 2]) < 0)
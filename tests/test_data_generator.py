@@ -2,9 +2,22 @@ import glob
 import os
 from pathlib import Path
 
+import cv2
+import numpy as np
+import pandas as pd
 import pytest
 
-from ai_umpire import VideoGenerator
+from ai_umpire import (
+    BallisticSimulator,
+    FastRenderer,
+    VideoGenerator,
+    VideoVariant,
+    sample_ball_launches,
+)
+from ai_umpire.util import detect_front_wall_coords
+from ai_umpire.util.util import FRONT_WALL_WORLD_COORDS
+from ai_umpire.video_generation.data_gen import _QueuedVideoWriter, _ThreadedImageIO
+from ai_umpire.video_generation.fast_renderer import PLAYER_COLOURS
 
 SIM_ID = 5
 ROOT_DIR = Path("C:\\Users\\david\\Data\\AI Umpire DS")
@@ -52,3 +65,167 @@ def test_vid_conversion(data_gen_instance) -> None:
     vid_count_post: int = len(glob.glob(f"{VID_DIR}{os.path.sep}*.mp4"))
 
     assert vid_count_post == vid_count_prior + 1
+
+
+def test_blurred_frames(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(10, 4, 6, 3), dtype=np.uint8)
+    frame_paths = []
+    for i, frame in enumerate(frames):
+        frame_paths.append(str(tmp_path / f"frame{i}.png"))
+        cv2.imwrite(frame_paths[-1], frame)
+
+    blurred = list(VideoGenerator._blurred_frames(frame_paths, 4))
+    with _ThreadedImageIO(n_threads=4, max_pending=3) as image_io:
+        blurred_threaded = list(
+            VideoGenerator._blurred_frames(frame_paths, 4, image_io)
+        )
+
+    # The 2 left over frames are dropped
+    assert len(blurred) == 2
+    assert np.array_equal(blurred[1], np.round(frames[4:8].mean(axis=0)))
+    assert np.array_equal(np.array(blurred_threaded), np.array(blurred))
+
+    # A missing image raises the same error whether read serially or on threads
+    frame_paths[5] = str(tmp_path / "missing.png")
+    with pytest.raises(ValueError, match="Could not read image"):
+        list(VideoGenerator._blurred_frames(frame_paths, 4))
+    with _ThreadedImageIO(n_threads=4, max_pending=3) as image_io:
+        with pytest.raises(ValueError, match="Could not read image"):
+            list(VideoGenerator._blurred_frames(frame_paths, 4, image_io))
+
+
+def test_queued_video_writer(tmp_path) -> None:
+    frames = np.zeros((5, 48, 64, 3), dtype=np.uint8)
+    with _QueuedVideoWriter(tmp_path / "vid.mp4", fps=10, max_queue_size=2) as writer:
+        for frame in frames:
+            writer.write(frame)
+
+    v_cap = cv2.VideoCapture(str(tmp_path / "vid.mp4"))
+    assert v_cap.get(cv2.CAP_PROP_FRAME_COUNT) == 5
+    v_cap.release()
+
+
+def test_queued_video_writer_open_error(tmp_path) -> None:
+    frames = np.zeros((20, 48, 64, 3), dtype=np.uint8)
+    writer = _QueuedVideoWriter(tmp_path / "missing" / "vid.mp4", fps=10)
+    with pytest.raises(ValueError, match="Could not open video"):
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+    with pytest.raises(ValueError, match="Could not open video"):
+        writer.close()
+
+
+def test_queued_video_writer_exit_error(tmp_path) -> None:
+    frames = np.zeros((5, 48, 64, 3), dtype=np.uint8)
+    # The exception raised in the with block propagates and the partial video is deleted
+    with pytest.raises(KeyError):
+        with _QueuedVideoWriter(tmp_path / "vid.mp4", fps=10) as writer:
+            for frame in frames:
+                writer.write(frame)
+            raise KeyError("Producer failed")
+    assert not (tmp_path / "vid.mp4").exists()
+
+    # Even when writing the video failed too
+    with pytest.raises(KeyError):
+        with _QueuedVideoWriter(tmp_path / "missing" / "vid.mp4", fps=10) as writer:
+            writer.write(frames[0])
+            raise KeyError("Producer failed")
+
+
+def test_blurred_frames_dirty_rects(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, size=(40, 70, 3), dtype=np.uint8)
+    frame_paths = []
+    for i in range(12):
+        # A ball moving over the static court, reaching the unpadded edge of the image
+        frame = background.copy()
+        frame[10 + 2 * i : 15 + 2 * i, 6 * i : 6 * i + 5] = 255
+        frame_paths.append(str(tmp_path / f"frame{i}.png"))
+        cv2.imwrite(frame_paths[-1], frame)
+
+    blurred = list(VideoGenerator._blurred_frames(frame_paths, 4))
+    blurred_dirty = list(
+        VideoGenerator._blurred_frames(frame_paths, 4, blur_mode="dirty_rects")
+    )
+
+    assert np.array_equal(np.array(blurred_dirty), np.array(blurred))
+    with pytest.raises(ValueError):
+        list(VideoGenerator._blurred_frames(frame_paths, 4, blur_mode="dirty"))
+
+
+def test_convert_frames_to_vids(tmp_path) -> None:
+    anim_dir = tmp_path / "generated_povray" / "sim_0_povray" / "anim"
+    anim_dir.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    for i in range(22):
+        frame = rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+        cv2.imwrite(str(anim_dir / f"sim_0{str(i).zfill(3)}.jpg"), frame)
+
+    variants = [
+        VideoVariant("full_res", fps=10, n_frames_avg=4),
+        VideoVariant("low_res", fps=5, img_dims=(24, 32), codec="MJPG", ext=".avi"),
+    ]
+    vid_paths = VideoGenerator(tmp_path).convert_frames_to_vids(0, variants)
+
+    assert [p.name for p in vid_paths] == ["sim_0_full_res.mp4", "sim_0_low_res.avi"]
+    # The blur window defaults to the number of rendered images divided by fps
+    for vid_path, n_frames, img_dims in zip(vid_paths, [5, 5], [(48, 64), (24, 32)]):
+        v_cap = cv2.VideoCapture(str(vid_path))
+        assert v_cap.get(cv2.CAP_PROP_FRAME_COUNT) == n_frames
+        assert v_cap.get(cv2.CAP_PROP_FRAME_HEIGHT) == img_dims[0]
+        assert v_cap.get(cv2.CAP_PROP_FRAME_WIDTH) == img_dims[1]
+        v_cap.release()
+
+
+def test_fast_renderer(tmp_path) -> None:
+    renderer = FastRenderer((720, 1280))
+    background = renderer.get_background()
+    # The drawn court can be calibrated automatically, the ends of the out line merge into the side wall out lines
+    expected = renderer.get_camera().wc_to_ic(FRONT_WALL_WORLD_COORDS.astype(float))
+    assert np.allclose(detect_front_wall_coords(background), expected, atol=6)
+
+    # A stationary ball is drawn where it's projected, the rest of the frame is the background
+    ball_pos = np.tile([0.0, 1.0, 0.0], (20, 1))
+    frames = list(renderer.render_frames(ball_pos, n_frames_avg=8))
+    x, y = np.round(renderer.get_camera().wc_to_ic(ball_pos[0])).astype(int)
+    assert len(frames) == 2
+    assert np.all(frames[0][y, x] == 255)
+    frames[0][y - 20 : y + 20, x - 20 : x + 20] = background[
+        y - 20 : y + 20, x - 20 : x + 20
+    ]
+    assert np.array_equal(frames[0], background)
+
+    sim = BallisticSimulator()
+    sim.export(sim.run_sim(*sample_ball_launches(1), 1.0), tmp_path, sim_ids=[3])
+    vid_path = renderer.render_sim(tmp_path, 3, fps=25)
+    v_cap = cv2.VideoCapture(str(vid_path))
+    assert v_cap.get(cv2.CAP_PROP_FRAME_COUNT) == 25
+    v_cap.release()
+
+
+def test_fast_renderer_players(tmp_path) -> None:
+    renderer = FastRenderer((360, 640))
+    ball_pos = np.tile([0.0, 1.0, 2.0], (40, 1))
+    players_pos = [
+        np.tile([-1.5, 0.9, -1.0], (40, 1)),
+        np.tile([1.5, 0.8, 0.0], (40, 1)),
+    ]
+    BallisticSimulator.export(ball_pos[None], tmp_path, sim_ids=[4])
+    (tmp_path / "player_pos").mkdir()
+    for player_num, player_pos in enumerate(players_pos, start=1):
+        pd.DataFrame(player_pos, columns=["x", "y", "z"]).to_csv(
+            tmp_path / "player_pos" / f"sim_4_player_{player_num}.csv"
+        )
+
+    vid_path = renderer.render_sim(tmp_path, 4, fps=5)
+    v_cap = cv2.VideoCapture(str(vid_path))
+    read, frame = v_cap.read()
+    v_cap.release()
+    assert read
+
+    # Each player's box is drawn in its colour at its projected centre, allowing for compression
+    for player_pos, colour in zip(players_pos, PLAYER_COLOURS):
+        x, y = np.round(renderer.get_camera().wc_to_ic(player_pos[0])).astype(int)
+        assert np.all(np.abs(frame[y, x].astype(int) - colour) < 40)
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import numpy as np
+
+from ai_umpire import BallDetector
+
+ROOT = Path("C:\\Users\\david\\Data\\AI Umpire DS")
+
+
+def test_seed_init_ball_pos() -> None:
+    rng = np.random.default_rng(0)
+    frame_detections = []
+    for i in range(12):
+        # The ball, a slowly moving player and noise, the ball is missed in some frames
+        dets = [(900 + rng.normal(0, 5), 600 + rng.normal(0, 5), 40.0)]
+        dets += [tuple(rng.uniform([0, 0, 2], [1280, 720, 10])) for _ in range(3)]
+        if i not in [2, 3, 7]:
+            dets.append((540 + 7 * i, 590 - 40 * i + 2 * i**2, 5.0))
+        frame_detections.append(dets)
+
+    detector = BallDetector(ROOT)
+    init_ball_pos, confidence = detector.seed_init_ball_pos(frame_detections)
+
+    assert init_ball_pos == (540, 590)
+    assert confidence > 0.5
+    assert detector.seed_init_ball_pos([[(-1, -1, -1)], [(-1, -1, -1)]]) == (None, 0.0)
@@ -2,10 +2,13 @@ from pathlib import Path
 from random import randint, uniform, choice, sample
 from typing import List
 
+import numpy as np
 import pychrono as chrono
 import pytest
 
+from ai_umpire.simulation.ball_flight_simulator import BallFlightSimulator
 from ai_umpire.simulation.match_simulator import MatchSimulator
+from ai_umpire.simulation.sim_farm import sample_scenarios
 
 ROOT = Path("C:\\Users\\david\\Data\\AI Umpire DS")
 SIM_ID = 5
@@ -54,3 +57,33 @@ def test_run_sim(sim_instance):
     assert len(ball_pos[0]) == sim_duration / sim_instance.get_step_sz()
     assert len(ball_pos[1]) == sim_duration / sim_instance.get_step_sz()
     assert len(ball_pos[2]) == sim_duration / sim_instance.get_step_sz()
+
+
+def test_sample_scenarios():
+    scenarios = sample_scenarios(8, seed=3)
+    # Each scenario has its own random stream, so it doesn't depend on how many are sampled
+    resampled = sample_scenarios(2, seed=3, first_sim_id=6)
+
+    assert [s.get_sim_id() for s in scenarios] == list(range(8))
+    assert [s.to_dict() for s in scenarios[6:]] == [s.to_dict() for s in resampled]
+    assert scenarios[0].to_dict() != sample_scenarios(1, seed=4)[0].to_dict()
+    for scenario in scenarios:
+        params = scenario.to_dict()
+        assert 2.5 <= abs(params["ball_init_pos"][0]) <= 3.0
+        assert (
+            np.linalg.norm(np.subtract(params["p1_init_xz"], params["p2_init_xz"]))
+            > 1.0
+        )
+
+
+def test_ball_flight_simulator(tmp_path):
+    scenarios = sample_scenarios(3, seed=0)
+    sim = BallFlightSimulator.from_scenarios(scenarios, tmp_path, 0.005)
+    sim_duration: float = 0.5
+    ball_pos = sim.run_sim(sim_duration, disable_progbar=True)
+
+    assert ball_pos.shape == (3, sim_duration / sim.get_step_sz(), 3)
+    for scenario, positions in zip(scenarios, ball_pos):
+        ball_pos_path = tmp_path / "ball_pos" / f"sim_{scenario.get_sim_id()}.csv"
+        assert ball_pos_path.exists()
+        assert np.allclose(positions[0], scenario.to_dict()["ball_init_pos"])
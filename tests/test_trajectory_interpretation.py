@@ -0,0 +1,416 @@
+import numpy as np
+import pytest
+
+from ai_umpire import KalmanFilter, TrajectoryInterpreter
+from ai_umpire.trajectory_interpretation import (
+    AnalyticEstimator,
+    ProbabilityEstimator,
+    RegularGridEstimator,
+    SobolEstimator,
+    AdaptiveEstimator,
+    InterpretationRenderer,
+    find_contact_windows,
+    interpret_trajectories,
+    kf_mean_positions,
+)
+from ai_umpire.util import CourtRegionIndex, CourtVoxelGrid
+
+
+def _front_wall_then_side_out() -> np.ndarray:
+    # Ball hits the front wall, then flies over the right wall's out line and stays there
+    to_front = np.c_[np.zeros(15), np.full(15, 2.0), np.linspace(0.0, 5.0, 15)]
+    to_side = np.c_[
+        np.linspace(0.0, 3.45, 15), np.linspace(2.0, 5.0, 15), np.linspace(5.0, 2.0, 15)
+    ]
+    return np.r_[to_front, to_side, np.tile(to_side[-1], (5, 1))]
+
+
+def _make_kf(measurements: np.ndarray) -> KalmanFilter:
+    # Constant position model observing the first three state elements
+    phi = np.zeros((3, 9))
+    phi[:, :3] = np.identity(3)
+    return KalmanFilter(
+        np.r_[measurements[0], np.zeros(6)].reshape((9, 1)),
+        measurements=measurements,
+        mu_p=np.zeros((9, 1)),
+        mu_m=np.zeros((3, 1)),
+        phi=phi,
+        psi=np.identity(9),
+        sigma_p=np.identity(9) * 0.01,
+        sigma_m=np.identity(3) * 0.01,
+    )
+
+
+@pytest.mark.parametrize(
+    "estimator", [SobolEstimator(1e-3, seed=0), AdaptiveEstimator(1e-3)]
+)
+def test_estimator_tolerance(estimator) -> None:
+    mu = np.array([-3.0, 3.5, 4.5])
+    cov = np.array([[0.4, 0.05, 0.0], [0.05, 0.6, 0.1], [0.0, 0.1, 0.5]])
+    expected = AnalyticEstimator(1e-7, n_quad_points=512).estimate(mu, cov)
+    probs = estimator.estimate(mu, cov)
+
+    assert probs.keys() == expected.keys()
+    for bb_name, p in probs.items():
+        assert p == pytest.approx(expected[bb_name], abs=3e-3)
+    assert estimator.get_n_samples() > 0
+
+
+@pytest.mark.parametrize(
+    "estimator",
+    [
+        SobolEstimator(1e-3, seed=0),
+        AdaptiveEstimator(1e-3),
+        AnalyticEstimator(),
+        RegularGridEstimator(),
+    ],
+)
+def test_estimator_singular_cov(estimator) -> None:
+    # No uncertainty in the ball's height, e.g. a ball known to be rolling along the floor
+    mu = np.array([-3.0, 0.2, 4.5])
+    cov = np.array([[0.4, 0.0, 0.1], [0.0, 0.0, 0.0], [0.1, 0.0, 0.5]])
+    expected = AnalyticEstimator(1e-7, n_quad_points=512).estimate(mu, cov)
+    probs = estimator.estimate(mu, cov)
+
+    for bb_name, p in probs.items():
+        assert 0.0 <= p <= 1.0
+        if not isinstance(estimator, RegularGridEstimator):
+            assert p == pytest.approx(expected[bb_name], abs=3e-3)
+    assert probs["tin"] > 0.0
+
+
+def _random_gaussians(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        mu = rng.uniform([-3.5, 0.0, -5.0], [3.5, 6.0, 5.0])
+        a = rng.normal(size=(3, 3)) * rng.uniform(0.1, 1.0)
+        yield mu, a @ a.T + 0.01 * np.identity(3)
+
+
+def test_adaptive_estimator_sample_budget(tmp_path) -> None:
+    estimator = AdaptiveEstimator(1e-3)
+    capped_estimator = AdaptiveEstimator(1e-3, max_samples=2**10)
+    voxel_estimator = AdaptiveEstimator(
+        1e-3, voxel_grid=CourtVoxelGrid(0.1, cache_dir=tmp_path)
+    )
+    n_samples = []
+    for mu, cov in _random_gaussians(20):
+        probs = estimator.estimate(mu, cov)
+        n_samples.append(estimator.get_n_samples())
+
+        capped_estimator.estimate(mu, cov)
+        assert capped_estimator.get_n_samples() <= len(probs) * 2**10
+
+        # The broad phase only skips bbs whose probability is below tolerance
+        for bb_name, p in voxel_estimator.estimate(mu, cov).items():
+            assert p == pytest.approx(probs[bb_name], abs=1e-3)
+        assert voxel_estimator.get_n_samples() <= n_samples[-1]
+
+    # Refining every bb to the maximum depth used over 100000 samples per estimate on average
+    assert np.mean(n_samples) < 20000
+
+    # Far from every bb, nothing is integrated
+    estimator.estimate(np.array([0.0, 2.0, 0.0]), np.identity(3) * 0.01)
+    assert estimator.get_n_samples() == 0
+
+
+def test_find_contact_windows() -> None:
+    # Ball travels to the front wall, bounces off it and then lands on the floor
+    t = np.linspace(0, 1, 41)
+    z = np.where(t <= 0.5, -2.0 + 13.6 * t, 4.8 - 8.0 * (t - 0.5))
+    y = 1.0 + 6.0 * t - 6.9 * t**2
+    positions = np.c_[np.zeros_like(t), y, z]
+
+    windows = find_contact_windows(positions, padding=2)
+    assert len(windows) == 2
+    assert windows[0][0] <= 20 < windows[0][1]
+    assert windows[1][1] == t.shape[0]
+    assert all(end < start for (_, end), (start, _) in zip(windows, windows[1:]))
+
+
+def test_kf_mean_positions() -> None:
+    measurements = _front_wall_then_side_out()
+    kf = _make_kf(measurements)
+    positions = kf_mean_positions(kf)
+    assert positions.shape == (measurements.shape[0], 3)
+    assert kf.get_t_step() == 0
+
+    for _ in range(measurements.shape[0]):
+        kf.step()
+    assert kf_mean_positions(kf).shape == (0, 3)
+    assert find_contact_windows(kf_mean_positions(kf)) == []
+
+
+@pytest.mark.parametrize("swept", [False, True])
+def test_event_driven_interpretation(swept) -> None:
+    measurements = _front_wall_then_side_out()
+    full_ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements), method="analytic", swept=swept
+    )
+    full_probs = np.array([list(p.values()) for _, p in full_ti.iter_interpretation()])
+    windowed_ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements),
+        method="analytic",
+        swept=swept,
+        event_driven=True,
+    )
+    for i, probs in windowed_ti.iter_interpretation():
+        assert list(probs.values()) == pytest.approx(list(full_probs[i]))
+
+    # Measurements outside the contact windows are given probability 0 and are only missed if they are below 1e-3
+    assert len(windowed_ti.get_contact_windows()) > 0
+    windowed_probs = windowed_ti.get_collision_probs()
+    assert windowed_probs.shape == full_probs.shape
+    assert np.all(np.abs(windowed_probs - full_probs) < 1e-3)
+    assert windowed_ti.get_n_samples_used().sum() <= full_ti.get_n_samples_used().sum()
+
+
+def test_swept_interpretation() -> None:
+    # Ball flies over the front wall's out line between two measurements, the line is only 0.5m deep
+    measurements = np.array([[0.0, 5.5, 3.2], [0.0, 5.5, 4.5], [0.0, 5.5, 5.8]])
+
+    def make_kf():
+        # The mean follows the measurements closely, with a standard deviation of about 0.1m
+        phi = np.zeros((3, 9))
+        phi[:, :3] = np.identity(3)
+        return KalmanFilter(
+            np.r_[measurements[0], np.zeros(6)].reshape((9, 1)),
+            measurements=measurements,
+            mu_p=np.zeros((9, 1)),
+            mu_m=np.zeros((3, 1)),
+            phi=phi,
+            psi=np.identity(9),
+            sigma_p=np.identity(9) * 10,
+            sigma_m=np.identity(3) * 0.01,
+        )
+
+    means = kf_mean_positions(make_kf())
+    assert means[1, 2] < 4.875 and means[2, 2] > 5.375
+
+    # Evaluating the predicted positions alone misses the out line, the segment between them crosses it
+    ti = TrajectoryInterpreter(kalman_filter=make_kf(), method="analytic")
+    assert ti.classify_trajectory(0.3)[0] == "in"
+    swept_ti = TrajectoryInterpreter(
+        kalman_filter=make_kf(), method="analytic", swept=True
+    )
+    label, _, bb_name = swept_ti.classify_trajectory(0.3)
+    assert (label, bb_name) == ("out", "front_wall_out")
+    front_wall_out = swept_ti.get_bb_names().index("front_wall_out")
+    assert swept_ti.get_collision_probs()[2, front_wall_out] > 0.9
+    assert ti.get_collision_probs()[:, front_wall_out].max() < 1e-3
+
+
+def test_renderer_error_propagates(tmp_path, monkeypatch) -> None:
+    trajectory = np.c_[np.zeros(5), np.linspace(1, 2, 5), np.linspace(-2, 4, 5)]
+    renderer = InterpretationRenderer(trajectory, tmp_path / "frames", max_queue_size=1)
+
+    def failing_render(*args):
+        raise RuntimeError("Render failed")
+
+    monkeypatch.setattr(renderer, "_render", failing_render)
+    probs = np.zeros(9)
+    # The worker keeps draining the queue after failing, so submit never blocks and raises the render error
+    with pytest.raises(RuntimeError, match="Render failed"):
+        for t_step in range(50):
+            renderer.submit(t_step, trajectory[0], probs)
+    with pytest.raises(RuntimeError, match="Render failed"):
+        renderer.close()
+
+
+def test_renderer_exit_error(tmp_path, monkeypatch) -> None:
+    measurements = _front_wall_then_side_out()[:10]
+
+    def failing_render(*args):
+        raise RuntimeError("Render failed")
+
+    monkeypatch.setattr(InterpretationRenderer, "_render", failing_render)
+
+    # The exception raised in the with block propagates rather than the render error, the partial MP4 is deleted
+    with pytest.raises(KeyError):
+        with InterpretationRenderer(measurements, tmp_path / "vid.mp4") as renderer:
+            renderer.submit(0, measurements[0], np.zeros(9))
+            raise KeyError("Interpretation failed")
+    assert not (tmp_path / "vid.mp4").exists()
+
+    # Likewise for an error interpreting the trajectory while rendering it
+    class FailingEstimator(_ConstantEstimator):
+        def _estimate(self, mu, cov, bb_names):
+            if self.n_calls == 3:
+                raise KeyError("Interpretation failed")
+            self.n_calls += 1
+            return super()._estimate(mu, cov, bb_names)
+
+    estimator = FailingEstimator()
+    estimator.n_calls = 0
+    ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements),
+        estimator=estimator,
+        render_path=tmp_path / "interpretation.mp4",
+    )
+    with pytest.raises(KeyError):
+        ti.interpret_trajectory()
+    assert not (tmp_path / "interpretation.mp4").exists()
+
+
+def test_iter_interpretation() -> None:
+    measurements = _front_wall_then_side_out()
+    ti = TrajectoryInterpreter(kalman_filter=_make_kf(measurements), method="analytic")
+    steps = list(ti.iter_interpretation())
+
+    assert [i for i, _ in steps] == list(range(measurements.shape[0]))
+    for i, probs in steps:
+        assert list(probs.keys()) == ti.get_bb_names()
+        assert list(probs.values()) == list(ti.get_collision_probs()[i])
+
+    # Stops at the first measurement confidently in an out bb
+    ti = TrajectoryInterpreter(kalman_filter=_make_kf(measurements), method="analytic")
+    steps = list(ti.iter_interpretation(0.5))
+    assert steps[-1][1]["right_wall_out"] >= 0.5
+    assert all(
+        max(probs[name] for name in ("right_wall_out", "front_wall_out")) < 0.5
+        for _, probs in steps[:-1]
+    )
+    assert ti.get_collision_probs().shape[0] == len(steps) < measurements.shape[0]
+
+
+@pytest.mark.parametrize("method", ["grid", "analytic"])
+def test_culling(method) -> None:
+    measurements = _front_wall_then_side_out()
+
+    def interpret(**kwargs):
+        ti = TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements), method=method, **kwargs
+        )
+        ti.interpret_trajectory()
+        return ti.get_collision_probs()
+
+    # Culling is off by default, so no probability is dropped, and culled bbs are those with negligible probability
+    unculled_probs = interpret(n_std_devs_to_cull=None)
+    assert np.array_equal(interpret(), unculled_probs)
+    assert np.allclose(interpret(n_std_devs_to_cull=6), unculled_probs, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements), region_index=CourtRegionIndex()
+        )
+
+
+@pytest.mark.parametrize("method", ["grid", "adaptive"])
+def test_interpreter_voxel_grid(method) -> None:
+    measurements = _front_wall_then_side_out()[::2]
+    voxel_grid = CourtVoxelGrid(0.1)
+    probs = []
+    for grid in (None, voxel_grid):
+        ti = TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements), method=method, voxel_grid=grid
+        )
+        ti.interpret_trajectory()
+        probs.append(ti.get_collision_probs())
+
+    # The voxel grid only changes how points are tested, or skips bbs with probability below tolerance
+    assert ti._estimator._voxel_grid is voxel_grid
+    assert np.allclose(probs[1], probs[0], atol=1e-3)
+
+    with pytest.raises(ValueError):
+        TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements),
+            method="analytic",
+            voxel_grid=voxel_grid,
+        )
+
+
+def test_classify_trajectory_early_exit() -> None:
+    measurements = _front_wall_then_side_out()
+    verdicts = []
+    for early_exit in [False, True]:
+        ti = TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements), method="analytic"
+        )
+        verdicts.append(ti.classify_trajectory(0.3, early_exit=early_exit))
+    (full_label, _, full_bb), (early_label, _, early_bb) = verdicts
+    assert full_label == early_label == "out"
+    assert full_bb == early_bb == "right_wall_out"
+
+    # Without early exit the verdict is over all bbs, so confidently hitting the front wall, an in bb, is labelled out
+    ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements[:20]), method="analytic"
+    )
+    assert ti.classify_trajectory(0.3)[::2] == ("out", "front_wall")
+
+    # Early exit only stops on out bbs, its verdict is over the out bbs like interpret_trajectory's
+    ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements[:20]), method="analytic"
+    )
+    assert ti.classify_trajectory(0.3, early_exit=True)[0] == "in"
+    full_ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements), method="analytic"
+    )
+    assert full_ti.interpret_trajectory()[1] == early_bb
+
+
+class _ConstantEstimator(ProbabilityEstimator):
+    def _estimate(self, mu, cov, bb_names):
+        return {bb_name: 0.5 for bb_name in bb_names}
+
+
+def test_collision_prob_ties() -> None:
+    measurements = _front_wall_then_side_out()[:5]
+    ti = TrajectoryInterpreter(
+        kalman_filter=_make_kf(measurements),
+        estimator=_ConstantEstimator(),
+    )
+    label, _, bb_name = ti.classify_trajectory(0.3)
+
+    # The highest out probability is the last tied one, the most likely collision of a measurement the first
+    assert label == "out"
+    assert bb_name == "right_wall_out"
+    assert ti._highest_collision_prob()[2] == measurements.shape[0] - 1
+    assert ti._most_likely_collision(0) == (0.5, "front_wall")
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_interpret_trajectories(n_workers) -> None:
+    rallies = {
+        "side_out": _front_wall_then_side_out(),
+        "front_wall": _front_wall_then_side_out()[:20],
+        "short": _front_wall_then_side_out()[::3],
+    }
+    results = interpret_trajectories(
+        {rally_id: _make_kf(m) for rally_id, m in rallies.items()},
+        0.3,
+        n_workers=n_workers,
+        method="analytic",
+    )
+
+    assert list(results.index) == list(rallies.keys())
+    for rally_id, measurements in rallies.items():
+        ti = TrajectoryInterpreter(
+            kalman_filter=_make_kf(measurements), method="analytic"
+        )
+        label, confidence, bb_name = ti.classify_trajectory(0.3)
+        assert results.loc[rally_id, "label"] == label
+        assert results.loc[rally_id, "confidence"] == pytest.approx(confidence)
+        assert results.loc[rally_id, "bb_name"] == bb_name
+        assert results.loc[rally_id, "n_processed"] == measurements.shape[0]
+
+
+def test_interpret_trajectories_frame() -> None:
+    # The front wall, an in bb, peaks before the low out bb probability early exit stops on
+    measurements = _front_wall_then_side_out()
+    results = interpret_trajectories(
+        [_make_kf(measurements)],
+        0.02,
+        n_workers=1,
+        early_exit=True,
+        method="analytic",
+        n_std_devs_to_cull=6,
+        region_index=CourtRegionIndex(),
+    )
+    ti = TrajectoryInterpreter(kalman_filter=_make_kf(measurements), method="analytic")
+    _, _, bb_name = ti.classify_trajectory(0.02, early_exit=True)
+    probs = ti.get_collision_probs()
+    in_peak_frame = int(np.argmax(probs[:, ti.get_bb_names().index("front_wall")]))
+
+    assert results.loc[0, "bb_name"] == bb_name == "right_wall_out"
+    assert results.loc[0, "frame"] == probs.shape[0] - 1 > in_peak_frame
+    assert probs[in_peak_frame].max() > probs[-1].max()
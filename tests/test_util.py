@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import cv2 as cv
 import numpy as np
 import pytest
 
@@ -9,7 +10,22 @@ from ai_umpire.util import (
     binarize_frames,
     difference_frames,
     apply_morph_op,
+    wc_to_ic,
+    Camera,
+    back_project_ic_to_wc,
+    reprojection_error,
+    detect_front_wall_coords,
+    CameraCalibration,
+    cov_factor,
+    gaussian_bb_prob,
+    points_in_bb,
+    bb_aabb,
+    CourtRegionIndex,
+    CourtVoxelGrid,
+    segments_bb_intersection,
+    FIELD_BOUNDING_BOXES,
 )
+from ai_umpire.util.util import FRONT_WALL_WORLD_COORDS
 
 ROOT_DIR = Path("C:\\Users\\david\\Data\\AI Umpire DS")
 SIM_ID = 1
@@ -77,3 +93,204 @@ def test_morph_op(morph_op) -> None:
     assert morph_op_frames.shape == binary_frames.shape
     assert morph_op_frames.max() == binary_frames.max()
     assert morph_op_frames.min() == binary_frames.min()
+
+
+@pytest.mark.parametrize("bb_name", list(FIELD_BOUNDING_BOXES.keys()))
+def test_gaussian_bb_prob(bb_name) -> None:
+    rng = np.random.default_rng(0)
+    mu = np.array([-3.0, 3.5, 4.5])
+    cov = np.array([[0.4, 0.05, 0.0], [0.05, 0.6, 0.1], [0.0, 0.1, 0.5]])
+
+    samples = rng.multivariate_normal(mu, cov, size=200_000)
+    mc_prob = points_in_bb(samples, bb_name).mean()
+
+    assert gaussian_bb_prob(mu, cov, bb_name) == pytest.approx(mc_prob, abs=5e-3)
+
+
+@pytest.mark.parametrize("bb_name", list(FIELD_BOUNDING_BOXES.keys()))
+def test_gaussian_bb_prob_singular_cov(bb_name) -> None:
+    rng = np.random.default_rng(0)
+    mu = np.array([-3.0, 3.5, 4.5])
+    # Rank 2, the ball is only uncertain in an oblique plane through the mean
+    a = np.array([[0.6, 0.1], [0.2, 0.7], [0.1, -0.5]])
+    cov = a @ a.T
+    with pytest.raises(np.linalg.LinAlgError):
+        np.linalg.cholesky(cov)
+
+    samples = mu + rng.standard_normal((200_000, 2)) @ a.T
+    mc_prob = points_in_bb(samples, bb_name).mean()
+
+    assert gaussian_bb_prob(mu, cov, bb_name) == pytest.approx(mc_prob, abs=5e-3)
+    chol = cov_factor(cov)
+    assert np.allclose(chol @ chol.T, cov)
+
+
+def test_court_region_index() -> None:
+    index = CourtRegionIndex(cell_size=0.5)
+    rng = np.random.default_rng(0)
+    lowers = rng.uniform([-5.0, -1.0, -7.0], [5.0, 7.0, 7.0], size=(50, 3))
+    uppers = lowers + rng.uniform(0.0, 3.0, size=(50, 3))
+    for lower, upper in zip(lowers, uppers):
+        expected = [
+            bb_name
+            for bb_name in FIELD_BOUNDING_BOXES.keys()
+            if np.all(bb_aabb(bb_name)[0] <= upper)
+            and np.all(bb_aabb(bb_name)[1] >= lower)
+        ]
+        assert index.query(lower, upper) == expected
+
+
+def test_court_voxel_grid(tmp_path) -> None:
+    voxel_grid = CourtVoxelGrid(0.1, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    cached_voxel_grid = CourtVoxelGrid(0.1, cache_dir=tmp_path)
+
+    points = np.random.default_rng(0).uniform(
+        [-4.0, -0.5, -6.0], [4.0, 7.0, 6.0], size=(100000, 3)
+    )
+    for bb_name in FIELD_BOUNDING_BOXES.keys():
+        expected = points_in_bb(points, bb_name)
+        assert np.array_equal(voxel_grid.points_in_bb(points, bb_name), expected)
+        assert np.array_equal(cached_voxel_grid.points_in_bb(points, bb_name), expected)
+
+
+def test_court_voxel_grid_faces() -> None:
+    voxel_grid = CourtVoxelGrid(0.1)
+
+    # Points on and just either side of the faces of every bb's AABB, including those on the volume's upper faces
+    corners = np.array(
+        [
+            np.where(np.array([i, j, k]) == 1, *bb_aabb(bb_name)[::-1])
+            for bb_name in FIELD_BOUNDING_BOXES.keys()
+            for i in (0, 1)
+            for j in (0, 1)
+            for k in (0, 1)
+        ]
+    )
+    offsets = np.array([0.0, 1e-10, -1e-10, 1e-6, -1e-6])
+    points = (corners[:, None, :] + offsets[None, :, None]).reshape(-1, 3)
+    for bb_name in FIELD_BOUNDING_BOXES.keys():
+        expected = points_in_bb(points, bb_name)
+        assert np.array_equal(voxel_grid.points_in_bb(points, bb_name), expected)
+
+
+def test_court_voxel_grid_box_labels(tmp_path) -> None:
+    voxel_grid = CourtVoxelGrid(0.1, cache_dir=tmp_path)
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        lower = rng.uniform([-4.0, -0.5, -6.0], [4.0, 7.0, 6.0])
+        upper = lower + rng.uniform(0.0, 2.0, size=3)
+        labels = voxel_grid.box_labels(lower, upper)
+
+        # Every bb containing a point of the box is labelled
+        points = rng.uniform(lower, upper, size=(1000, 3))
+        assert np.all(voxel_grid.point_labels(points) & ~labels == 0)
+        for bb_name in FIELD_BOUNDING_BOXES.keys():
+            bb_lower, bb_upper = bb_aabb(bb_name)
+            margin = voxel_grid.get_resolution()
+            if np.any(bb_upper < lower - margin) or np.any(bb_lower > upper + margin):
+                assert not labels & voxel_grid.get_bb_bit(bb_name)
+
+    assert voxel_grid.box_labels(np.full(3, 20.0), np.full(3, 21.0)) == 0
+
+
+@pytest.mark.parametrize("bb_name", list(FIELD_BOUNDING_BOXES.keys()))
+def test_segments_bb_intersection(bb_name) -> None:
+    rng = np.random.default_rng(0)
+    starts = rng.uniform([-4.0, -0.5, -6.0], [4.0, 7.0, 6.0], size=(5000, 3))
+    ends = starts + rng.normal(0, 1.0, size=starts.shape)
+    hit, t_enter, t_exit = segments_bb_intersection(starts, ends, bb_name)
+
+    # Compare against densely sampled points along each segment
+    t = np.linspace(0, 1, 1001)
+    points = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+    inside = points_in_bb(points.reshape(-1, 3), bb_name).reshape(starts.shape[0], -1)
+    assert np.array_equal(hit, np.any(inside, axis=1))
+    assert np.allclose(t_enter[hit], t[np.argmax(inside[hit], axis=1)], atol=1e-3)
+    assert np.all(t_enter[hit] <= t_exit[hit])
+
+
+def test_camera_wc_to_ic() -> None:
+    img_dims = [720, 1280]
+    camera = Camera(img_dims)
+    points = np.random.default_rng(0).uniform(
+        [-3.0, 0.0, -4.0], [3.0, 5.0, 4.0], size=(100, 3)
+    )
+    expected = np.array([wc_to_ic(point, img_dims) for point in points])
+
+    assert img_dims == [720, 1280]
+    assert np.allclose(camera.wc_to_ic(points), expected)
+    assert np.allclose(camera.wc_to_ic(points[0]), expected[0])
+
+
+def test_back_project_ic_to_wc() -> None:
+    rng = np.random.default_rng(0)
+    points_wc = np.c_[rng.uniform(-3.0, 3.0, size=(50, 2)), np.zeros(50)]
+
+    # Homography round trip on the world plane
+    h = np.array([[2.0, 0.1, -5.0], [0.2, 1.5, 3.0], [0.001, 0.002, 1.0]])
+    points_ic = np.c_[points_wc[:, :2], np.ones(50)] @ np.linalg.inv(h).T
+    points_ic = points_ic[:, :2] / points_ic[:, 2:]
+    assert np.allclose(back_project_ic_to_wc(points_ic, homography=h), points_wc)
+
+    # Camera round trip, all points are the same distance from the camera
+    cam_intrinsics = np.array([[800.0, 0.0, 640.0], [0.0, 800.0, 360.0], [0, 0, 1]])
+    rot_mtx = np.identity(3)
+    t_vec = np.array([[0.0], [0.0], [10.0]])
+    points_cam = points_wc @ rot_mtx.T + np.ravel(t_vec)
+    points_ic = (points_cam / points_cam[:, 2:]) @ cam_intrinsics.T
+    camera_params = (cam_intrinsics, rot_mtx, t_vec)
+    assert np.allclose(
+        reprojection_error(
+            points_wc, points_ic[:, :2], camera_params=camera_params, w=10.0
+        ),
+        0.0,
+    )
+
+    with pytest.raises(ValueError):
+        back_project_ic_to_wc(points_ic[:, :2])
+
+
+def test_detect_front_wall_coords() -> None:
+    img_dims = (720, 1280)
+    expected = Camera(img_dims).wc_to_ic(FRONT_WALL_WORLD_COORDS.astype(float))
+
+    # Out line, service line and a tin which shouldn't be mistaken for either
+    frame = np.full((*img_dims, 3), 128, dtype=np.uint8)
+    for left, right in [(0, 2), (1, 3)]:
+        cv.line(
+            frame,
+            tuple(expected[left].astype(int)),
+            tuple(expected[right].astype(int)),
+            (60, 20, 220),
+            4,
+        )
+    tin_y = int(expected[1, 1] + 90)
+    cv.rectangle(
+        frame,
+        (int(expected[0, 0]), tin_y),
+        (int(expected[2, 0]), tin_y + 25),
+        (60, 20, 170),
+        -1,
+    )
+
+    assert np.allclose(detect_front_wall_coords(frame), expected, atol=3)
+
+
+def test_camera_calibration(tmp_path) -> None:
+    img_dims = (720, 1280)
+    # Clicked coordinates are never exactly on the lines
+    image_coords = np.round(
+        Camera(img_dims).wc_to_ic(FRONT_WALL_WORLD_COORDS.astype(float))
+    ) + np.array([[0, 0], [1, 0], [0, 1], [0, 0]])
+    calibration = CameraCalibration.calibrate(image_coords, img_dims, "sim_0")
+    calibration.save(tmp_path / "sim_0.calibration.npz")
+    loaded = CameraCalibration.load(tmp_path / "sim_0.calibration.npz")
+
+    assert np.allclose(loaded.get_homography(), calibration.get_homography())
+    assert np.allclose(
+        loaded.get_homography() @ loaded.get_homography_inv(), np.identity(3)
+    )
+    assert loaded.is_valid(img_dims, "sim_0")
+    assert not loaded.is_valid((480, 852), "sim_0")
+    assert not loaded.is_valid(img_dims, "sim_1")